@@ -21,12 +21,14 @@ router = APIRouter()
 @router.get("/download", summary="查询下载历史记录", response_model=List[schemas.DownloadHistory])
 def download_history(page: int = 1,
                      count: int = 30,
+                     title: str = None,
+                     cursor: int = None,
                      db: Session = Depends(get_db),
                      _: schemas.TokenPayload = Depends(verify_token)) -> Any:
     """
-    查询下载历史记录
+    查询下载历史记录，传入cursor（上一页最后一条记录的id）时按游标翻页
     """
-    return DownloadHistory.list_by_page(db, page, count)
+    return DownloadHistory.list_by_page(db, page, count, title=title, cursor=cursor)
 
 
 @router.delete("/download", summary="删除下载历史记录", response_model=schemas.Response)
@@ -45,10 +47,11 @@ def transfer_history(title: str = None,
                      page: int = 1,
                      count: int = 30,
                      status: bool = None,
+                     cursor: int = None,
                      db: Session = Depends(get_db),
                      _: schemas.TokenPayload = Depends(verify_token)) -> Any:
     """
-    查询转移历史记录
+    查询转移历史记录，传入cursor（上一页最后一条记录的id）时按游标翻页
     """
     if title == "失败":
         title = None
@@ -57,18 +60,14 @@ def transfer_history(title: str = None,
         title = None
         status = True
 
-    if title:
-        total = TransferHistory.count_by_title(db, title=title, status=status)
-        result = TransferHistory.list_by_title(db, title=title, page=page,
-                                               count=count, status=status)
-    else:
-        result = TransferHistory.list_by_page(db, page=page, count=count, status=status)
-        total = TransferHistory.count(db, status=status)
-
+    result, total = TransferHistory.list_with_total(db, title=title, status=status, cursor=cursor,
+                                                    page=page, count=count)
     return schemas.Response(success=True,
                             data={
                                 "list": result,
                                 "total": total,
+                                # 下一页游标，没有更多记录时为空
+                                "cursor": result[-1].id if len(result) >= count else None
                             })
 
 
@@ -1,9 +1,12 @@
+import mimetypes
+import re
 import shutil
 from pathlib import Path
 from typing import Any, List
+from urllib.parse import quote
 
-from fastapi import APIRouter, Depends, HTTPException
-from starlette.responses import FileResponse, Response
+from fastapi import APIRouter, Depends, HTTPException, Header
+from starlette.responses import FileResponse, Response, StreamingResponse
 
 from app import schemas
 from app.chain.transfer import TransferChain
@@ -179,10 +182,32 @@ def delete_local(fileitem: schemas.FileItem, _: schemas.TokenPayload = Depends(v
     return schemas.Response(success=True)
 
 
+def __file_chunks(path: Path, start: int, length: int, chunk_size: int = 1024 * 1024):
+    """
+    分块读取文件的指定范围
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(chunk_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def __content_disposition(filename: str) -> str:
+    """
+    下载文件名，兼容中文
+    """
+    return f"attachment; filename*=UTF-8''{quote(filename)}"
+
+
 @router.get("/download", summary="下载文件（本地）")
-def download_local(path: str, _: schemas.TokenPayload = Depends(verify_uri_token)) -> Any:
+def download_local(path: str, range_header: str = Header(None, alias="Range"),
+                   _: schemas.TokenPayload = Depends(verify_uri_token)) -> Any:
     """
-    下载文件或目录
+    下载文件或目录，文件支持断点续传，目录边压缩边下载
     """
     if not path:
         return schemas.Response(success=False)
@@ -191,14 +216,38 @@ def download_local(path: str, _: schemas.TokenPayload = Depends(verify_uri_token
         raise HTTPException(status_code=404, detail="文件不存在")
     if path_obj.is_file():
         # 做为文件流式下载
-        return FileResponse(path_obj)
+        file_size = path_obj.stat().st_size
+        media_type = mimetypes.guess_type(path_obj.name)[0] or "application/octet-stream"
+        headers = {
+            "Accept-Ranges": "bytes",
+            "Content-Disposition": __content_disposition(path_obj.name)
+        }
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", (range_header or "").strip())
+        if not match or not any(match.groups()):
+            # 无范围或多个范围时返回整个文件
+            return FileResponse(path_obj, media_type=media_type, headers=headers)
+        start, end = match.groups()
+        if start:
+            start = int(start)
+            end = min(int(end), file_size - 1) if end else file_size - 1
+        else:
+            # 最后若干字节
+            start = max(file_size - int(end), 0)
+            end = file_size - 1
+        if start > end or start >= file_size:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{file_size}"})
+        headers.update({
+            "Content-Range": f"bytes {start}-{end}/{file_size}",
+            "Content-Length": str(end - start + 1)
+        })
+        return StreamingResponse(__file_chunks(path_obj, start, end - start + 1),
+                                 status_code=206, media_type=media_type, headers=headers)
     else:
-        # 做为压缩包下载
-        shutil.make_archive(base_name=path_obj.stem, format="zip", root_dir=path_obj)
-        reponse = Response(content=path_obj.read_bytes(), media_type="application/zip")
-        # 删除压缩包
-        Path(f"{path_obj.stem}.zip").unlink()
-        return reponse
+        # 做为压缩包下载，已压缩的媒体文件直接存储
+        store_exts = settings.RMT_MEDIAEXT + settings.RMT_AUDIO_TRACK_EXT + IMAGE_TYPES
+        return StreamingResponse(SystemUtils.zip_stream(path_obj, store_exts=store_exts),
+                                 media_type="application/zip",
+                                 headers={"Content-Disposition": __content_disposition(f"{path_obj.name}.zip")})
 
 
 @router.post("/rename", summary="重命名文件或目录（本地）", response_model=schemas.Response)
@@ -1,28 +1,34 @@
+import asyncio
 import json
-import time
 from datetime import datetime
 from typing import Union, Any
 
-import tailer
 from dotenv import set_key
-from fastapi import APIRouter, HTTPException, Depends, Response
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, Depends, Response, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, FileResponse
 
 from app import schemas
 from app.chain.search import SearchChain
 from app.chain.system import SystemChain
 from app.core.config import settings, global_vars
+from app.core.event import EventManager
+from app.core.metainfo import MetaInfoCache
 from app.core.module import ModuleManager
 from app.core.security import verify_token
 from app.db.models import User
 from app.db.systemconfig_oper import SystemConfigOper
 from app.db.userauth import get_current_active_superuser
+from app.helper.broadcast import BroadcastHub
+from app.helper.imagecache import ImageCacheHelper
+from app.helper.logfile import LogFileHelper
 from app.helper.message import MessageHelper
 from app.helper.progress import ProgressHelper
 from app.helper.sites import SitesHelper
+from app.modules.themoviedb.tmdb_cache import TmdbDetailCache
 from app.scheduler import Scheduler
 from app.schemas.types import SystemConfigKey
-from app.utils.http import RequestUtils
+from app.utils.http import RequestUtils, SessionRegistry
 from app.utils.system import SystemUtils
 from version import APP_VERSION
 
@@ -30,19 +36,26 @@ router = APIRouter()
 
 
 @router.get("/img/{proxy}", summary="图片代理")
-def get_img(imgurl: str, proxy: bool = False) -> Any:
+def get_img(imgurl: str, proxy: bool = False, width: int = None,
+            if_none_match: str = Header(None)) -> Any:
     """
-    通过图片代理（使用代理服务器）
+    通过图片代理（使用代理服务器），图片缓存在本地
+    width: 缩略图宽度，为空时返回原图
     """
-    if not imgurl:
+    if not imgurl or not imgurl.startswith(("http://", "https://")):
         return None
-    if proxy:
-        response = RequestUtils(ua=settings.USER_AGENT, proxies=settings.PROXY).get_res(url=imgurl)
-    else:
-        response = RequestUtils(ua=settings.USER_AGENT).get_res(url=imgurl)
-    if response:
-        return Response(content=response.content, media_type="image/jpeg")
-    return None
+    imagehelper = ImageCacheHelper()
+    cache_file = imagehelper.get(url=imgurl, proxy=proxy, width=width)
+    if not cache_file:
+        return None
+    etag = f'"{cache_file.stem}-{cache_file.stat().st_mtime_ns}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=2592000"
+    }
+    if if_none_match and etag in if_none_match:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(cache_file, media_type=imagehelper.get_content_type(cache_file), headers=headers)
 
 
 @router.get("/env", summary="查询系统环境变量", response_model=schemas.Response)
@@ -85,9 +98,9 @@ def set_env_setting(env: dict,
 
 
 @router.get("/progress/{process_type}", summary="实时进度")
-def get_progress(process_type: str, token: str):
+async def get_progress(process_type: str, token: str):
     """
-    实时获取处理进度，返回格式为SSE
+    实时获取处理进度，返回格式为SSE，进度变化时推送
     """
     if not token or not verify_token(token):
         raise HTTPException(
@@ -97,13 +110,31 @@ def get_progress(process_type: str, token: str):
 
     progress = ProgressHelper()
 
-    def event_generator():
-        while True:
-            if global_vars.is_system_stopped():
-                break
-            detail = progress.get(process_type)
-            yield 'data: %s\n\n' % json.dumps(detail)
-            time.sleep(0.2)
+    async def event_generator():
+        hub = BroadcastHub()
+        topic = progress.get_topic(process_type)
+        # 先注册再读取当前进度，避免遗漏两者之间的进度变化
+        subscriber = hub.register(topic)
+        try:
+            # 先推送当前进度
+            last_detail = json.dumps(progress.get(process_type))
+            yield 'data: %s\n\n' % last_detail
+            async for details in hub.subscribe(topic, coalesce=True, subscriber=subscriber):
+                if global_vars.is_system_stopped():
+                    break
+                if details is None:
+                    # 心跳
+                    yield ': heartbeat\n\n'
+                    continue
+                detail = json.dumps(details[-1])
+                if detail == last_detail:
+                    continue
+                last_detail = detail
+                yield 'data: %s\n\n' % detail
+                # 限制推送频率，期间的变化合并为最新进度
+                await asyncio.sleep(0.2)
+        finally:
+            hub.unregister(subscriber)
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
@@ -144,9 +175,9 @@ def set_setting(key: str, value: Union[list, dict, bool, int, str] = None,
 
 
 @router.get("/message", summary="实时消息")
-def get_message(token: str, role: str = "system"):
+async def get_message(token: str, role: str = "system"):
     """
-    实时获取系统消息，返回格式为SSE
+    实时获取系统消息，返回格式为SSE，有新消息时推送
     """
     if not token or not verify_token(token):
         raise HTTPException(
@@ -156,19 +187,31 @@ def get_message(token: str, role: str = "system"):
 
     message = MessageHelper()
 
-    def event_generator():
-        while True:
-            if global_vars.is_system_stopped():
-                break
-            detail = message.get(role)
-            yield 'data: %s\n\n' % (detail or '')
-            time.sleep(3)
+    async def event_generator():
+        hub = BroadcastHub()
+        topic = message.get_topic(role)
+        subscriber = hub.register(topic)
+        try:
+            # 订阅前未被取出的消息
+            while detail := message.get(role):
+                yield 'data: %s\n\n' % detail
+            async for details in hub.subscribe(topic, subscriber=subscriber):
+                if global_vars.is_system_stopped():
+                    break
+                if details is None:
+                    # 心跳
+                    yield ': heartbeat\n\n'
+                    continue
+                for detail in details:
+                    yield 'data: %s\n\n' % detail
+        finally:
+            hub.unregister(subscriber)
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
 
 @router.get("/logging", summary="实时日志")
-def get_logging(token: str, length: int = 50, logfile: str = "moviepilot.log"):
+async def get_logging(token: str, length: int = 50, logfile: str = "moviepilot.log"):
     """
     实时获取系统日志
     length = -1 时, 返回text/plain
@@ -180,27 +223,25 @@ def get_logging(token: str, length: int = 50, logfile: str = "moviepilot.log"):
             detail="认证失败！",
         )
 
-    log_path = settings.LOG_PATH / logfile
+    loghelper = LogFileHelper()
+    log_path = loghelper.get_log_path(logfile)
+    if not log_path:
+        raise HTTPException(status_code=404, detail="日志文件不存在！")
 
-    def log_generator():
-        # 读取文件末尾50行，不使用tailer模块
-        with open(log_path, 'r', encoding='utf-8') as f:
-            for line in f.readlines()[-max(length, 50):]:
-                yield 'data: %s\n\n' % line
-        while True:
-            if global_vars.is_system_stopped():
-                break
-            for t in tailer.follow(open(log_path, 'r', encoding='utf-8')):
-                yield 'data: %s\n\n' % (t or '')
-            time.sleep(1)
+    async def log_generator():
+        # 从文件末尾倒序读取最后的行，在线程池中读取文件，不阻塞事件循环
+        for line in await run_in_threadpool(loghelper.tail, log_path, max(length, 50)):
+            yield 'data: %s\n\n' % line
+        # 文件变化时推送新增的行
+        async for line in loghelper.follow(log_path):
+            yield 'data: %s\n\n' % line
 
     # 根据length参数返回不同的响应
     if length == -1:
         # 返回全部日志作为文本响应
         if not log_path.exists():
             return Response(content="日志文件不存在！", media_type="text/plain")
-        with open(log_path, 'r', encoding='utf-8') as file:
-            text = file.read()
+        text = await run_in_threadpool(log_path.read_text, encoding='utf-8')
         # 倒序输出
         text = '\n'.join(text.split('\n')[::-1])
         return Response(content=text, media_type="text/plain")
@@ -209,6 +250,27 @@ def get_logging(token: str, length: int = 50, logfile: str = "moviepilot.log"):
         return StreamingResponse(log_generator(), media_type="text/event-stream")
 
 
+@router.get("/logging/search", summary="搜索日志", response_model=schemas.Response)
+def search_logging(keyword: str = None, level: str = None, cursor: str = None, limit: int = 100,
+                   logfile: str = "moviepilot.log", _: schemas.TokenPayload = Depends(verify_token)):
+    """
+    从新到旧分页搜索日志，包括已轮转的日志文件
+    keyword: 关键字或正则表达式
+    level: 日志级别
+    cursor: 上一页返回的游标，为空时从最新的日志开始
+    """
+    loghelper = LogFileHelper()
+    log_path = loghelper.get_log_path(logfile)
+    if not log_path:
+        return schemas.Response(success=False, message="日志文件不存在！")
+    lines, next_cursor = loghelper.search(log_path, keyword=keyword, level=level,
+                                          cursor=cursor, limit=min(max(limit, 1), 1000))
+    return schemas.Response(success=True, data={
+        "lines": lines,
+        "cursor": next_cursor
+    })
+
+
 @router.get("/versions", summary="查询Github所有Release版本", response_model=schemas.Response)
 def latest_version(_: schemas.TokenPayload = Depends(verify_token)):
     """
@@ -295,6 +357,45 @@ def modulelist(_: schemas.TokenPayload = Depends(verify_token)):
     })
 
 
+@router.get("/modulestats", summary="查询模块调用统计", response_model=schemas.Response)
+def modulestats(_: schemas.TokenPayload = Depends(verify_token)):
+    """
+    查询各模块方法的调用次数、错误次数及耗时（毫秒）
+    """
+    return schemas.Response(success=True, data={
+        "stats": ModuleManager().get_stats()
+    })
+
+
+@router.get("/eventstats", summary="查询事件队列统计", response_model=schemas.Response)
+def eventstats(_: schemas.TokenPayload = Depends(verify_token)):
+    """
+    查询事件队列深度及各事件响应的调用次数、错误次数及耗时（毫秒）
+    """
+    return schemas.Response(success=True, data=EventManager().get_stats())
+
+
+@router.get("/cachestats", summary="查询缓存命中统计", response_model=schemas.Response)
+def cachestats(_: schemas.TokenPayload = Depends(verify_token)):
+    """
+    查询各内存缓存的容量及命中统计
+    """
+    return schemas.Response(success=True, data={
+        "metainfo": MetaInfoCache().stats(),
+        "tmdbinfo": TmdbDetailCache().stats()
+    })
+
+
+@router.get("/httpstats", summary="查询HTTP请求统计", response_model=schemas.Response)
+def httpstats(_: schemas.TokenPayload = Depends(verify_token)):
+    """
+    查询各主机的请求数、错误率、连接复用数及耗时百分位（毫秒）
+    """
+    return schemas.Response(success=True, data={
+        "stats": SessionRegistry().stats()
+    })
+
+
 @router.get("/moduletest/{moduleid}", summary="模块可用性测试", response_model=schemas.Response)
 def moduletest(moduleid: str, _: schemas.TokenPayload = Depends(verify_token)):
     """
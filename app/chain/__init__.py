@@ -1,7 +1,9 @@
 import gc
 import pickle
+import time
 import traceback
 from abc import ABCMeta
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Any, Tuple, List, Set, Union, Dict
 
@@ -13,9 +15,11 @@ from app.core.config import settings
 from app.core.context import Context, MediaInfo, TorrentInfo
 from app.core.event import EventManager
 from app.core.meta import MetaBase
+from app.core.metainfo import MetaInfoCache
 from app.core.module import ModuleManager
 from app.db.message_oper import MessageOper
 from app.helper.message import MessageHelper
+from app.helper.notification import NotificationHelper
 from app.log import logger
 from app.schemas import TransferInfo, TransferTorrent, ExistMediaInfo, DownloadingTorrent, CommingMessage, Notification, \
     WebhookEventInfo, TmdbEpisode, MediaPerson
@@ -28,6 +32,15 @@ class ChainBase(metaclass=ABCMeta):
     处理链基类
     """
 
+    # 各模块相互独立、结果为列表合并的方法，开启MODULE_PARALLEL时并发执行
+    _parallel_methods = {
+        "search_medias", "search_persons", "tmdb_discover", "list_torrents",
+        "downloader_info", "media_statistic", "mediaserver_librarys",
+        "mediaserver_playing", "mediaserver_latest"
+    }
+    # 模块并发执行线程池
+    _module_executor = ThreadPoolExecutor(max_workers=10, thread_name_prefix="module")
+
     def __init__(self):
         """
         公共初始化
@@ -36,6 +49,7 @@ class ChainBase(metaclass=ABCMeta):
         self.eventmanager = EventManager()
         self.messageoper = MessageOper()
         self.messagehelper = MessageHelper()
+        self.notificationhelper = NotificationHelper()
 
     @staticmethod
     def load_cache(filename: str) -> Any:
@@ -93,24 +107,22 @@ class ChainBase(metaclass=ABCMeta):
         logger.debug(f"请求模块执行：{method} ...")
         result = None
         modules = self.modulemanager.get_running_modules(method)
+        if settings.MODULE_PARALLEL \
+                and method in self._parallel_methods \
+                and len(modules) > 1:
+            return self.__run_modules_parallel(modules, method, *args, **kwargs)
         for module in modules:
-            module_id = module.__class__.__name__
-            try:
-                module_name = module.get_name()
-            except Exception as err:
-                logger.error(f"获取模块名称出错：{str(err)}")
-                module_name = module_id
             try:
                 func = getattr(module, method)
                 if is_result_empty(result):
                     # 返回None，第一次执行或者需继续执行下一模块
-                    result = func(*args, **kwargs)
+                    result = self.__call_module(module, method, func, *args, **kwargs)
                 elif ObjectUtils.check_signature(func, result):
                     # 返回结果与方法签名一致，将结果传入（不能多个模块同时运行的需要通过开关控制）
-                    result = func(result)
+                    result = self.__call_module(module, method, func, result)
                 elif isinstance(result, list):
                     # 返回为列表，有多个模块运行结果时进行合并（不能多个模块同时运行的需要通过开关控制）
-                    temp = func(*args, **kwargs)
+                    temp = self.__call_module(module, method, func, *args, **kwargs)
                     if isinstance(temp, list):
                         result.extend(temp)
                 else:
@@ -119,24 +131,76 @@ class ChainBase(metaclass=ABCMeta):
             except Exception as err:
                 if kwargs.get("raise_exception"):
                     raise
-                logger.error(
-                    f"运行模块 {module_id}.{method} 出错：{str(err)}\n{traceback.format_exc()}")
-                self.messagehelper.put(title=f"{module_name}发生了错误",
-                                       message=str(err),
-                                       role="system")
-                self.eventmanager.send_event(
-                    EventType.SystemError,
-                    {
-                        "type": "module",
-                        "module_id": module_id,
-                        "module_name": module_name,
-                        "module_method": method,
-                        "error": str(err),
-                        "traceback": traceback.format_exc()
-                    }
-                )
+                self.__handle_module_error(module, method, err)
+        return result
+
+    def __run_modules_parallel(self, modules: list, method: str, *args, **kwargs) -> Any:
+        """
+        并发运行各模块的同一方法，按模块顺序合并列表结果
+        """
+        futures = [
+            self._module_executor.submit(self.__call_module, module, method,
+                                         getattr(module, method), *args, **kwargs)
+            for module in modules
+        ]
+        result = None
+        for module, future in zip(modules, futures):
+            try:
+                temp = future.result()
+            except Exception as err:
+                if kwargs.get("raise_exception"):
+                    raise
+                self.__handle_module_error(module, method, err)
+                continue
+            if result is None:
+                result = temp
+            elif isinstance(result, list) and isinstance(temp, list):
+                result.extend(temp)
         return result
 
+    def __call_module(self, module: Any, method: str, func: Any, *args, **kwargs) -> Any:
+        """
+        调用模块方法并记录耗时
+        """
+        start_time = time.perf_counter()
+        success = False
+        try:
+            ret = func(*args, **kwargs)
+            success = True
+            return ret
+        finally:
+            self.modulemanager.record_stats(module_id=module.__class__.__name__,
+                                            method=method,
+                                            elapsed=time.perf_counter() - start_time,
+                                            success=success)
+
+    def __handle_module_error(self, module: Any, method: str, err: Exception):
+        """
+        模块运行出错时记录日志并发送系统错误事件
+        """
+        module_id = module.__class__.__name__
+        try:
+            module_name = module.get_name()
+        except Exception as e:
+            logger.error(f"获取模块名称出错：{str(e)}")
+            module_name = module_id
+        logger.error(
+            f"运行模块 {module_id}.{method} 出错：{str(err)}\n{traceback.format_exc()}")
+        self.messagehelper.put(title=f"{module_name}发生了错误",
+                               message=str(err),
+                               role="system")
+        self.eventmanager.send_event(
+            EventType.SystemError,
+            {
+                "type": "module",
+                "module_id": module_id,
+                "module_name": module_name,
+                "module_method": method,
+                "error": str(err),
+                "traceback": traceback.format_exc()
+            }
+        )
+
     def recognize_media(self, meta: MetaBase = None,
                         mtype: MediaType = None,
                         tmdbid: int = None,
@@ -451,11 +515,11 @@ class ChainBase(metaclass=ABCMeta):
         """
         return self.run_module("media_exists", mediainfo=mediainfo, itemid=itemid)
 
-    def post_message(self, message: Notification) -> None:
+    def post_message(self, message: Notification, coalesce_key: str = None) -> None:
         """
-        发送消息
+        发送消息，写入发送队列后异步发送
         :param message:  消息体
-        :return: 成功或失败
+        :param coalesce_key: 合并键，相同合并键的消息短时间内汇总为一条发送
         """
         logger.info(f"发送消息：channel={message.channel}，"
                     f"title={message.title}, "
@@ -478,7 +542,15 @@ class ChainBase(metaclass=ABCMeta):
                              image=message.image, link=message.link,
                              userid=message.userid, action=1)
         # 发送
-        self.run_module("post_message", message=message)
+        self.notificationhelper.put(message, coalesce_key=coalesce_key)
+
+    def send_message(self, message: Notification) -> Optional[bool]:
+        """
+        立即发送消息，由发送队列调用
+        :param message:  消息体
+        :return: 成功或失败
+        """
+        return self.run_module("post_message", message=message)
 
     def post_medias_message(self, message: Notification, medias: List[MediaInfo]) -> Optional[bool]:
         """
@@ -558,4 +630,5 @@ class ChainBase(metaclass=ABCMeta):
         """
         清理缓存，模块实现该接口响应清理缓存事件
         """
+        MetaInfoCache().clear()
         self.run_module("clear_cache")
@@ -92,7 +92,8 @@ class DownloadChain(ChainBase):
                   f"{'%s %s' % (meta.season, download_episodes) if download_episodes else meta.season_episode} 开始下载",
             text=msg_text,
             image=mediainfo.get_message_image(),
-            link=settings.MP_DOMAIN('/#/downloading')))
+            link=settings.MP_DOMAIN('/#/downloading')),
+            coalesce_key=f"download:{mediainfo.tmdb_id or mediainfo.title_year}:{meta.season}:{userid}")
 
     def download_torrent(self, torrent: TorrentInfo,
                          channel: MessageChannel = None,
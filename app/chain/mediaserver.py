@@ -1,11 +1,14 @@
 import json
 import threading
-from typing import List, Union, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Union, Optional, Dict
 
 from app import schemas
 from app.chain import ChainBase
 from app.core.config import settings
 from app.db.mediaserver_oper import MediaServerOper
+from app.db.models.mediaserver import MediaServerItem
 from app.log import logger
 
 lock = threading.Lock()
@@ -16,6 +19,9 @@ class MediaServerChain(ChainBase):
     媒体服务器处理链
     """
 
+    # 同步时并发查询的线程数
+    _sync_workers = 5
+
     def __init__(self):
         super().__init__()
         self.dboper = MediaServerOper()
@@ -72,45 +78,81 @@ class MediaServerChain(ChainBase):
         # 同步黑名单
         sync_blacklist = settings.MEDIASERVER_SYNC_BLACKLIST.split(
             ",") if settings.MEDIASERVER_SYNC_BLACKLIST else []
-        mediaservers = settings.MEDIASERVER.split(",")
+        mediaservers = [mediaserver for mediaserver in settings.MEDIASERVER.split(",") if mediaserver]
         with lock:
             # 汇总统计
             total_count = 0
-            # 清空登记薄
-            self.dboper.empty()
-            # 遍历媒体服务器
-            for mediaserver in mediaservers:
-                if not mediaserver:
-                    continue
-                logger.info(f"开始同步媒体库 {mediaserver} 的数据 ...")
-                for library in self.librarys(mediaserver):
-                    # 同步黑名单 跳过
-                    if library.name in sync_blacklist:
+            # 清理已不再使用的媒体服务器数据
+            self.dboper.empty_except(mediaservers)
+            with ThreadPoolExecutor(max_workers=self._sync_workers) as executor:
+                # 遍历媒体服务器
+                for mediaserver in mediaservers:
+                    logger.info(f"开始同步媒体库 {mediaserver} 的数据 ...")
+                    librarys = self.librarys(mediaserver)
+                    if not librarys:
+                        logger.warn(f"{mediaserver} 未获取到媒体库，保留原有数据")
                         continue
-                    logger.info(f"正在同步 {mediaserver} 媒体库 {library.name} ...")
-                    library_count = 0
-                    for item in self.items(mediaserver, library.id):
-                        if not item:
-                            continue
-                        if not item.item_id:
-                            continue
-                        logger.debug(f"正在同步 {item.title} ...")
-                        # 计数
-                        library_count += 1
-                        seasoninfo = {}
-                        # 类型
-                        item_type = "电视剧" if item.item_type in ['Series', 'show'] else "电影"
-                        if item_type == "电视剧":
-                            # 查询剧集信息
-                            espisodes_info = self.episodes(mediaserver, item.item_id) or []
-                            for episode in espisodes_info:
-                                seasoninfo[episode.season] = episode.episodes
-                        # 插入数据
-                        item_dict = item.dict()
-                        item_dict['seasoninfo'] = json.dumps(seasoninfo)
-                        item_dict['item_type'] = item_type
-                        self.dboper.add(**item_dict)
-                    logger.info(f"{mediaserver} 媒体库 {library.name} 同步完成，共同步数量：{library_count}")
+                    # 上次同步的数据，用于增量同步剧集信息
+                    exists_items = self.dboper.list_by_server(mediaserver)
+                    # 并发同步各媒体库
+                    futures = [executor.submit(self.__sync_library, mediaserver, library, exists_items)
+                               for library in librarys if library.name not in sync_blacklist]
+                    server_items = {}
+                    for future in futures:
+                        for item_dict in future.result():
+                            server_items.setdefault(item_dict.get("item_id"), item_dict)
+                    # 原子替换该媒体服务器的数据
+                    self.dboper.replace(mediaserver, list(server_items.values()))
+                    logger.info(f"{mediaserver} 同步完成，共同步数量：{len(server_items)}")
                     # 总数累加
-                    total_count += library_count
+                    total_count += len(server_items)
             logger.info("【MediaServer】媒体库数据同步完成，同步数量：%s" % total_count)
+
+    def __sync_library(self, mediaserver: str, library: schemas.MediaServerLibrary,
+                       exists_items: Dict[str, MediaServerItem]) -> List[dict]:
+        """
+        同步单个媒体库，并发查询剧集信息，剧集修改时间未变化时沿用上次同步的季集信息
+        :return: 待入库的数据列表
+        """
+        logger.info(f"正在同步 {mediaserver} 媒体库 {library.name} ...")
+        sync_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        item_dicts = []
+        futures = {}
+        reuse_count = 0
+        with ThreadPoolExecutor(max_workers=self._sync_workers) as executor:
+            for item in self.items(mediaserver, library.id) or []:
+                if not item:
+                    continue
+                if not item.item_id:
+                    continue
+                logger.debug(f"正在同步 {item.title} ...")
+                # 类型
+                item_type = "电视剧" if item.item_type in ['Series', 'show'] else "电影"
+                item_dict = item.dict()
+                item_dict.pop('id', None)
+                item_dict['seasoninfo'] = json.dumps({})
+                item_dict['item_type'] = item_type
+                if not item_dict.get('lst_mod_date'):
+                    item_dict['lst_mod_date'] = sync_time
+                if item_type == "电视剧":
+                    exists_item = exists_items.get(item.item_id)
+                    if item.lst_mod_date and exists_item \
+                            and exists_item.lst_mod_date == item.lst_mod_date:
+                        # 未发生变化，沿用上次同步的季集信息
+                        item_dict['seasoninfo'] = exists_item.seasoninfo
+                        reuse_count += 1
+                    else:
+                        # 查询剧集信息
+                        futures[executor.submit(self.episodes, mediaserver, item.item_id)] = item_dict
+                item_dicts.append(item_dict)
+            for future, item_dict in futures.items():
+                seasoninfo = {}
+                try:
+                    for episode in future.result() or []:
+                        seasoninfo[episode.season] = episode.episodes
+                except Exception as err:
+                    logger.error(f"查询 {item_dict.get('title')} 剧集信息出错：{str(err)}")
+                item_dict['seasoninfo'] = json.dumps(seasoninfo)
+        logger.info(f"{mediaserver} 媒体库 {library.name} 同步完成，共同步数量：{len(item_dicts)}，"
+                    f"其中 {reuse_count} 个剧集未变化")
+        return item_dicts
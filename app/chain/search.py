@@ -1,11 +1,15 @@
 import pickle
+import threading
+import time
 import traceback
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import uuid
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 from datetime import datetime
 from typing import Dict
 from typing import List, Optional
 
 from app.chain import ChainBase
+from app.core.config import settings
 from app.core.context import Context
 from app.core.context import MediaInfo, TorrentInfo
 from app.core.event import eventmanager, Event
@@ -24,6 +28,14 @@ class SearchChain(ChainBase):
     站点资源搜索处理链
     """
 
+    _lock = threading.Lock()
+    # 全局搜索线程池
+    _executor: Optional[ThreadPoolExecutor] = None
+    # 站点域名 -> 并发信号量
+    _site_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+    # 搜索ID -> 进行中搜索的取消标志
+    _cancel_events: Dict[str, threading.Event] = {}
+
     def __init__(self):
         super().__init__()
         self.siteshelper = SitesHelper()
@@ -32,7 +44,8 @@ class SearchChain(ChainBase):
         self.torrenthelper = TorrentHelper()
 
     def search_by_id(self, tmdbid: int = None, doubanid: str = None,
-                     mtype: MediaType = None, area: str = "title", season: int = None) -> List[Context]:
+                     mtype: MediaType = None, area: str = "title", season: int = None,
+                     search_id: str = None) -> List[Context]:
         """
         根据TMDBID/豆瓣ID搜索资源，精确匹配，但不不过滤本地存在的资源
         :param tmdbid: TMDB ID
@@ -40,6 +53,7 @@ class SearchChain(ChainBase):
         :param mtype: 媒体，电影 or 电视剧
         :param area: 搜索范围，title or imdbid
         :param season: 季数
+        :param search_id: 搜索ID，用于取消本次搜索
         """
         mediainfo = self.recognize_media(tmdbid=tmdbid, doubanid=doubanid, mtype=mtype)
         if not mediainfo:
@@ -52,25 +66,28 @@ class SearchChain(ChainBase):
                     season: NotExistMediaInfo(episodes=[])
                 }
             }
-        results = self.process(mediainfo=mediainfo, area=area, no_exists=no_exists)
+        results = self.process(mediainfo=mediainfo, area=area, no_exists=no_exists, search_id=search_id)
         # 保存结果
         bytes_results = pickle.dumps(results)
         self.systemconfig.set(SystemConfigKey.SearchResults, bytes_results)
         return results
 
-    def search_by_title(self, title: str, page: int = 0, site: int = None) -> List[Context]:
+    def search_by_title(self, title: str, page: int = 0, site: int = None,
+                        search_id: str = None) -> List[Context]:
         """
         根据标题搜索资源，不识别不过滤，直接返回站点内容
         :param title: 标题，为空时返回所有站点首页内容
         :param page: 页码
         :param site: 站点ID
+        :param search_id: 搜索ID，用于取消本次搜索
         """
         if title:
             logger.info(f'开始搜索资源，关键词：{title} ...')
         else:
             logger.info(f'开始浏览资源，站点：{site} ...')
         # 搜索
-        torrents = self.__search_all_sites(keywords=[title], sites=[site] if site else None, page=page) or []
+        torrents = self.__search_all_sites(keywords=[title], sites=[site] if site else None, page=page,
+                                           search_id=search_id) or []
         if not torrents:
             logger.warn(f'{title} 未搜索到资源')
             return []
@@ -101,7 +118,8 @@ class SearchChain(ChainBase):
                 sites: List[int] = None,
                 priority_rule: str = None,
                 filter_rule: Dict[str, str] = None,
-                area: str = "title") -> List[Context]:
+                area: str = "title",
+                search_id: str = None) -> List[Context]:
         """
         根据媒体信息搜索种子资源，精确匹配，应用过滤规则，同时根据no_exists过滤本地已存在的资源
         :param mediainfo: 媒体信息
@@ -111,6 +129,7 @@ class SearchChain(ChainBase):
         :param priority_rule: 优先级规则，为空时使用搜索优先级规则
         :param filter_rule: 过滤规则，为空是使用默认过滤规则
         :param area: 搜索范围，title or imdbid
+        :param search_id: 搜索ID，用于取消本次搜索
         """
 
         def __do_filter(torrent_list: List[TorrentInfo]) -> List[TorrentInfo]:
@@ -165,7 +184,8 @@ class SearchChain(ChainBase):
             mediainfo=mediainfo,
             keywords=keywords,
             sites=sites,
-            area=area
+            area=area,
+            search_id=search_id
         )
         if not torrents:
             logger.warn(f'{keyword or mediainfo.title} 未搜索到资源')
@@ -274,7 +294,8 @@ class SearchChain(ChainBase):
                            mediainfo: Optional[MediaInfo] = None,
                            sites: List[int] = None,
                            page: int = 0,
-                           area: str = "title") -> Optional[List[TorrentInfo]]:
+                           area: str = "title",
+                           search_id: str = None) -> Optional[List[TorrentInfo]]:
         """
         多线程搜索多个站点
         :param mediainfo:  识别的媒体信息
@@ -282,6 +303,7 @@ class SearchChain(ChainBase):
         :param sites:  指定站点ID列表，如有则只搜索指定站点，否则搜索所有站点
         :param page:  搜索页码
         :param area:  搜索区域 title or imdbid
+        :param search_id:  搜索ID，为空时自动生成，通过进度数据返回，用于取消本次搜索
         :reutrn: 资源列表
         """
         # 未开启的站点不搜索
@@ -312,38 +334,94 @@ class SearchChain(ChainBase):
         total_num = len(indexer_sites)
         # 完成数
         finish_count = 0
+        # 取消标志
+        search_id = search_id or uuid.uuid4().hex
+        cancel_event = threading.Event()
+        with self._lock:
+            self._cancel_events[search_id] = cancel_event
         # 更新进度
         self.progress.update(value=0,
                              text=f"开始搜索，共 {total_num} 个站点 ...",
+                             data={"search_id": search_id},
                              key=ProgressKey.Search)
-        # 多线程
-        executor = ThreadPoolExecutor(max_workers=len(indexer_sites))
-        all_task = []
-        for site in indexer_sites:
-            if area == "imdbid":
-                # 搜索IMDBID
-                task = executor.submit(self.search_torrents, site=site,
-                                       keywords=[mediainfo.imdb_id] if mediainfo else None,
-                                       mtype=mediainfo.type if mediainfo else None,
-                                       page=page)
-            else:
-                # 搜索标题
-                task = executor.submit(self.search_torrents, site=site,
-                                       keywords=keywords,
-                                       mtype=mediainfo.type if mediainfo else None,
-                                       page=page)
-            all_task.append(task)
+        # 整体截止时间，从提交搜索时计算，排队未开始的站点同样受限
+        deadline = time.monotonic() + settings.SEARCH_TIMEOUT
+        # 等待站点空闲后提交的站点
+        waiting: List[dict] = list(indexer_sites)
+        # 已提交到全局搜索线程池的站点
+        futures: Dict[Future, dict] = {}
+        pending = set()
         # 结果集
         results = []
-        for future in as_completed(all_task):
-            finish_count += 1
-            result = future.result()
-            if result:
-                results.extend(result)
-            logger.info(f"站点搜索进度：{finish_count} / {total_num}")
-            self.progress.update(value=finish_count / total_num * 100,
-                                 text=f"正在搜索{keywords or ''}，已完成 {finish_count} / {total_num} 个站点 ...",
-                                 key=ProgressKey.Search)
+        # 各站点结果数
+        site_counts = []
+        try:
+            while (waiting or pending) and not cancel_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                # 站点有空闲并发时才提交，等待站点空闲期间不占用线程池
+                for site in list(waiting):
+                    semaphore = self.__get_site_semaphore(site.get("domain"))
+                    if not semaphore.acquire(blocking=False):
+                        continue
+                    waiting.remove(site)
+                    if area == "imdbid":
+                        # 搜索IMDBID
+                        site_keywords = [mediainfo.imdb_id] if mediainfo else None
+                    else:
+                        # 搜索标题
+                        site_keywords = keywords
+                    future = self.__get_executor().submit(self.__search_site, site=site,
+                                                          keywords=site_keywords,
+                                                          mtype=mediainfo.type if mediainfo else None,
+                                                          page=page,
+                                                          cancel_event=cancel_event)
+                    # 搜索完成或被取消后释放站点并发
+                    future.add_done_callback(lambda _, s=semaphore: s.release())
+                    futures[future] = site
+                    pending.add(future)
+                if not pending:
+                    cancel_event.wait(min(remaining, 1))
+                    continue
+                done, pending = wait(pending, timeout=min(remaining, 1), return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish_count += 1
+                    site = futures[future]
+                    try:
+                        result = future.result() or []
+                    except Exception as err:
+                        logger.error(f"{site.get('name')} 搜索出错：{str(err)} - {traceback.format_exc()}")
+                        result = []
+                    results.extend(result)
+                    site_counts.append({"name": site.get("name"), "count": len(result)})
+                    logger.info(f"站点搜索进度：{finish_count} / {total_num}")
+                    # 推送部分结果，前端可提前展示已返回的站点
+                    self.progress.update(value=finish_count / total_num * 100,
+                                         text=f"正在搜索{keywords or ''}，已完成 {finish_count} / {total_num} 个站点，"
+                                              f"已找到 {len(results)} 个资源 ...",
+                                         data={
+                                             "search_id": search_id,
+                                             "finish": finish_count,
+                                             "total": total_num,
+                                             "count": len(results),
+                                             "sites": site_counts
+                                         },
+                                         key=ProgressKey.Search)
+            cancelled = cancel_event.is_set()
+        finally:
+            # 结束或取消时放弃未完成的站点，尚未开始的搜索不再执行
+            cancel_event.set()
+            for future in pending:
+                future.cancel()
+            with self._lock:
+                self._cancel_events.pop(search_id, None)
+        unfinished = [futures[future].get("name") for future in pending] + [site.get("name") for site in waiting]
+        if unfinished:
+            if cancelled:
+                logger.warn(f"搜索已取消，以下站点未返回：{'、'.join(unfinished)}")
+            else:
+                logger.warn(f"以下站点未在 {settings.SEARCH_TIMEOUT} 秒内返回，已放弃：{'、'.join(unfinished)}")
         # 计算耗时
         end_time = datetime.now()
         # 更新进度
@@ -356,6 +434,52 @@ class SearchChain(ChainBase):
         # 返回
         return results
 
+    @classmethod
+    def __get_executor(cls) -> ThreadPoolExecutor:
+        """
+        获取全局搜索线程池
+        """
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=max(settings.SEARCH_THREADS, 1),
+                                                   thread_name_prefix="SiteSearch")
+            return cls._executor
+
+    @classmethod
+    def __get_site_semaphore(cls, domain: str) -> threading.BoundedSemaphore:
+        """
+        获取站点并发信号量，多个搜索任务共享
+        """
+        with cls._lock:
+            semaphore = cls._site_semaphores.get(domain)
+            if not semaphore:
+                semaphore = threading.BoundedSemaphore(max(settings.SEARCH_SITE_THREADS, 1))
+                cls._site_semaphores[domain] = semaphore
+            return semaphore
+
+    def __search_site(self, site: dict, keywords: List[str], mtype: MediaType, page: int,
+                      cancel_event: threading.Event) -> List[TorrentInfo]:
+        """
+        搜索单个站点，排队期间搜索已被取消或超时则直接返回
+        """
+        if cancel_event.is_set():
+            return []
+        return self.search_torrents(site=site, keywords=keywords, mtype=mtype, page=page)
+
+    @classmethod
+    def cancel(cls, search_id: str) -> bool:
+        """
+        取消指定的站点搜索
+        :param search_id: 搜索ID
+        :return: 搜索是否在进行中
+        """
+        with cls._lock:
+            cancel_event = cls._cancel_events.get(search_id)
+        if not cancel_event:
+            return False
+        cancel_event.set()
+        return True
+
     def filter_torrents_by_rule(self,
                                 torrents: List[TorrentInfo],
                                 mediainfo: MediaInfo,
@@ -1,5 +1,7 @@
+import copy
 import json
 import random
+import re
 import time
 from datetime import datetime
 from json import JSONDecodeError
@@ -26,6 +28,7 @@ from app.helper.torrent import TorrentHelper
 from app.log import logger
 from app.schemas import NotExistMediaInfo, Notification
 from app.schemas.types import MediaType, SystemConfigKey, MessageChannel, NotificationType, EventType
+from app.utils.string import StringUtils
 
 
 class SubscribeChain(ChainBase):
@@ -537,13 +540,28 @@ class SubscribeChain(ChainBase):
         if not torrents:
             logger.warn('没有缓存资源，无法匹配订阅')
             return
-        # 记录重新识别过的种子
-        _recognize_cached = []
+        # 各阶段耗时
+        timings = {"index": 0.0, "media": 0.0, "match": 0.0, "download": 0.0}
+        start_time = time.perf_counter()
         # 所有订阅
         subscribes = self.subscribeoper.list('R')
+        if not subscribes:
+            return
+        # 建立种子索引
+        match_index = self.__build_match_index(torrents)
+        timings["index"] = time.perf_counter() - start_time
+        # 本次运行内的媒体信息和缺失信息缓存
+        _media_cached: Dict[tuple, Optional[MediaInfo]] = {}
+        _no_exists_cached: Dict[tuple, tuple] = {}
+        # 优先级过滤规则
+        priority_rules = {
+            True: self.systemconfig.get(SystemConfigKey.BestVersionFilterRules),
+            False: self.systemconfig.get(SystemConfigKey.SubscribeFilterRules)
+        }
         # 遍历订阅
         for subscribe in subscribes:
             logger.info(f'开始匹配订阅，标题：{subscribe.name} ...')
+            phase_time = time.perf_counter()
             mediakey = subscribe.tmdbid or subscribe.doubanid
             # 生成元数据
             meta = MetaInfo(subscribe.name)
@@ -563,12 +581,16 @@ class SubscribeChain(ChainBase):
                         domains = self.siteoper.get_domains_by_ids(siteids)
                 except JSONDecodeError:
                     pass
-            # 识别媒体信息
-            mediainfo: MediaInfo = self.recognize_media(meta=meta, mtype=meta.type,
-                                                        tmdbid=subscribe.tmdbid,
-                                                        doubanid=subscribe.doubanid,
-                                                        cache=False)
+            # 识别媒体信息，同一媒体在本次运行内只识别一次
+            media_key = (meta.type, subscribe.tmdbid, subscribe.doubanid)
+            if media_key not in _media_cached:
+                _media_cached[media_key] = self.recognize_media(meta=meta, mtype=meta.type,
+                                                                tmdbid=subscribe.tmdbid,
+                                                                doubanid=subscribe.doubanid,
+                                                                cache=False)
+            mediainfo: MediaInfo = copy.deepcopy(_media_cached[media_key])
             if not mediainfo:
+                timings["media"] += time.perf_counter() - phase_time
                 logger.warn(
                     f'未识别到媒体信息，标题：{subscribe.name}，tmdbid：{subscribe.tmdbid}，doubanid：{subscribe.doubanid}')
                 continue
@@ -581,11 +603,14 @@ class SubscribeChain(ChainBase):
                         subscribe.season: subscribe.total_episode
                     }
                 # 查询缺失的媒体信息
-                exist_flag, no_exists = self.downloadchain.get_no_exists_info(
-                    meta=meta,
-                    mediainfo=mediainfo,
-                    totals=totals
-                )
+                no_exists_key = (media_key, subscribe.season, subscribe.total_episode)
+                if no_exists_key not in _no_exists_cached:
+                    _no_exists_cached[no_exists_key] = self.downloadchain.get_no_exists_info(
+                        meta=meta,
+                        mediainfo=mediainfo,
+                        totals=totals
+                    )
+                exist_flag, no_exists = copy.deepcopy(_no_exists_cached[no_exists_key])
             else:
                 # 洗版
                 exist_flag = False
@@ -601,6 +626,7 @@ class SubscribeChain(ChainBase):
                     }
                 else:
                     no_exists = {}
+            timings["media"] += time.perf_counter() - phase_time
 
             # 已存在
             if exist_flag:
@@ -608,6 +634,7 @@ class SubscribeChain(ChainBase):
                 self.finish_subscribe_or_not(subscribe=subscribe, meta=meta, mediainfo=mediainfo, force=True)
                 continue
 
+            phase_time = time.perf_counter()
             # 电视剧订阅
             if meta.type == MediaType.TV:
                 # 整合实际缺失集与订阅开始集结束集，同时剔除已下载的集数
@@ -623,132 +650,115 @@ class SubscribeChain(ChainBase):
 
             # 过滤规则
             filter_rule = self.get_filter_rule(subscribe)
+            # 优先级过滤规则
+            priority_rule = priority_rules[bool(subscribe.best_version)]
+            # 订阅站点范围
+            sub_sites = self.get_sub_sites(subscribe)
 
-            # 遍历缓存种子
+            # 遍历索引中的候选种子
             _match_context = []
-            for domain, contexts in torrents.items():
+            for domain, context, torrent_mediainfo in self.__get_match_candidates(match_index, mediainfo):
                 if domains and domain not in domains:
                     continue
-                logger.debug(f'开始匹配站点：{domain}，共缓存了 {len(contexts)} 个种子...')
-                for context in contexts:
-                    # 检查是否匹配
-                    torrent_meta = context.meta_info
-                    torrent_mediainfo = context.media_info
-                    torrent_info = context.torrent_info
-
-                    # 先判断是否有没识别的种子
-                    if not torrent_mediainfo or (not torrent_mediainfo.tmdb_id and not torrent_mediainfo.douban_id):
-                        _cache_key = f"{torrent_info.title}_{torrent_info.description}"
-                        if _cache_key not in _recognize_cached:
-                            _recognize_cached.append(_cache_key)
-                            logger.info(
-                                f'{torrent_info.site_name} - {torrent_info.title} 订阅缓存为未识别状态，尝试重新识别...')
-                            # 重新识别（不使用缓存）
-                            torrent_mediainfo = self.recognize_media(meta=torrent_meta, cache=False)
-                            if not torrent_mediainfo:
-                                logger.warn(
-                                    f'{torrent_info.site_name} - {torrent_info.title} 重新识别失败，尝试通过标题匹配...')
-                                if self.torrenthelper.match_torrent(mediainfo=mediainfo,
-                                                                    torrent_meta=torrent_meta,
-                                                                    torrent=torrent_info):
-                                    # 匹配成功
-                                    logger.info(
-                                        f'{mediainfo.title_year} 通过标题匹配到资源：{torrent_info.site_name} - {torrent_info.title}')
-                                    # 更新缓存
-                                    torrent_mediainfo = mediainfo
-                                    context.media_info = mediainfo
-                                else:
-                                    continue
+                # 检查是否匹配
+                torrent_meta = context.meta_info
+                torrent_info = context.torrent_info
 
+                if not torrent_mediainfo or (not torrent_mediainfo.tmdb_id and not torrent_mediainfo.douban_id):
+                    # 未识别的种子，通过标题匹配
+                    if not self.torrenthelper.match_torrent(mediainfo=mediainfo,
+                                                            torrent_meta=torrent_meta,
+                                                            torrent=torrent_info):
+                        continue
+                    # 匹配成功
+                    logger.info(
+                        f'{mediainfo.title_year} 通过标题匹配到资源：{torrent_info.site_name} - {torrent_info.title}')
+                    # 更新缓存
+                    torrent_mediainfo = mediainfo
+                    context.media_info = mediainfo
+                else:
                     # 直接比对媒体信息
-                    if torrent_mediainfo and (torrent_mediainfo.tmdb_id or torrent_mediainfo.douban_id):
-                        if torrent_mediainfo.type != mediainfo.type:
-                            continue
-                        if torrent_mediainfo.tmdb_id \
-                                and torrent_mediainfo.tmdb_id != mediainfo.tmdb_id:
-                            continue
-                        if torrent_mediainfo.douban_id \
-                                and torrent_mediainfo.douban_id != mediainfo.douban_id:
-                            continue
-                        logger.info(
-                            f'{mediainfo.title_year} 通过媒体信ID匹配到资源：{torrent_info.site_name} - {torrent_info.title}')
-                    else:
+                    if torrent_mediainfo.type != mediainfo.type:
                         continue
-
-                    # 优先级过滤规则
-                    if subscribe.best_version:
-                        priority_rule = self.systemconfig.get(SystemConfigKey.BestVersionFilterRules)
-                    else:
-                        priority_rule = self.systemconfig.get(SystemConfigKey.SubscribeFilterRules)
-                    result: List[TorrentInfo] = self.filter_torrents(
-                        rule_string=priority_rule,
-                        torrent_list=[torrent_info],
-                        mediainfo=torrent_mediainfo)
-                    if result is not None and not result:
-                        # 不符合过滤规则
-                        logger.debug(f"{torrent_info.title} 不匹配当前过滤规则")
+                    if torrent_mediainfo.tmdb_id \
+                            and torrent_mediainfo.tmdb_id != mediainfo.tmdb_id:
                         continue
-
-                    # 不在订阅站点范围的不处理
-                    sub_sites = self.get_sub_sites(subscribe)
-                    if sub_sites and torrent_info.site not in sub_sites:
-                        logger.debug(f"{torrent_info.site_name} - {torrent_info.title} 不符合订阅站点要求")
+                    if torrent_mediainfo.douban_id \
+                            and torrent_mediainfo.douban_id != mediainfo.douban_id:
                         continue
+                    logger.info(
+                        f'{mediainfo.title_year} 通过媒体信ID匹配到资源：{torrent_info.site_name} - {torrent_info.title}')
 
-                    # 如果是电视剧
-                    if torrent_mediainfo.type == MediaType.TV:
-                        # 有多季的不要
-                        if len(torrent_meta.season_list) > 1:
-                            logger.debug(f'{torrent_info.title} 有多季，不处理')
-                            continue
-                        # 比对季
-                        if torrent_meta.begin_season:
-                            if meta.begin_season != torrent_meta.begin_season:
-                                logger.debug(f'{torrent_info.title} 季不匹配')
-                                continue
-                        elif meta.begin_season != 1:
+                # 优先级过滤规则
+                result: List[TorrentInfo] = self.filter_torrents(
+                    rule_string=priority_rule,
+                    torrent_list=[torrent_info],
+                    mediainfo=torrent_mediainfo)
+                if result is not None and not result:
+                    # 不符合过滤规则
+                    logger.debug(f"{torrent_info.title} 不匹配当前过滤规则")
+                    continue
+
+                # 不在订阅站点范围的不处理
+                if sub_sites and torrent_info.site not in sub_sites:
+                    logger.debug(f"{torrent_info.site_name} - {torrent_info.title} 不符合订阅站点要求")
+                    continue
+
+                # 如果是电视剧
+                if torrent_mediainfo.type == MediaType.TV:
+                    # 有多季的不要
+                    if len(torrent_meta.season_list) > 1:
+                        logger.debug(f'{torrent_info.title} 有多季，不处理')
+                        continue
+                    # 比对季
+                    if torrent_meta.begin_season:
+                        if meta.begin_season != torrent_meta.begin_season:
                             logger.debug(f'{torrent_info.title} 季不匹配')
                             continue
-                        # 非洗版
-                        if not subscribe.best_version:
-                            # 不是缺失的剧集不要
-                            if no_exists and no_exists.get(mediakey):
-                                # 缺失集
-                                no_exists_info = no_exists.get(mediakey).get(subscribe.season)
-                                if no_exists_info:
-                                    # 是否有交集
-                                    if no_exists_info.episodes and \
-                                            torrent_meta.episode_list and \
-                                            not set(no_exists_info.episodes).intersection(
-                                                set(torrent_meta.episode_list)
-                                            ):
-                                        logger.debug(
-                                            f'{torrent_info.title} 对应剧集 {torrent_meta.episode_list} 未包含缺失的剧集'
-                                        )
-                                        continue
-                        else:
-                            # 洗版时，非整季不要
-                            if meta.type == MediaType.TV:
-                                if torrent_meta.episode_list:
-                                    logger.debug(f'{subscribe.name} 正在洗版，{torrent_info.title} 不是整季')
+                    elif meta.begin_season != 1:
+                        logger.debug(f'{torrent_info.title} 季不匹配')
+                        continue
+                    # 非洗版
+                    if not subscribe.best_version:
+                        # 不是缺失的剧集不要
+                        if no_exists and no_exists.get(mediakey):
+                            # 缺失集
+                            no_exists_info = no_exists.get(mediakey).get(subscribe.season)
+                            if no_exists_info:
+                                # 是否有交集
+                                if no_exists_info.episodes and \
+                                        torrent_meta.episode_list and \
+                                        not set(no_exists_info.episodes).intersection(
+                                            set(torrent_meta.episode_list)
+                                        ):
+                                    logger.debug(
+                                        f'{torrent_info.title} 对应剧集 {torrent_meta.episode_list} 未包含缺失的剧集'
+                                    )
                                     continue
+                    else:
+                        # 洗版时，非整季不要
+                        if meta.type == MediaType.TV:
+                            if torrent_meta.episode_list:
+                                logger.debug(f'{subscribe.name} 正在洗版，{torrent_info.title} 不是整季')
+                                continue
 
-                    # 过滤规则
-                    if not self.torrenthelper.filter_torrent(torrent_info=torrent_info,
-                                                             filter_rule=filter_rule,
-                                                             mediainfo=torrent_mediainfo):
-                        continue
+                # 过滤规则
+                if not self.torrenthelper.filter_torrent(torrent_info=torrent_info,
+                                                         filter_rule=filter_rule,
+                                                         mediainfo=torrent_mediainfo):
+                    continue
 
-                    # 洗版时，优先级小于已下载优先级的不要
-                    if subscribe.best_version:
-                        if subscribe.current_priority \
-                                and torrent_info.pri_order <= subscribe.current_priority:
-                            logger.info(f'{subscribe.name} 正在洗版，{torrent_info.title} 优先级低于或等于已下载优先级')
-                            continue
+                # 洗版时，优先级小于已下载优先级的不要
+                if subscribe.best_version:
+                    if subscribe.current_priority \
+                            and torrent_info.pri_order <= subscribe.current_priority:
+                        logger.info(f'{subscribe.name} 正在洗版，{torrent_info.title} 优先级低于或等于已下载优先级')
+                        continue
 
-                    # 匹配成功
-                    logger.info(f'{mediainfo.title_year} 匹配成功：{torrent_info.title}')
-                    _match_context.append(context)
+                # 匹配成功
+                logger.info(f'{mediainfo.title_year} 匹配成功：{torrent_info.title}')
+                _match_context.append(context)
+            timings["match"] += time.perf_counter() - phase_time
 
             if not _match_context:
                 # 未匹配到资源
@@ -758,6 +768,7 @@ class SubscribeChain(ChainBase):
                 continue
 
             # 开始批量择优下载
+            phase_time = time.perf_counter()
             logger.info(f'{mediainfo.title_year} 匹配完成，共匹配到{len(_match_context)}个资源')
             downloads, lefts = self.downloadchain.batch_download(contexts=_match_context,
                                                                  no_exists=no_exists,
@@ -767,6 +778,78 @@ class SubscribeChain(ChainBase):
             # 判断是否要完成订阅
             self.finish_subscribe_or_not(subscribe=subscribe, meta=meta, mediainfo=mediainfo,
                                          downloads=downloads, lefts=lefts)
+            timings["download"] += time.perf_counter() - phase_time
+
+        logger.info(f'订阅匹配完成，共 {len(subscribes)} 个订阅，总耗时 {time.perf_counter() - start_time:.2f} 秒，'
+                    f'建立索引 {timings["index"]:.2f} 秒，识别媒体 {timings["media"]:.2f} 秒，'
+                    f'匹配种子 {timings["match"]:.2f} 秒，下载 {timings["download"]:.2f} 秒')
+
+    def __build_match_index(self, torrents: Dict[str, List[Context]]) -> Dict[str, dict]:
+        """
+        建立缓存种子的倒排索引，已识别的种子按媒体ID索引，未识别的种子按词表ID、名称、标题及副标题拆分的词索引
+        :return: {"ids": {(类型, ID): [序号]}, "names": {名称: [序号]}, "items": [(站点, 上下文, 媒体信息)]}
+        """
+        index = {"ids": {}, "names": {}, "items": []}
+        for domain, contexts in torrents.items():
+            for context in contexts:
+                torrent_meta = context.meta_info
+                torrent_mediainfo = context.media_info
+                torrent_info = context.torrent_info
+                # 先判断是否有没识别的种子
+                if not torrent_mediainfo or (not torrent_mediainfo.tmdb_id and not torrent_mediainfo.douban_id):
+                    logger.info(
+                        f'{torrent_info.site_name} - {torrent_info.title} 订阅缓存为未识别状态，尝试重新识别...')
+                    # 重新识别（不使用缓存）
+                    torrent_mediainfo = self.recognize_media(meta=torrent_meta, cache=False)
+                    if not torrent_mediainfo:
+                        logger.warn(
+                            f'{torrent_info.site_name} - {torrent_info.title} 重新识别失败，尝试通过标题匹配...')
+                seq = len(index["items"])
+                index["items"].append((domain, context, torrent_mediainfo))
+                if torrent_mediainfo and (torrent_mediainfo.tmdb_id or torrent_mediainfo.douban_id):
+                    keys = {("tmdb", torrent_mediainfo.tmdb_id), ("douban", torrent_mediainfo.douban_id)}
+                    for key in keys:
+                        if key[1]:
+                            index["ids"].setdefault(key, []).append(seq)
+                else:
+                    # 词表指定的ID
+                    if torrent_meta.tmdbid:
+                        index["ids"].setdefault(("tmdb", torrent_meta.tmdbid), []).append(seq)
+                    if torrent_meta.doubanid:
+                        index["ids"].setdefault(("douban", torrent_meta.doubanid), []).append(seq)
+                    # 种子中英文名
+                    names = {
+                        StringUtils.clear_upper(torrent_meta.cn_name),
+                        StringUtils.clear_upper(torrent_meta.en_name)
+                    } - {""}
+                    # 标题中的非英文单词及副标题，与标题匹配时的拆分规则一致
+                    if torrent_meta.org_string:
+                        names.update(StringUtils.clear_upper(t) for t in re.split(
+                            r'[\s/【】.\[\]\-]+', torrent_meta.org_string) if not StringUtils.is_english_word(t))
+                    if torrent_info.description:
+                        names.update(StringUtils.clear_upper(t) for t in re.split(
+                            r'[\s/【】|]+', torrent_info.description) if not StringUtils.is_english_word(t))
+                    for name in names - {""}:
+                        index["names"].setdefault(name, []).append(seq)
+        return index
+
+    @staticmethod
+    def __get_match_candidates(index: Dict[str, dict], mediainfo: MediaInfo) -> List[tuple]:
+        """
+        从倒排索引中查找订阅媒体的候选种子，保持缓存中的原始顺序
+        :return: [(站点, 上下文, 媒体信息)]
+        """
+        seqs = set()
+        for key in [("tmdb", mediainfo.tmdb_id), ("douban", mediainfo.douban_id)]:
+            if key[1]:
+                seqs.update(index["ids"].get(key) or [])
+        names = {
+            StringUtils.clear_upper(mediainfo.title),
+            StringUtils.clear_upper(mediainfo.original_title)
+        } | {StringUtils.clear_upper(name) for name in mediainfo.names or [] if name}
+        for name in names - {""}:
+            seqs.update(index["names"].get(name) or [])
+        return [index["items"][seq] for seq in sorted(seqs)]
 
     def check(self):
         """
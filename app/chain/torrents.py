@@ -14,6 +14,7 @@ from app.db.systemconfig_oper import SystemConfigOper
 from app.helper.rss import RssHelper
 from app.helper.sites import SitesHelper
 from app.helper.torrent import TorrentHelper
+from app.helper.torrentcache import TorrentCacheHelper
 from app.log import logger
 from app.schemas import Notification
 from app.schemas.types import SystemConfigKey, MessageChannel, NotificationType, MediaType
@@ -37,6 +38,7 @@ class TorrentsChain(ChainBase, metaclass=Singleton):
         self.systemconfig = SystemConfigOper()
         self.mediachain = MediaChain()
         self.torrenthelper = TorrentHelper()
+        self.torrentcache = TorrentCacheHelper()
 
     def remote_refresh(self, channel: MessageChannel, userid: Union[str, int] = None):
         """
@@ -48,20 +50,24 @@ class TorrentsChain(ChainBase, metaclass=Singleton):
         self.post_message(Notification(channel=channel,
                                        title=f"种子刷新完成！", userid=userid))
 
-    def get_torrents(self, stype: str = None) -> Dict[str, List[Context]]:
+    def get_torrents(self, stype: str = None, domains: List[str] = None) -> Dict[str, List[Context]]:
         """
         获取当前缓存的种子
         :param stype: 强制指定缓存类型，spider:爬虫缓存，rss:rss缓存
+        :param domains: 只读取指定站点域名的缓存，为空则读取全部
         """
 
         if not stype:
             stype = settings.SUBSCRIBE_MODE
 
-        # 读取缓存
-        if stype == 'spider':
-            return self.load_cache(self._spider_file) or {}
-        else:
-            return self.load_cache(self._rss_file) or {}
+        # 迁移旧版缓存文件
+        self.__migrate_cache(stype)
+        # 读取缓存，过滤掉无效种子
+        torrents_cache = self.torrentcache.get(stype=stype, domains=domains)
+        for _domain, _torrents in torrents_cache.items():
+            torrents_cache[_domain] = [_torrent for _torrent in _torrents
+                                       if not self.torrenthelper.is_invalid(_torrent.torrent_info.enclosure)]
+        return torrents_cache
 
     def clear_torrents(self):
         """
@@ -70,8 +76,24 @@ class TorrentsChain(ChainBase, metaclass=Singleton):
         logger.info(f'开始清理种子缓存数据 ...')
         self.remove_cache(self._spider_file)
         self.remove_cache(self._rss_file)
+        self.torrentcache.clear()
         logger.info(f'种子缓存数据清理完成')
 
+    def __migrate_cache(self, stype: str):
+        """
+        将旧版整体pickle缓存文件导入种子缓存存储，完成后删除旧文件
+        """
+        filename = self._spider_file if stype == "spider" else self._rss_file
+        if not (settings.TEMP_PATH / filename).exists():
+            return
+        torrents_cache: Dict[str, List[Context]] = self.load_cache(filename) or {}
+        logger.info(f'开始迁移旧版种子缓存 {filename} ...')
+        for _domain, _torrents in torrents_cache.items():
+            self.torrentcache.add(stype=stype, domain=_domain, contexts=_torrents,
+                                  limit=settings.CACHE_CONF.get('torrents'))
+        self.remove_cache(filename)
+        logger.info(f'旧版种子缓存 {filename} 迁移完成')
+
     @cached(cache=TTLCache(maxsize=128, ttl=595))
     def browse(self, domain: str) -> List[TorrentInfo]:
         """
@@ -144,13 +166,8 @@ class TorrentsChain(ChainBase, metaclass=Singleton):
         if not sites:
             sites = self.systemconfig.get(SystemConfigKey.RssSites) or []
 
-        # 读取缓存
-        torrents_cache = self.get_torrents()
-
-        # 缓存过滤掉无效种子
-        for _domain, _torrents in torrents_cache.items():
-            torrents_cache[_domain] = [_torrent for _torrent in _torrents
-                                       if not self.torrenthelper.is_invalid(_torrent.torrent_info.enclosure)]
+        # 迁移旧版缓存文件
+        self.__migrate_cache(stype)
 
         # 所有站点索引
         indexers = self.siteshelper.get_indexers()
@@ -176,14 +193,15 @@ class TorrentsChain(ChainBase, metaclass=Singleton):
             if torrents:
                 # 过滤出没有处理过的种子
                 torrents = [torrent for torrent in torrents
-                            if f'{torrent.title}{torrent.description}'
-                            not in [f'{t.torrent_info.title}{t.torrent_info.description}'
-                                    for t in torrents_cache.get(domain) or []]]
+                            if not self.torrentcache.exists(
+                                stype=stype, domain=domain,
+                                key=self.torrentcache.get_key(torrent.title, torrent.description))]
                 if torrents:
                     logger.info(f'{indexer.get("name")} 有 {len(torrents)} 个新种子')
                 else:
                     logger.info(f'{indexer.get("name")} 没有新种子')
                     continue
+                contexts: List[Context] = []
                 for torrent in torrents:
                     logger.info(f'处理资源：{torrent.title} ...')
                     # 识别
@@ -203,30 +221,17 @@ class TorrentsChain(ChainBase, metaclass=Singleton):
                     # 清理多余数据
                     mediainfo.clear()
                     # 上下文
-                    context = Context(meta_info=meta, media_info=mediainfo, torrent_info=torrent)
-                    # 添加到缓存
-                    if not torrents_cache.get(domain):
-                        torrents_cache[domain] = [context]
-                    else:
-                        torrents_cache[domain].append(context)
-                    # 如果超过了限制条数则移除掉前面的
-                    if len(torrents_cache[domain]) > settings.CACHE_CONF.get('torrents'):
-                        torrents_cache[domain] = torrents_cache[domain][-settings.CACHE_CONF.get('torrents'):]
+                    contexts.append(Context(meta_info=meta, media_info=mediainfo, torrent_info=torrent))
+                # 追加到缓存，超过限制条数则淘汰最早的种子
+                self.torrentcache.add(stype=stype, domain=domain, contexts=contexts,
+                                      limit=settings.CACHE_CONF.get('torrents'))
                 # 回收资源
                 del torrents
             else:
                 logger.info(f'{indexer.get("name")} 没有获取到种子')
 
-        # 保存缓存到本地
-        if stype == "spider":
-            self.save_cache(torrents_cache, self._spider_file)
-        else:
-            self.save_cache(torrents_cache, self._rss_file)
-
-        # 去除不在站点范围内的缓存种子
-        if sites and torrents_cache:
-            torrents_cache = {k: v for k, v in torrents_cache.items() if k in domains}
-        return torrents_cache
+        # 只读取站点范围内的缓存种子
+        return self.get_torrents(stype=stype, domains=domains if sites else None)
 
     def __renew_rss_url(self, domain: str, site: dict):
         """
@@ -1,6 +1,8 @@
 import re
 import shutil
 import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Optional, Tuple, Union, Dict
 
@@ -19,6 +21,7 @@ from app.db.systemconfig_oper import SystemConfigOper
 from app.db.transferhistory_oper import TransferHistoryOper
 from app.helper.aliyun import AliyunHelper
 from app.helper.directory import DirectoryHelper
+from app.helper.fileindex import FileIndexHelper
 from app.helper.format import FormatParser
 from app.helper.progress import ProgressHelper
 from app.helper.u115 import U115Helper
@@ -73,43 +76,77 @@ class TransferChain(ChainBase):
 
             logger.info(f"获取到 {len(torrents)} 个已完成的下载任务")
 
-            for torrent in torrents:
-                # 查询下载记录识别情况
-                downloadhis: DownloadHistory = self.downloadhis.get_by_hash(torrent.hash)
-                if downloadhis:
-                    # 类型
-                    try:
-                        mtype = MediaType(downloadhis.type)
-                    except ValueError:
-                        mtype = MediaType.TV
-                    # 按TMDBID识别
-                    mediainfo = self.recognize_media(mtype=mtype,
-                                                     tmdbid=downloadhis.tmdbid,
-                                                     doubanid=downloadhis.doubanid)
-                    if mediainfo:
-                        # 补充图片
-                        self.obtain_images(mediainfo)
-                else:
-                    # 非MoviePilot下载的任务，按文件识别
-                    mediainfo = None
-
-                # 执行转移
-                self.__do_transfer(storage="local", path=torrent.path,
-                                   mediainfo=mediainfo, download_hash=torrent.hash)
-
-                # 设置下载任务状态
-                self.transfer_completed(hashs=torrent.hash, path=torrent.path)
-            # 结束
+            # 开始进度，各任务只更新进度文本，完成数在此汇总
+            total_num = len(torrents)
+            self.progress.start(ProgressKey.FileTransfer)
+            self.progress.update(value=0,
+                                 text=f"开始整理，共 {total_num} 个下载任务 ...",
+                                 key=ProgressKey.FileTransfer)
+            # 并发整理，链接等元数据操作不会被其它任务的跨盘复制阻塞
+            finish_count = 0
+            if settings.TRANSFER_THREADS > 1 and total_num > 1:
+                with ThreadPoolExecutor(max_workers=settings.TRANSFER_THREADS) as executor:
+                    futures = {executor.submit(self.__process_torrent, torrent): torrent for torrent in torrents}
+                    for future in as_completed(futures):
+                        future.result()
+                        finish_count += 1
+                        self.progress.update(value=finish_count / total_num * 100,
+                                             text=f"{futures[future].path} 整理完成，"
+                                                  f"已完成 {finish_count} / {total_num} 个下载任务",
+                                             key=ProgressKey.FileTransfer)
+            else:
+                for torrent in torrents:
+                    self.__process_torrent(torrent)
+                    finish_count += 1
+                    self.progress.update(value=finish_count / total_num * 100,
+                                         text=f"{torrent.path} 整理完成，"
+                                              f"已完成 {finish_count} / {total_num} 个下载任务",
+                                         key=ProgressKey.FileTransfer)
+            # 结束进度
+            self.progress.end(ProgressKey.FileTransfer)
             logger.info("下载器文件转移执行完成")
             return True
 
+    def __process_torrent(self, torrent: TransferTorrent):
+        """
+        整理一个已完成的下载任务
+        """
+        try:
+            # 查询下载记录识别情况
+            downloadhis: DownloadHistory = self.downloadhis.get_by_hash(torrent.hash)
+            if downloadhis:
+                # 类型
+                try:
+                    mtype = MediaType(downloadhis.type)
+                except ValueError:
+                    mtype = MediaType.TV
+                # 按TMDBID识别
+                mediainfo = self.recognize_media(mtype=mtype,
+                                                 tmdbid=downloadhis.tmdbid,
+                                                 doubanid=downloadhis.doubanid)
+                if mediainfo:
+                    # 补充图片
+                    self.obtain_images(mediainfo)
+            else:
+                # 非MoviePilot下载的任务，按文件识别
+                mediainfo = None
+
+            # 执行转移
+            self.__do_transfer(storage="local", path=torrent.path,
+                               mediainfo=mediainfo, download_hash=torrent.hash, progress=False)
+
+            # 设置下载任务状态
+            self.transfer_completed(hashs=torrent.hash, path=torrent.path)
+        except Exception as err:
+            logger.error(f"{torrent.path} 整理出错：{str(err)} - {traceback.format_exc()}")
+
     def __do_transfer(self, storage: str, path: Path, drive_id: str = None, fileid: str = None, filetype: str = None,
                       meta: MetaBase = None, mediainfo: MediaInfo = None,
                       download_hash: str = None,
                       target: Path = None, transfer_type: str = None,
                       season: int = None, epformat: EpisodeFormat = None,
                       min_filesize: int = 0, scrape: bool = None,
-                      force: bool = False) -> Tuple[bool, str]:
+                      force: bool = False, progress: bool = True) -> Tuple[bool, str]:
         """
         执行一个复杂目录的转移操作
         :param storage: 存储器
@@ -127,6 +164,7 @@ class TransferChain(ChainBase):
         :param min_filesize: 最小文件大小(MB)
         :param scrape: 是否刮削元数据
         :param force: 是否强制转移
+        :param progress: 是否单独开始、结束进度，批量整理时为False，由调用方汇总进度
         返回：成功标识，错误信息
         """
         if not transfer_type:
@@ -142,7 +180,8 @@ class TransferChain(ChainBase):
         transfer_exclude_words = self.systemconfig.get(SystemConfigKey.TransferExcludeWords)
 
         # 开始进度
-        self.progress.start(ProgressKey.FileTransfer)
+        if progress:
+            self.progress.start(ProgressKey.FileTransfer)
 
         # 本地存储
         if storage == "local":
@@ -152,7 +191,7 @@ class TransferChain(ChainBase):
                                            transfer_exclude_words=transfer_exclude_words,
                                            min_filesize=min_filesize, transfer_type=transfer_type,
                                            target=target, season=season, scrape=scrape,
-                                           download_hash=download_hash, force=force)
+                                           download_hash=download_hash, force=force, progress=progress)
         else:
             # 网盘整理
             result = self.__transfer_online(storage=storage,
@@ -181,18 +220,28 @@ class TransferChain(ChainBase):
                                               meta=meta,
                                               mediainfo=mediainfo)
         # 结速进度
-        self.progress.end(ProgressKey.FileTransfer)
+        if progress:
+            self.progress.end(ProgressKey.FileTransfer)
         return result
 
     def __transfer_local(self, path: Path, meta: MetaBase = None, mediainfo: MediaInfo = None,
                          formaterHandler: FormatParser = None, transfer_exclude_words: List[str] = None,
                          min_filesize: int = 0, transfer_type: str = None, target: Path = None,
                          season: int = None, scrape: bool = None, download_hash: str = None,
-                         force: bool = False) -> Tuple[bool, str]:
+                         force: bool = False, progress: bool = True) -> Tuple[bool, str]:
         """
         整理一个本地目录
+        :param progress: 是否更新进度值，为False时只更新进度文本，由调用方汇总进度
         """
 
+        def __update_progress(text: str, value: float = None):
+            """
+            更新进度
+            """
+            self.progress.update(value=value if progress else None,
+                                 text=text,
+                                 key=ProgressKey.FileTransfer)
+
         # 汇总错误信息
         err_msgs: List[str] = []
         # 已处理数量
@@ -217,9 +266,8 @@ class TransferChain(ChainBase):
 
         # 总文件数
         total_num = len(transfer_files)
-        self.progress.update(value=0,
-                             text=f"开始转移 {path}，共 {total_num} 个文件 ...",
-                             key=ProgressKey.FileTransfer)
+        __update_progress(value=0,
+                          text=f"开始转移 {path}，共 {total_num} 个文件 ...")
 
         # 处理所有待转移目录或文件，默认一个转移路径或文件只有一个媒体信息
         for trans_path in trans_paths:
@@ -288,9 +336,8 @@ class TransferChain(ChainBase):
                         continue
 
                 # 更新进度
-                self.progress.update(value=processed_num / total_num * 100,
-                                     text=f"正在转移 （{processed_num + 1}/{total_num}）{file_path.name} ...",
-                                     key=ProgressKey.FileTransfer)
+                __update_progress(value=processed_num / total_num * 100,
+                                  text=f"正在转移 （{processed_num + 1}/{total_num}）{file_path.name} ...")
 
                 if not meta:
                     # 文件元数据
@@ -445,13 +492,11 @@ class TransferChain(ChainBase):
                                          metainfo=file_meta)
                 # 更新进度
                 processed_num += 1
-                self.progress.update(value=processed_num / total_num * 100,
-                                     text=f"{file_path.name} 转移完成",
-                                     key=ProgressKey.FileTransfer)
+                __update_progress(value=processed_num / total_num * 100,
+                                  text=f"{file_path.name} 转移完成")
 
             # 目录或文件转移完成
-            self.progress.update(text=f"{trans_path} 转移完成，正在执行后续处理 ...",
-                                 key=ProgressKey.FileTransfer)
+            __update_progress(text=f"{trans_path} 转移完成，正在执行后续处理 ...")
 
             # 执行后续处理
             for mkey, media in medias.items():
@@ -478,10 +523,9 @@ class TransferChain(ChainBase):
         logger.info(f"{path} 转移完成，共 {total_num} 个文件，"
                     f"失败 {fail_num} 个，跳过 {skip_num} 个")
 
-        self.progress.update(value=100,
-                             text=f"{path} 转移完成，共 {total_num} 个文件，"
-                                  f"失败 {fail_num} 个，跳过 {skip_num} 个",
-                             key=ProgressKey.FileTransfer)
+        __update_progress(value=100,
+                          text=f"{path} 转移完成，共 {total_num} 个文件，"
+                               f"失败 {fail_num} 个，跳过 {skip_num} 个")
         return True, "\n".join(err_msgs)
 
     def __transfer_online(self, storage: str, fileitem: schemas.FileItem,
@@ -721,7 +765,7 @@ class TransferChain(ChainBase):
             if SystemUtils.is_bluray_dir(sub_dir):
                 trans_paths.append(sub_dir)
             # 没有媒体文件的目录跳过
-            elif SystemUtils.list_files(sub_dir, extensions=settings.RMT_MEDIAEXT):
+            elif FileIndexHelper().exists_files(sub_dir, extensions=settings.RMT_MEDIAEXT):
                 trans_paths.append(sub_dir)
 
         if not trans_paths:
@@ -931,7 +975,8 @@ class TransferChain(ChainBase):
         self.post_message(Notification(
             mtype=NotificationType.Organize,
             title=msg_title, text=msg_str, image=mediainfo.get_message_image(),
-            link=settings.MP_DOMAIN('#/history')))
+            link=settings.MP_DOMAIN('#/history')),
+            coalesce_key=f"organize:{mediainfo.tmdb_id or mediainfo.title_year}:{meta.season}")
 
     def delete_files(self, path: Path) -> Tuple[bool, str]:
         """
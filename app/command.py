@@ -1,6 +1,6 @@
-import copy
 import importlib
 import threading
+import time
 import traceback
 from threading import Thread
 from typing import Any, Union, Dict
@@ -43,6 +43,9 @@ class Command(metaclass=Singleton):
     # 退出事件
     _event = threading.Event()
 
+    # 事件响应处理链类缓存，类名 -> 类
+    _chain_classes: Dict[str, Any] = {}
+
     def __init__(self):
         # 事件管理器
         self.eventmanager = EventManager()
@@ -56,6 +59,8 @@ class Command(metaclass=Singleton):
         self.messagehelper = MessageHelper()
         # 线程管理器
         self.threader = ThreadHelper()
+        # 空闲的事件处理线程数，没有空闲线程时事件留在优先级队列中，不在线程池中排队
+        self._handler_slots = threading.BoundedSemaphore(self.threader.max_workers)
         # 内置命令
         self._commands = {
             "/cookiecloud": {
@@ -183,57 +188,125 @@ class Command(metaclass=Singleton):
         事件处理线程
         """
         while not self._event.is_set():
+            # 有空闲的处理线程时才取出事件，积压的事件按优先级留在事件队列中
+            if not self.__acquire_slot():
+                break
             event, handlers = self.eventmanager.get_event()
-            if event:
-                logger.info(f"处理事件：{event.event_type} - {handlers}")
-                for handler in handlers:
-                    names = handler.__qualname__.split(".")
-                    [class_name, method_name] = names
-                    try:
-                        if class_name in self.pluginmanager.get_plugin_ids():
-                            # 插件事件
+            if not event:
+                self._handler_slots.release()
+                continue
+            logger.info(f"处理事件：{event.event_type} - {handlers}")
+            # 是否持有未使用的处理线程
+            has_slot = True
+            for handler in handlers:
+                if not has_slot and not self.__acquire_slot():
+                    break
+                names = handler.__qualname__.split(".")
+                [class_name, method_name] = names
+                try:
+                    if class_name in self.pluginmanager.get_plugin_ids():
+                        # 插件事件
+                        self.threader.submit(
+                            self.__run_handler,
+                            handler.__qualname__,
+                            self.pluginmanager.run_plugin_method,
+                            class_name, method_name, event.copy()
+                        )
+                        has_slot = False
+                    else:
+                        class_obj = self.__get_chain_instance(class_name)
+                        if not class_obj:
+                            continue
+                        # 检查类是否存在并调用方法
+                        if hasattr(class_obj, method_name):
                             self.threader.submit(
-                                self.pluginmanager.run_plugin_method,
-                                class_name, method_name, copy.deepcopy(event)
+                                self.__run_handler,
+                                handler.__qualname__,
+                                getattr(class_obj, method_name),
+                                event.copy()
                             )
+                            has_slot = False
+                except Exception as e:
+                    logger.error(f"事件处理出错：{str(e)} - {traceback.format_exc()}")
+                    self.__send_error_event(event, f"{class_name}.{method_name}", e)
+            if has_slot:
+                self._handler_slots.release()
 
-                        else:
-                            # 检查全局变量中是否存在
-                            if class_name not in globals():
-                                # 导入模块，除了插件和Command本身，只有chain能响应事件
-                                try:
-                                    module = importlib.import_module(
-                                        f"app.chain.{class_name[:-5].lower()}"
-                                    )
-                                    class_obj = getattr(module, class_name)()
-                                except Exception as e:
-                                    logger.error(f"事件处理出错：{str(e)} - {traceback.format_exc()}")
-                                    continue
+    def __acquire_slot(self) -> bool:
+        """
+        等待空闲的事件处理线程，停止时返回False
+        """
+        while not self._event.is_set():
+            if self._handler_slots.acquire(timeout=1):
+                return True
+        return False
 
-                            else:
-                                # 通过类名创建类实例
-                                class_obj = globals()[class_name]()
-                            # 检查类是否存在并调用方法
-                            if hasattr(class_obj, method_name):
-                                self.threader.submit(
-                                    getattr(class_obj, method_name),
-                                    copy.deepcopy(event)
-                                )
-                    except Exception as e:
-                        logger.error(f"事件处理出错：{str(e)} - {traceback.format_exc()}")
-                        self.messagehelper.put(title=f"{event.event_type} 事件处理出错",
-                                               message=f"{class_name}.{method_name}：{str(e)}",
-                                               role="system")
-                        self.eventmanager.send_event(
-                            EventType.SystemError,
-                            {
-                                "type": "event",
-                                "event_type": event.event_type,
-                                "event_handle": f"{class_name}.{method_name}",
-                                "error": str(e),
-                                "traceback": traceback.format_exc()
-                            }
-                        )
+    def __get_chain_instance(self, class_name: str) -> Any:
+        """
+        获取响应事件的类实例，只缓存导入的类，每个事件使用新的实例，避免处理链的状态在多个线程间共享
+        """
+        chain_class = self._chain_classes.get(class_name)
+        if not chain_class:
+            # 检查全局变量中是否存在
+            if class_name not in globals():
+                # 导入模块，除了插件和Command本身，只有chain能响应事件
+                try:
+                    module = importlib.import_module(
+                        f"app.chain.{class_name[:-5].lower()}"
+                    )
+                    chain_class = getattr(module, class_name)
+                except Exception as e:
+                    logger.error(f"事件处理出错：{str(e)} - {traceback.format_exc()}")
+                    return None
+            else:
+                chain_class = globals()[class_name]
+            self._chain_classes[class_name] = chain_class
+        try:
+            # 创建类实例
+            return chain_class()
+        except Exception as e:
+            logger.error(f"事件处理出错：{str(e)} - {traceback.format_exc()}")
+            return None
+
+    def __run_handler(self, handler_name: str, func: Any, *args) -> None:
+        """
+        在线程池中执行事件响应，记录耗时及错误，完成后释放处理线程
+        """
+        start_time = time.perf_counter()
+        success = False
+        try:
+            func(*args)
+            success = True
+        except Exception as e:
+            logger.error(f"事件处理出错：{str(e)} - {traceback.format_exc()}")
+            event = args[-1]
+            self.__send_error_event(event, handler_name, e)
+        finally:
+            self.eventmanager.record_handler(handler_name=handler_name,
+                                             elapsed=time.perf_counter() - start_time,
+                                             success=success)
+            self._handler_slots.release()
+
+    def __send_error_event(self, event: ManagerEvent, handler_name: str, err: Exception):
+        """
+        事件响应出错时发送系统错误消息及事件
+        """
+        self.messagehelper.put(title=f"{event.event_type} 事件处理出错",
+                               message=f"{handler_name}：{str(err)}",
+                               role="system")
+        if event.event_type == EventType.SystemError.value:
+            # 避免系统错误事件响应出错时循环发送
+            return
+        self.eventmanager.send_event(
+            EventType.SystemError,
+            {
+                "type": "event",
+                "event_type": event.event_type,
+                "event_handle": handler_name,
+                "error": str(err),
+                "traceback": traceback.format_exc()
+            }
+        )
 
     def __run_command(self, command: Dict[str, any],
                       data_str: str = "",
@@ -39,6 +39,8 @@ class Settings(BaseSettings):
     DEBUG: bool = False
     # 是否开发模式
     DEV: bool = False
+    # 是否同时输出JSON行格式日志文件
+    LOG_JSON: bool = False
     # 是否开启插件热加载
     PLUGIN_AUTO_RELOAD: bool = False
     # 配置文件目录
@@ -189,6 +191,10 @@ class Settings(BaseSettings):
     TRANSFER_TYPE: str = "copy"
     # 是否同盘优先
     TRANSFER_SAME_DISK: bool = True
+    # 同时整理的下载任务数
+    TRANSFER_THREADS: int = 3
+    # 每个目标磁盘同时跨盘复制的文件数
+    TRANSFER_DEVICE_THREADS: int = 1
     # CookieCloud是否启动本地服务
     COOKIECLOUD_ENABLE_LOCAL: Optional[bool] = False
     # CookieCloud服务器地址
@@ -220,6 +226,8 @@ class Settings(BaseSettings):
     OVERWRITE_MODE: str = "size"
     # 大内存模式
     BIG_MEMORY_MODE: bool = False
+    # 可合并结果的模块方法并发执行
+    MODULE_PARALLEL: bool = False
     # 插件市场仓库地址，多个地址使用,分隔，地址以/结尾
     PLUGIN_MARKET: str = "https://github.com/jxxghp/MoviePilot-Plugins,https://github.com/thsrite/MoviePilot-Plugins,https://github.com/honue/MoviePilot-Plugins,https://github.com/InfinityPacer/MoviePilot-Plugins"
     # Github token，提高请求api限流阈值 ghp_****
@@ -232,6 +240,12 @@ class Settings(BaseSettings):
     AUTO_UPDATE_RESOURCE: bool = True
     # 元数据识别缓存过期时间（小时）
     META_CACHE_EXPIRE: int = 0
+    # 图片缓存最大占用空间（MB），超出时淘汰最久未使用的图片
+    IMAGE_CACHE_SIZE: int = 1024
+    # TMDB媒体详情缓存有效期（秒）
+    TMDB_DETAIL_CACHE_TTL: int = 3600
+    # TMDB媒体详情缓存过期后仍可使用的时间（秒），期间先返回旧数据并在后台刷新
+    TMDB_DETAIL_CACHE_STALE: int = 86400
     # 是否启用DOH解析域名
     DOH_ENABLE: bool = True
     # 使用 DOH 解析的域名列表
@@ -240,6 +254,12 @@ class Settings(BaseSettings):
     DOH_RESOLVERS: str = "1.0.0.1,1.1.1.1,9.9.9.9,149.112.112.112"
     # 搜索多个名称
     SEARCH_MULTIPLE_NAME: bool = False
+    # 同时搜索的站点数
+    SEARCH_THREADS: int = 20
+    # 单个站点同时进行的搜索数
+    SEARCH_SITE_THREADS: int = 2
+    # 站点搜索超时时间（秒），从开始搜索时计算，超时未返回的站点结果将被丢弃
+    SEARCH_TIMEOUT: int = 60
     # 订阅数据共享
     SUBSCRIBE_STATISTIC_SHARE: bool = True
     # 插件安装数据共享
@@ -326,7 +346,11 @@ class Settings(BaseSettings):
                 "torrents": 100,
                 "douban": 512,
                 "fanart": 512,
-                "meta": (self.META_CACHE_EXPIRE or 168) * 3600
+                "meta": (self.META_CACHE_EXPIRE or 168) * 3600,
+                "metainfo": 20000,
+                "tmdbinfo": 1000,
+                "metacache": 10000,
+                "fileindex": 50000
             }
         return {
             "tmdb": 256,
@@ -334,7 +358,11 @@ class Settings(BaseSettings):
             "torrents": 50,
             "douban": 256,
             "fanart": 128,
-            "meta": (self.META_CACHE_EXPIRE or 72) * 3600
+            "meta": (self.META_CACHE_EXPIRE or 72) * 3600,
+            "metainfo": 5000,
+            "tmdbinfo": 200,
+            "metacache": 2000,
+            "fileindex": 10000
         }
 
     @property
@@ -1,5 +1,8 @@
-from queue import Queue, Empty
-from typing import Dict, Any
+import itertools
+import threading
+from queue import PriorityQueue, Empty, Full
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional
 
 from app.log import logger
 from app.utils.singleton import Singleton
@@ -11,29 +14,75 @@ class EventManager(metaclass=Singleton):
     事件管理器
     """
 
+    # 事件优先级，数值越小越优先处理，未定义的事件为普通优先级
+    _priorities: Dict[str, int] = {
+        EventType.CommandExcute.value: 0,
+        EventType.UserMessage.value: 0,
+        EventType.NameRecognize.value: 0,
+        EventType.NameRecognizeResult.value: 0,
+        EventType.PluginAction.value: 0,
+        EventType.SystemError.value: 2
+    }
+    # 普通优先级
+    _default_priority = 1
+    # 事件队列最大长度
+    _queue_size = 1000
+    # 队列满时发送事件的等待时间（秒）
+    _put_timeout = 5
+
     def __init__(self):
-        # 事件队列
-        self._eventQueue = Queue()
+        # 事件队列，元素为 (优先级, 序号, 事件)
+        self._eventQueue = PriorityQueue(maxsize=self._queue_size)
+        # 同优先级事件按发送顺序处理
+        self._counter = itertools.count()
         # 事件响应函数字典
         self._handlers: Dict[str, Dict[str, Any]] = {}
         # 已禁用的事件响应
         self._disabled_handlers = []
+        # 可用事件响应缓存，事件类型 -> 响应函数列表
+        self._handler_cache: Dict[str, List[Any]] = {}
+        # 统计及响应缓存锁
+        self._lock = threading.Lock()
+        # 各优先级队列中的事件数量
+        self._lane_depth: Dict[int, int] = {}
+        # 事件统计
+        self._event_stats = {
+            "sent": 0,
+            "processed": 0,
+            "dropped": 0,
+            "max_depth": 0
+        }
+        # 事件响应耗时统计，类名.方法名 -> 统计数据
+        self._handler_stats: Dict[str, dict] = {}
+        # 取出事件的线程，即队列唯一的消费者
+        self._consumer: Optional[threading.Thread] = None
 
     def get_event(self):
         """
         获取事件
         """
+        self._consumer = threading.current_thread()
         try:
-            event = self._eventQueue.get(block=True, timeout=1)
-            handlers = self._handlers.get(event.event_type) or {}
-            if handlers:
-                # 去除掉被禁用的事件响应
-                handlerList = [handler for handler in handlers.values()
-                               if handler.__qualname__.split(".")[0] not in self._disabled_handlers]
-                return event, handlerList
-            return event, []
+            priority, _, event = self._eventQueue.get(block=True, timeout=1)
         except Empty:
             return None, []
+        with self._lock:
+            self._lane_depth[priority] -= 1
+            self._event_stats["processed"] += 1
+        return event, self.get_handlers(event.event_type)
+
+    def get_handlers(self, event_type: str) -> List[Any]:
+        """
+        获取事件的可用响应函数，去除掉被禁用的事件响应，结果缓存至响应注册或启停变化
+        """
+        with self._lock:
+            handler_list = self._handler_cache.get(event_type)
+            if handler_list is None:
+                handlers = self._handlers.get(event_type) or {}
+                handler_list = [handler for handler in handlers.values()
+                                if handler.__qualname__.split(".")[0] not in self._disabled_handlers]
+                self._handler_cache[event_type] = handler_list
+            return handler_list
 
     def check(self, etype: EventType):
         """
@@ -41,51 +90,113 @@ class EventManager(metaclass=Singleton):
         """
         if etype.value not in self._handlers:
             return False
-        handlers = self._handlers.get(etype.value)
-        return any([handler for handler in handlers.values()
-                    if handler.__qualname__.split(".")[0] not in self._disabled_handlers])
+        return any(self.get_handlers(etype.value))
 
     def add_event_listener(self, etype: EventType, handler: type):
         """
         注册事件处理
         """
-        try:
-            handlers = self._handlers[etype.value]
-        except KeyError:
-            handlers = {}
-            self._handlers[etype.value] = handlers
-        if handler.__qualname__ in handlers:
-            handlers.pop(handler.__qualname__)
-        else:
-            logger.debug(f"Event Registed：{etype.value} - {handler.__qualname__}")
-        handlers[handler.__qualname__] = handler
+        with self._lock:
+            try:
+                handlers = self._handlers[etype.value]
+            except KeyError:
+                handlers = {}
+                self._handlers[etype.value] = handlers
+            if handler.__qualname__ in handlers:
+                handlers.pop(handler.__qualname__)
+            else:
+                logger.debug(f"Event Registed：{etype.value} - {handler.__qualname__}")
+            handlers[handler.__qualname__] = handler
+            self._handler_cache.clear()
 
     def disable_events_hander(self, class_name: str):
         """
         标记对应类事件处理为不可用
         """
-        if class_name not in self._disabled_handlers:
-            self._disabled_handlers.append(class_name)
-            logger.debug(f"Event Disabled：{class_name}")
+        with self._lock:
+            if class_name not in self._disabled_handlers:
+                self._disabled_handlers.append(class_name)
+                self._handler_cache.clear()
+                logger.debug(f"Event Disabled：{class_name}")
 
     def enable_events_hander(self, class_name: str):
         """
         标记对应类事件处理为可用
         """
-        if class_name in self._disabled_handlers:
-            self._disabled_handlers.remove(class_name)
+        with self._lock:
+            if class_name in self._disabled_handlers:
+                self._disabled_handlers.remove(class_name)
+                self._handler_cache.clear()
         logger.debug(f"Event Enabled：{class_name}")
 
     def send_event(self, etype: EventType, data: dict = None):
         """
-        发送事件
+        发送事件，事件数据只复制第一层，发送后增删键值不影响事件，其中的对象与发送方共享，队列满时等待，超时则丢弃
+        系统错误事件及事件处理线程发送的事件在队列满时直接丢弃，避免消费者等待自身
         """
         if etype not in EventType:
             return
         event = Event(etype.value)
-        event.event_data = data or {}
+        event.event_data = dict(data) if data else {}
         logger.debug(f"发送事件：{etype.value} - {event.event_data}")
-        self._eventQueue.put(event)
+        priority = self._priorities.get(etype.value, self._default_priority)
+        with self._lock:
+            self._lane_depth[priority] = self._lane_depth.get(priority, 0) + 1
+        block = etype != EventType.SystemError and threading.current_thread() is not self._consumer
+        try:
+            self._eventQueue.put((priority, next(self._counter), event),
+                                 block=block, timeout=self._put_timeout if block else None)
+        except Full:
+            with self._lock:
+                self._lane_depth[priority] -= 1
+                self._event_stats["dropped"] += 1
+            logger.warn(f"事件队列已满，丢弃事件：{etype.value}")
+            return
+        with self._lock:
+            self._event_stats["sent"] += 1
+            self._event_stats["max_depth"] = max(self._event_stats["max_depth"], self._eventQueue.qsize())
+
+    def record_handler(self, handler_name: str, elapsed: float, success: bool = True):
+        """
+        记录事件响应耗时
+        :param handler_name: 类名.方法名
+        :param elapsed: 耗时（秒）
+        :param success: 是否成功
+        """
+        with self._lock:
+            stats = self._handler_stats.get(handler_name)
+            if not stats:
+                stats = {
+                    "count": 0,
+                    "errors": 0,
+                    "total_time": 0.0,
+                    "max_time": 0.0
+                }
+                self._handler_stats[handler_name] = stats
+            stats["count"] += 1
+            if not success:
+                stats["errors"] += 1
+            stats["total_time"] += elapsed
+            stats["max_time"] = max(stats["max_time"], elapsed)
+
+    def get_stats(self) -> dict:
+        """
+        获取事件队列及响应耗时统计，耗时单位为毫秒
+        """
+        with self._lock:
+            return {
+                "depth": self._eventQueue.qsize(),
+                "capacity": self._queue_size,
+                "lanes": {str(priority): depth for priority, depth in sorted(self._lane_depth.items())},
+                **self._event_stats,
+                "handlers": [{
+                    "handler": name,
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "avg_time": round(stats["total_time"] * 1000 / stats["count"], 2) if stats["count"] else 0,
+                    "max_time": round(stats["max_time"] * 1000, 2)
+                } for name, stats in self._handler_stats.items()]
+            }
 
     def register(self, etype: [EventType, list]):
         """
@@ -118,6 +229,15 @@ class Event(object):
         # 字典用于保存具体的事件数据
         self.event_data = {}
 
+    def copy(self) -> "Event":
+        """
+        复制事件，各响应共享同一份事件数据，事件数据为只读视图，不能增删键值
+        事件数据中的对象（如媒体信息、转移信息）不复制，响应中需要修改时应先自行复制
+        """
+        event = Event(self.event_type)
+        event.event_data = MappingProxyType(self.event_data)
+        return event
+
 
 # 实例引用，用于注册事件
 eventmanager = EventManager()
@@ -1,4 +1,6 @@
-from typing import List, Tuple
+import threading
+from dataclasses import dataclass, field
+from typing import List, Tuple, Optional
 
 import cn2an
 import regex as re
@@ -9,10 +11,47 @@ from app.schemas.types import SystemConfigKey
 from app.utils.singleton import Singleton
 
 
+@dataclass
+class WordRule:
+    """
+    预编译的自定义识别词规则
+    """
+    # 识别词原文
+    word: str
+    # 规则类型：block 屏蔽词、replace 替换词、offset 集偏移、replace_offset 替换词+集偏移、block_group 屏蔽词组
+    type: str
+    # 被替换词/屏蔽词，屏蔽词组时为合并后的正则
+    pattern: Optional[re.Pattern] = None
+    # 替换词
+    replace: str = ""
+    # 集偏移前定位词
+    front: str = ""
+    # 集偏移后定位词
+    back: str = ""
+    # 集偏移量
+    offset: str = ""
+    # 集偏移前定位词正则
+    front_re: Optional[re.Pattern] = None
+    # 集偏移后定位词正则
+    back_re: Optional[re.Pattern] = None
+    # 集数提取正则
+    offset_re: Optional[re.Pattern] = None
+    # 屏蔽词组包含的屏蔽词规则
+    rules: List["WordRule"] = field(default_factory=list)
+
+
 class WordsMatcher(metaclass=Singleton):
 
+    # 不能合并到屏蔽词组中的写法：反向引用、全局标志
+    _unmergeable_re = re.compile(r'\\[1-9]|\(\?P=|\\g<|\(\?[\w-]*\)')
+
     def __init__(self):
         self.systemconfig = SystemConfigOper()
+        self._lock = threading.Lock()
+        # 已编译的识别词规则
+        self._program: List[WordRule] = []
+        # 已编译规则对应的识别词配置版本
+        self._version = None
 
     def prepare(self, title: str) -> Tuple[str, List[str]]:
         """
@@ -21,79 +60,172 @@ class WordsMatcher(metaclass=Singleton):
         2：被替换词 => 替换词
         3：前定位词 <> 后定位词 >> 偏移量（EP）
         """
-        appley_words = []
-        # 读取自定义识别词
-        words: List[str] = self.systemconfig.get(SystemConfigKey.CustomIdentifiers) or []
+        return self.apply(title, self.__get_program())
+
+    def __get_program(self) -> List[WordRule]:
+        """
+        获取编译后的识别词规则，识别词配置变化时重新编译
+        """
+        version = self.systemconfig.version(SystemConfigKey.CustomIdentifiers)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    # 读取自定义识别词
+                    words: List[str] = self.systemconfig.get(SystemConfigKey.CustomIdentifiers) or []
+                    self._program = self.compile(words)
+                    self._version = version
+        return self._program
+
+    @classmethod
+    def compile(cls, words: List[str]) -> List[WordRule]:
+        """
+        将识别词编译为规则列表，连续的屏蔽词合并为一个正则用于快速判断
+        """
+        program: List[WordRule] = []
+        # 当前连续的屏蔽词
+        block_rules: List[WordRule] = []
+
+        def flush_block_rules():
+            """
+            合并连续的屏蔽词
+            """
+            if len(block_rules) > 1:
+                try:
+                    pattern = re.compile("|".join(f"(?:{rule.word})" for rule in block_rules))
+                    program.append(WordRule(word="", type="block_group", pattern=pattern, rules=list(block_rules)))
+                except Exception as e:
+                    logger.debug(f"合并屏蔽词失败，逐个匹配：{str(e)}")
+                    program.extend(block_rules)
+            else:
+                program.extend(block_rules)
+            block_rules.clear()
+
         for word in words:
             if not word or word.startswith("#"):
                 continue
             try:
-                if word.count(" => ") and word.count(" && ") and word.count(" >> ") and word.count(" <> "):
-                    # 替换词
-                    thc = str(re.findall(r'(.*?)\s*=>', word)[0]).strip()
-                    # 被替换词
-                    bthc = str(re.findall(r'=>\s*(.*?)\s*&&', word)[0]).strip()
-                    # 集偏移前字段
-                    pyq = str(re.findall(r'&&\s*(.*?)\s*<>', word)[0]).strip()
-                    # 集偏移后字段
-                    pyh = str(re.findall(r'<>(.*?)\s*>>', word)[0]).strip()
-                    # 集偏移
-                    offsets = str(re.findall(r'>>\s*(.*?)$', word)[0]).strip()
-                    # 替换词
-                    title, message, state = self.__replace_regex(title, thc, bthc)
-                    if state:
-                        # 替换词成功再进行集偏移
-                        title, message, state = self.__episode_offset(title, pyq, pyh, offsets)
-                elif word.count(" => "):
-                    # 替换词
-                    strings = word.split(" => ")
-                    title, message, state = self.__replace_regex(title, strings[0], strings[1])
-                elif word.count(" >> ") and word.count(" <> "):
-                    # 集偏移
-                    strings = word.split(" <> ")
-                    offsets = strings[1].split(" >> ")
-                    strings[1] = offsets[0]
-                    title, message, state = self.__episode_offset(title, strings[0], strings[1], offsets[1])
-                else:
-                    # 屏蔽词
-                    if not word.strip():
-                        continue
-                    title, message, state = self.__replace_regex(title, word, "")
+                rule = cls.__compile_word(word)
+            except Exception as err:
+                logger.warn(f"自定义识别词 {word} 编译失败：{str(err)}")
+                continue
+            if not rule:
+                continue
+            if rule.type == "block" and not cls._unmergeable_re.search(rule.word):
+                block_rules.append(rule)
+                continue
+            flush_block_rules()
+            program.append(rule)
+        flush_block_rules()
+        return program
+
+    @staticmethod
+    def __compile_word(word: str) -> Optional[WordRule]:
+        """
+        编译单条识别词
+        """
 
-                if state:
-                    appley_words.append(word)
+        def compile_offset(rule: WordRule):
+            """
+            编译集偏移正则
+            """
+            rule.front_re = re.compile(r'%s' % rule.front) if rule.front else None
+            rule.back_re = re.compile(r'%s' % rule.back) if rule.back else None
+            rule.offset_re = re.compile(r'(?<=%s.*?)[0-9一二三四五六七八九十]+(?=.*?%s)' % (rule.front, rule.back))
 
-            except Exception as err:
-                logger.warn(f"自定义识别词 {word} 预处理标题失败：{str(err)} - 标题：{title}")
+        if word.count(" => ") and word.count(" && ") and word.count(" >> ") and word.count(" <> "):
+            rule = WordRule(
+                word=word,
+                type="replace_offset",
+                # 被替换词
+                pattern=re.compile(r'%s' % str(re.findall(r'(.*?)\s*=>', word)[0]).strip()),
+                # 替换词
+                replace=str(re.findall(r'=>\s*(.*?)\s*&&', word)[0]).strip(),
+                # 集偏移前字段
+                front=str(re.findall(r'&&\s*(.*?)\s*<>', word)[0]).strip(),
+                # 集偏移后字段
+                back=str(re.findall(r'<>(.*?)\s*>>', word)[0]).strip(),
+                # 集偏移
+                offset=str(re.findall(r'>>\s*(.*?)$', word)[0]).strip()
+            )
+            compile_offset(rule)
+            return rule
+        elif word.count(" => "):
+            # 替换词
+            strings = word.split(" => ")
+            return WordRule(word=word, type="replace",
+                            pattern=re.compile(r'%s' % strings[0]), replace=strings[1])
+        elif word.count(" >> ") and word.count(" <> "):
+            # 集偏移
+            strings = word.split(" <> ")
+            offsets = strings[1].split(" >> ")
+            rule = WordRule(word=word, type="offset",
+                            front=strings[0], back=offsets[0], offset=offsets[1])
+            compile_offset(rule)
+            return rule
+        elif word.strip():
+            # 屏蔽词
+            return WordRule(word=word, type="block", pattern=re.compile(r'%s' % word))
+        return None
+
+    @classmethod
+    def apply(cls, title: str, program: List[WordRule]) -> Tuple[str, List[str]]:
+        """
+        按编译后的识别词规则处理标题
+        :return: 处理后的标题、应用的识别词
+        """
+        appley_words = []
+        for rule in program:
+            if rule.type == "block_group":
+                # 屏蔽词组都不匹配时整体跳过
+                if not rule.pattern.search(title):
+                    continue
+                rules = rule.rules
+            else:
+                rules = [rule]
+            for sub_rule in rules:
+                try:
+                    if sub_rule.type == "replace_offset":
+                        title, message, state = cls.__replace_regex(title, sub_rule.pattern, sub_rule.replace)
+                        if state:
+                            # 替换词成功再进行集偏移
+                            title, message, state = cls.__episode_offset(title, sub_rule)
+                    elif sub_rule.type == "offset":
+                        title, message, state = cls.__episode_offset(title, sub_rule)
+                    else:
+                        title, message, state = cls.__replace_regex(title, sub_rule.pattern, sub_rule.replace)
+                    if state:
+                        appley_words.append(sub_rule.word)
+                except Exception as err:
+                    logger.warn(f"自定义识别词 {sub_rule.word} 预处理标题失败：{str(err)} - 标题：{title}")
 
         return title, appley_words
 
     @staticmethod
-    def __replace_regex(title: str, replaced: str, replace: str) -> Tuple[str, str, bool]:
+    def __replace_regex(title: str, pattern: re.Pattern, replace: str) -> Tuple[str, str, bool]:
         """
         正则替换
         """
         try:
-            if not re.findall(r'%s' % replaced, title):
+            if not pattern.search(title):
                 return title, "", False
             else:
-                return re.sub(r'%s' % replaced, r'%s' % replace, title), "", True
+                return pattern.sub(r'%s' % replace, title), "", True
         except Exception as err:
-            logger.warn(f"自定义识别词正则替换失败：{str(err)} - 标题：{title}，被替换词：{replaced}，替换词：{replace}")
+            logger.warn(f"自定义识别词正则替换失败：{str(err)} - 标题：{title}，被替换词：{pattern.pattern}，替换词：{replace}")
             return title, str(err), False
 
     @staticmethod
-    def __episode_offset(title: str, front: str, back: str, offset: str) -> Tuple[str, str, bool]:
+    def __episode_offset(title: str, rule: WordRule) -> Tuple[str, str, bool]:
         """
         集数偏移
         """
+        front, back, offset = rule.front, rule.back, rule.offset
         try:
-            if back and not re.findall(r'%s' % back, title):
+            if rule.back_re and not rule.back_re.search(title):
                 return title, "", False
-            if front and not re.findall(r'%s' % front, title):
+            if rule.front_re and not rule.front_re.search(title):
                 return title, "", False
-            offset_word_info_re = re.compile(r'(?<=%s.*?)[0-9一二三四五六七八九十]+(?=.*?%s)' % (front, back))
-            episode_nums_str = re.findall(offset_word_info_re, title)
+            episode_nums_str = rule.offset_re.findall(title)
             if not episode_nums_str:
                 return title, "", False
             episode_nums_offset_str = []
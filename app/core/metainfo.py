@@ -1,22 +1,116 @@
+import copy
+import threading
 from pathlib import Path
-from typing import Tuple
+from typing import Tuple, Optional
 
 import regex as re
+from cachetools import LRUCache
 
 from app.core.config import settings
 from app.core.meta import MetaAnime, MetaVideo, MetaBase
 from app.core.meta.words import WordsMatcher
+from app.db.systemconfig_oper import SystemConfigOper
 from app.log import logger
-from app.schemas.types import MediaType
+from app.schemas.types import MediaType, SystemConfigKey
+from app.utils.singleton import Singleton
+
+
+class MetaInfoCache(metaclass=Singleton):
+    """
+    元数据识别结果缓存，自定义识别词、制作组/字幕组、占位符变化时失效
+    """
+
+    # 影响识别结果的配置项
+    _config_keys = [
+        SystemConfigKey.CustomIdentifiers,
+        SystemConfigKey.CustomReleaseGroups,
+        SystemConfigKey.Customization
+    ]
+
+    def __init__(self):
+        self.systemconfig = SystemConfigOper()
+        self._cache = LRUCache(maxsize=settings.CACHE_CONF.get('metainfo'))
+        self._versions = ()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, title: str, subtitle: str = None) -> Optional[MetaBase]:
+        """
+        获取缓存的识别结果，返回副本，未命中时返回None
+        """
+        versions = tuple(self.systemconfig.version(key) for key in self._config_keys)
+        with self._lock:
+            if versions != self._versions:
+                self._cache.clear()
+                self._versions = versions
+            meta = self._cache.get((title, subtitle))
+            if meta is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        return self.clone(meta)
+
+    def set(self, title: str, subtitle: str, meta: MetaBase):
+        """
+        缓存识别结果，缓存的是副本，调用方修改识别结果不影响缓存
+        """
+        with self._lock:
+            self._cache[(title, subtitle)] = self.clone(meta)
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        """
+        缓存命中统计
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 4) if total else 0
+            }
+
+    @staticmethod
+    def clone(meta: MetaBase) -> MetaBase:
+        """
+        复制识别结果，列表、字典等可变属性单独复制
+        """
+        new_meta = copy.copy(meta)
+        for key, value in meta.__dict__.items():
+            if isinstance(value, (list, dict, set)):
+                setattr(new_meta, key, copy.copy(value))
+        return new_meta
 
 
 def MetaInfo(title: str, subtitle: str = None) -> MetaBase:
     """
-    根据标题和副标题识别元数据
+    根据标题和副标题识别元数据，相同标题的识别结果会被缓存
     :param title: 标题、种子名、文件名
     :param subtitle: 副标题、描述
     :return: MetaAnime、MetaVideo
     """
+    cache = MetaInfoCache()
+    meta = cache.get(title, subtitle)
+    if meta:
+        return meta
+    meta = _parse_metainfo(title, subtitle)
+    cache.set(title, subtitle, meta)
+    return meta
+
+
+def _parse_metainfo(title: str, subtitle: str = None) -> MetaBase:
+    """
+    识别标题和副标题中的元数据
+    """
     # 原标题
     org_title = title
     # 预处理标题
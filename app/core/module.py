@@ -1,5 +1,6 @@
+import threading
 import traceback
-from typing import Generator, Optional, Tuple, Any
+from typing import Optional, Tuple, Any, List, Dict
 
 from app.core.config import settings
 from app.helper.module import ModuleHelper
@@ -17,6 +18,14 @@ class ModuleManager(metaclass=Singleton):
     _modules: dict = {}
     # 运行态模块列表
     _running_modules: dict = {}
+    # 方法分发表，方法名 -> 实现了该方法的运行态模块列表
+    _method_modules: Dict[str, list] = {}
+    # 模块方法调用统计，模块ID.方法名 -> 统计数据
+    _module_stats: Dict[str, dict] = {}
+    # 统计锁
+    _stats_lock = threading.Lock()
+    # 模块列表及方法分发表的更新锁
+    _modules_lock = threading.Lock()
 
     def __init__(self):
         self.load_modules()
@@ -30,11 +39,12 @@ class ModuleManager(metaclass=Singleton):
             "app.modules",
             filter_func=lambda _, obj: hasattr(obj, 'init_module') and hasattr(obj, 'init_setting')
         )
-        self._running_modules = {}
-        self._modules = {}
+        # 先在局部变量中加载，完成后一次性替换，避免并发调用时取到部分加载的模块列表
+        _modules = {}
+        _running_modules = {}
         for module in modules:
             module_id = module.__name__
-            self._modules[module_id] = module
+            _modules[module_id] = module
             try:
                 # 生成实例
                 _module = module()
@@ -42,10 +52,14 @@ class ModuleManager(metaclass=Singleton):
                 if self.check_setting(_module.init_setting()):
                     # 通过模板开关控制加载
                     _module.init_module()
-                    self._running_modules[module_id] = _module
+                    _running_modules[module_id] = _module
                     logger.info(f"Moudle Loaded：{module_id}")
             except Exception as err:
                 logger.error(f"Load Moudle Error：{module_id}，{str(err)} - {traceback.format_exc()}", exc_info=True)
+        with self._modules_lock:
+            self._modules = _modules
+            self._running_modules = _running_modules
+            self._method_modules = {}
 
     def stop(self):
         """
@@ -107,16 +121,64 @@ class ModuleManager(metaclass=Singleton):
             return None
         return self._running_modules.get(module_id)
 
-    def get_running_modules(self, method: str) -> Generator:
-        """
-        获取实现了同一方法的模块列表
-        """
-        if not self._running_modules:
-            return []
-        for _, module in self._running_modules.items():
-            if hasattr(module, method) \
-                    and ObjectUtils.check_method(getattr(module, method)):
-                yield module
+    def get_running_modules(self, method: str) -> List[Any]:
+        """
+        获取实现了同一方法的模块列表，结果按方法名缓存，模块重新加载时重建
+        """
+        modules = self._method_modules.get(method)
+        if modules is not None:
+            return modules
+        # 在锁内生成，保证缓存的列表与当前运行态模块一致
+        with self._modules_lock:
+            modules = [module for module in self._running_modules.values()
+                       if hasattr(module, method)
+                       and ObjectUtils.check_method(getattr(module, method))]
+            self._method_modules[method] = modules
+        return modules
+
+    def record_stats(self, module_id: str, method: str, elapsed: float, success: bool = True):
+        """
+        记录模块方法调用耗时及错误次数
+        :param module_id: 模块ID
+        :param method: 方法名
+        :param elapsed: 耗时（秒）
+        :param success: 是否成功
+        """
+        key = f"{module_id}.{method}"
+        with self._stats_lock:
+            stats = self._module_stats.get(key)
+            if not stats:
+                stats = {
+                    "module_id": module_id,
+                    "method": method,
+                    "count": 0,
+                    "errors": 0,
+                    "total_time": 0.0,
+                    "max_time": 0.0,
+                    "last_time": 0.0
+                }
+                self._module_stats[key] = stats
+            stats["count"] += 1
+            if not success:
+                stats["errors"] += 1
+            stats["total_time"] += elapsed
+            stats["last_time"] = elapsed
+            stats["max_time"] = max(stats["max_time"], elapsed)
+
+    def get_stats(self) -> List[dict]:
+        """
+        获取模块方法调用统计，耗时单位为毫秒
+        """
+        with self._stats_lock:
+            return [{
+                "module_id": stats["module_id"],
+                "method": stats["method"],
+                "count": stats["count"],
+                "errors": stats["errors"],
+                "avg_time": round(stats["total_time"] * 1000 / stats["count"], 2) if stats["count"] else 0,
+                "max_time": round(stats["max_time"] * 1000, 2),
+                "last_time": round(stats["last_time"] * 1000, 2)
+            } for stats in self._module_stats.values()]
 
     def get_module(self, module_id: str) -> Any:
         """
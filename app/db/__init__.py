@@ -1,7 +1,7 @@
 from typing import Any, Self, List
 from typing import Tuple, Optional, Generator
 
-from sqlalchemy import create_engine, QueuePool
+from sqlalchemy import create_engine, QueuePool, text, TextClause
 from sqlalchemy import inspect
 from sqlalchemy.orm import declared_attr
 from sqlalchemy.orm import sessionmaker, Session, scoped_session, as_declarative
@@ -71,6 +71,55 @@ def update_args_db(args: tuple, kwargs: dict, db: Session) -> Tuple[tuple, dict]
     return args, kwargs
 
 
+def fts_statements(table: str, columns: List[str]) -> List[str]:
+    """
+    生成全文索引表及同步触发器的建表语句，索引表以原表id作为rowid，原表增删改时由触发器自动同步
+    trigram分词支持中文及任意子串匹配
+    """
+    fts_table = f"{table}_fts"
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{col}" for col in columns)
+    old_cols = ", ".join(f"old.{col}" for col in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{cols}, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+        # 重建已有数据的索引
+        f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"
+    ]
+
+
+# 全文索引表是否可用，按数据库和表名缓存
+_fts_available = {}
+
+
+def fts_match(db: Session, table: str, keyword: str) -> Optional[TextClause]:
+    """
+    生成全文索引的匹配条件，返回匹配记录id的子查询
+    trigram分词至少需要3个字符，关键字过短或索引表不存在（SQLite版本过低）时返回None，由调用方使用LIKE查询
+    """
+    if not keyword or len(keyword) < 3:
+        return None
+    fts_table = f"{table}_fts"
+    cache_key = (str(db.get_bind().url), fts_table)
+    if cache_key not in _fts_available:
+        _fts_available[cache_key] = db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": fts_table}
+        ).first() is not None
+    if not _fts_available[cache_key]:
+        return None
+    # 作为短语匹配，转义双引号
+    phrase = '"%s"' % keyword.replace('"', '""')
+    return text(f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH :phrase").bindparams(phrase=phrase)
+
+
 def db_update(func):
     """
     数据库更新类操作装饰器，第一个参数必须是数据库会话或存在db参数
@@ -89,11 +89,12 @@ class DownloadHistoryOper(DbOper):
             return fileinfo.download_hash
         return ""
 
-    def list_by_page(self, page: int = 1, count: int = 30) -> List[DownloadHistory]:
+    def list_by_page(self, page: int = 1, count: int = 30,
+                     title: str = None, cursor: int = None) -> List[DownloadHistory]:
         """
         分页查询下载历史
         """
-        return DownloadHistory.list_by_page(self._db, page, count)
+        return DownloadHistory.list_by_page(self._db, page, count, title=title, cursor=cursor)
 
     def truncate(self):
         """
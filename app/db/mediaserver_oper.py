@@ -1,5 +1,5 @@
 import json
-from typing import Optional
+from typing import Optional, List, Dict
 
 from sqlalchemy.orm import Session
 
@@ -31,6 +31,24 @@ class MediaServerOper(DbOper):
         """
         MediaServerItem.empty(self._db, server)
 
+    def replace(self, server: str, items: List[dict]):
+        """
+        在同一事务中替换某个媒体服务器的全部数据，替换完成前查询到的仍是旧数据
+        """
+        MediaServerItem.replace(self._db, server, items)
+
+    def empty_except(self, servers: List[str]):
+        """
+        清空不在列表中的媒体服务器数据
+        """
+        MediaServerItem.empty_except(self._db, servers)
+
+    def list_by_server(self, server: str) -> Dict[str, MediaServerItem]:
+        """
+        获取某个媒体服务器的全部数据，按item_id索引
+        """
+        return {item.item_id: item for item in MediaServerItem.list_by_server(self._db, server)}
+
     def exists(self, **kwargs) -> Optional[MediaServerItem]:
         """
         判断媒体服务器数据是否存在
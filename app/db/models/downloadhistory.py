@@ -1,9 +1,9 @@
 import time
 
-from sqlalchemy import Column, Integer, String, Sequence
+from sqlalchemy import Column, Integer, String, Sequence, or_
 from sqlalchemy.orm import Session
 
-from app.db import db_query, db_update, Base
+from app.db import db_query, db_update, fts_match, Base
 
 
 class DownloadHistory(Base):
@@ -55,8 +55,30 @@ class DownloadHistory(Base):
 
     @staticmethod
     @db_query
-    def list_by_page(db: Session, page: int = 1, count: int = 30):
-        result = db.query(DownloadHistory).offset((page - 1) * count).limit(count).all()
+    def list_by_page(db: Session, page: int = 1, count: int = 30, title: str = None, cursor: int = None):
+        """
+        分页查询下载历史，按id倒序
+        :param title: 搜索关键字，匹配标题、保存路径、种子名称、季集
+        :param cursor: 上一页最后一条记录的id，传入时按id向后翻页，不再使用OFFSET
+        """
+        query = db.query(DownloadHistory)
+        if title:
+            match = fts_match(db, "downloadhistory", title)
+            if match is not None:
+                query = query.filter(DownloadHistory.id.in_(match))
+            else:
+                query = query.filter(or_(
+                    DownloadHistory.title.like(f'%{title}%'),
+                    DownloadHistory.path.like(f'%{title}%'),
+                    DownloadHistory.torrent_name.like(f'%{title}%'),
+                    DownloadHistory.seasons.like(f'%{title}%'),
+                    DownloadHistory.episodes.like(f'%{title}%'),
+                ))
+        query = query.order_by(DownloadHistory.id.desc())
+        if cursor:
+            result = query.filter(DownloadHistory.id < cursor).limit(count).all()
+        else:
+            result = query.offset((max(page, 1) - 1) * count).limit(count).all()
         return list(result)
 
     @staticmethod
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
-from sqlalchemy import Column, Integer, String, Sequence
+from sqlalchemy import Column, Integer, String, Sequence, insert
 from sqlalchemy.orm import Session
 
 from app.db import db_query, db_update, Base
@@ -38,7 +38,7 @@ class MediaServerItem(Base):
     seasoninfo = Column(String)
     # 备注
     note = Column(String)
-    # 同步时间
+    # 媒体服务器最后修改时间，未提供时为同步时间
     lst_mod_date = Column(String, default=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
 
     @staticmethod
@@ -54,6 +54,24 @@ class MediaServerItem(Base):
         else:
             db.query(MediaServerItem).filter(MediaServerItem.server == server).delete()
 
+    @staticmethod
+    @db_update
+    def replace(db: Session, server: str, items: List[dict]):
+        db.query(MediaServerItem).filter(MediaServerItem.server == server).delete()
+        if items:
+            db.execute(insert(MediaServerItem), items)
+
+    @staticmethod
+    @db_update
+    def empty_except(db: Session, servers: List[str]):
+        db.query(MediaServerItem).filter(MediaServerItem.server.notin_(servers)).delete()
+
+    @staticmethod
+    @db_query
+    def list_by_server(db: Session, server: str):
+        result = db.query(MediaServerItem).filter(MediaServerItem.server == server).all()
+        return list(result)
+
     @staticmethod
     @db_query
     def exist_by_tmdbid(db: Session, tmdbid: int, mtype: str):
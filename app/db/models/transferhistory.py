@@ -1,9 +1,10 @@
 import time
+from typing import List, Tuple
 
 from sqlalchemy import Column, Integer, String, Sequence, Boolean, func, or_
 from sqlalchemy.orm import Session
 
-from app.db import db_query, db_update, Base
+from app.db import db_query, db_update, fts_match, Base
 
 
 class TransferHistory(Base):
@@ -46,40 +47,83 @@ class TransferHistory(Base):
     # 文件清单，以JSON存储
     files = Column(String)
 
+    @staticmethod
+    def __title_filter(db: Session, title: str):
+        """
+        标题、源目录、目标目录、季集的搜索条件，优先使用全文索引
+        """
+        match = fts_match(db, "transferhistory", title)
+        if match is not None:
+            return TransferHistory.id.in_(match)
+        return or_(
+            TransferHistory.title.like(f'%{title}%'),
+            TransferHistory.src.like(f'%{title}%'),
+            TransferHistory.dest.like(f'%{title}%'),
+            TransferHistory.seasons.like(f'%{title}%'),
+            TransferHistory.episodes.like(f'%{title}%'),
+        )
+
+    @staticmethod
+    def __filters(db: Session, title: str = None, status: bool = None) -> list:
+        """
+        查询条件
+        """
+        filters = []
+        if title:
+            filters.append(TransferHistory.__title_filter(db, title))
+        if status is not None:
+            filters.append(TransferHistory.status == status)
+        return filters
+
     @staticmethod
     @db_query
     def list_by_title(db: Session, title: str, page: int = 1, count: int = 30, status: bool = None):
-        if status is not None:
-            result = db.query(TransferHistory).filter(
-                TransferHistory.status == status
-            ).order_by(
-                TransferHistory.date.desc()
-            ).offset((page - 1) * count).limit(count).all()
-        else:
-            result = db.query(TransferHistory).filter(or_(
-                TransferHistory.title.like(f'%{title}%'),
-                TransferHistory.src.like(f'%{title}%'),
-                TransferHistory.dest.like(f'%{title}%'),
-            )).order_by(
-                TransferHistory.date.desc()
-            ).offset((page - 1) * count).limit(count).all()
+        result = db.query(TransferHistory).filter(
+            *TransferHistory.__filters(db, title=title, status=status)
+        ).order_by(
+            TransferHistory.id.desc()
+        ).offset((page - 1) * count).limit(count).all()
         return list(result)
 
     @staticmethod
     @db_query
     def list_by_page(db: Session, page: int = 1, count: int = 30, status: bool = None):
-        if status is not None:
-            result = db.query(TransferHistory).filter(
-                TransferHistory.status == status
-            ).order_by(
-                TransferHistory.date.desc()
-            ).offset((page - 1) * count).limit(count).all()
-        else:
-            result = db.query(TransferHistory).order_by(
-                TransferHistory.date.desc()
-            ).offset((page - 1) * count).limit(count).all()
+        result = db.query(TransferHistory).filter(
+            *TransferHistory.__filters(db, status=status)
+        ).order_by(
+            TransferHistory.id.desc()
+        ).offset((page - 1) * count).limit(count).all()
         return list(result)
 
+    @staticmethod
+    @db_query
+    def list_with_total(db: Session, title: str = None, status: bool = None, cursor: int = None,
+                        page: int = 1, count: int = 30) -> Tuple[List["TransferHistory"], int]:
+        """
+        分页查询转移历史并同时返回总数，一次查询完成
+        :param title: 搜索关键字，匹配标题、源目录、目标目录、季集
+        :param status: 转移状态
+        :param cursor: 上一页最后一条记录的id，传入时按id向后翻页，不再使用OFFSET
+        :param page: 页码，未传入cursor时使用
+        :param count: 每页数量
+        :return: 记录列表、总数
+        """
+        filters = TransferHistory.__filters(db, title=title, status=status)
+        # 总数作为不相关子查询只计算一次，不受翻页条件影响
+        total = db.query(func.count(TransferHistory.id)).filter(*filters).scalar_subquery()
+        query = db.query(TransferHistory, total).filter(*filters).order_by(TransferHistory.id.desc())
+        if cursor:
+            query = query.filter(TransferHistory.id < cursor).limit(count)
+        else:
+            query = query.offset((max(page, 1) - 1) * count).limit(count)
+        result = query.all()
+        if not result:
+            if not cursor and page <= 1:
+                return [], 0
+            # 超出最后一页时单独统计总数
+            return [], db.query(func.count(TransferHistory.id)).filter(*filters).first()[0]
+        return [history for history, _ in result], result[0][1]
+
     @staticmethod
     @db_query
     def get_by_hash(db: Session, download_hash: str):
@@ -125,14 +169,9 @@ class TransferHistory(Base):
     @staticmethod
     @db_query
     def count_by_title(db: Session, title: str, status: bool = None):
-        if status is not None:
-            return db.query(func.count(TransferHistory.id)).filter(TransferHistory.status == status).first()[0]
-        else:
-            return db.query(func.count(TransferHistory.id)).filter(or_(
-                TransferHistory.title.like(f'%{title}%'),
-                TransferHistory.src.like(f'%{title}%'),
-                TransferHistory.dest.like(f'%{title}%')
-            )).first()[0]
+        return db.query(func.count(TransferHistory.id)).filter(
+            *TransferHistory.__filters(db, title=title, status=status)
+        ).first()[0]
 
     @staticmethod
     @db_query
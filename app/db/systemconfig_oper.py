@@ -11,6 +11,8 @@ from app.utils.singleton import Singleton
 class SystemConfigOper(DbOper, metaclass=Singleton):
     # 配置对象
     __SYSTEMCONF: dict = {}
+    # 配置版本号，每次变更时递增，用于缓存失效判断
+    __VERSIONS: dict = {}
 
     def __init__(self):
         """
@@ -31,6 +33,7 @@ class SystemConfigOper(DbOper, metaclass=Singleton):
             key = key.value
         # 更新内存
         self.__SYSTEMCONF[key] = value
+        self.__VERSIONS[key] = self.__VERSIONS.get(key, 0) + 1
         # 写入数据库
         if ObjectUtils.is_obj(value):
             value = json.dumps(value)
@@ -56,6 +59,14 @@ class SystemConfigOper(DbOper, metaclass=Singleton):
             return self.__SYSTEMCONF
         return self.__SYSTEMCONF.get(key)
 
+    def version(self, key: Union[str, SystemConfigKey]) -> int:
+        """
+        获取系统设置的版本号，设置变更后版本号递增
+        """
+        if isinstance(key, SystemConfigKey):
+            key = key.value
+        return self.__VERSIONS.get(key, 0)
+
     def all(self):
         """
         获取所有系统设置
@@ -70,6 +81,7 @@ class SystemConfigOper(DbOper, metaclass=Singleton):
             key = key.value
         # 更新内存
         self.__SYSTEMCONF.pop(key, None)
+        self.__VERSIONS[key] = self.__VERSIONS.get(key, 0) + 1
         # 写入数据库
         conf = SystemConfig.get_by_key(self._db, key)
         if conf:
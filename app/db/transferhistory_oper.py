@@ -1,7 +1,7 @@
 import json
 import time
 from pathlib import Path
-from typing import Any, List
+from typing import Any, List, Tuple
 
 from app.core.context import MediaInfo
 from app.core.meta import MetaBase
@@ -29,6 +29,14 @@ class TransferHistoryOper(DbOper):
         """
         return TransferHistory.list_by_title(self._db, title)
 
+    def list_with_total(self, title: str = None, status: bool = None, cursor: int = None,
+                        page: int = 1, count: int = 30) -> Tuple[List[TransferHistory], int]:
+        """
+        分页搜索转移记录并返回总数
+        """
+        return TransferHistory.list_with_total(self._db, title=title, status=status, cursor=cursor,
+                                               page=page, count=count)
+
     def get_by_src(self, src: str) -> TransferHistory:
         """
         按源查询转移记录
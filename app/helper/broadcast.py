@@ -0,0 +1,141 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Any, AsyncGenerator, Dict, List, Optional, Set, Tuple
+
+from app.utils.singleton import Singleton
+
+
+class Subscriber:
+    """
+    广播订阅者，在订阅所在的事件循环中接收消息
+    """
+
+    # 每个订阅者最多缓存的消息数，超出时丢弃最早的消息
+    _maxlen = 100
+
+    def __init__(self, topic: str, loop: asyncio.AbstractEventLoop):
+        self.topic = topic
+        self.loop = loop
+        self.event = asyncio.Event()
+        self.messages = deque(maxlen=self._maxlen)
+
+
+class BroadcastHub(metaclass=Singleton):
+    """
+    异步广播中心，任意线程发布，SSE等异步订阅者在事件循环中等待更新
+    每次发布对每个事件循环只调度一次回调，发布线程的开销与订阅者数量无关
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 主题 -> 订阅者
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        # 合并型主题的最新内容
+        self._latest: Dict[str, Any] = {}
+        # 已调度待执行的合并型通知，(事件循环, 主题)
+        self._pending: Set[Tuple[asyncio.AbstractEventLoop, str]] = set()
+
+    def has_subscribers(self, topic: str) -> bool:
+        """
+        主题是否有订阅者
+        """
+        with self._lock:
+            return bool(self._subscribers.get(topic))
+
+    def latest(self, topic: str) -> Any:
+        """
+        获取合并型主题的最新内容
+        """
+        with self._lock:
+            return self._latest.get(topic)
+
+    def publish(self, topic: str, data: Any, coalesce: bool = False) -> int:
+        """
+        发布消息
+        :param topic: 主题
+        :param data: 消息内容
+        :param coalesce: 是否合并，合并型主题只保留最新内容，订阅者处理不及时时跳过中间状态
+        :return: 订阅者数量
+        """
+        with self._lock:
+            if coalesce:
+                self._latest[topic] = data
+            subscribers = list(self._subscribers.get(topic) or [])
+            if not subscribers:
+                return 0
+            loops = {subscriber.loop for subscriber in subscribers}
+            if coalesce:
+                # 已调度但尚未执行的通知无需重复调度
+                loops = {loop for loop in loops if (loop, topic) not in self._pending}
+                self._pending.update((loop, topic) for loop in loops)
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self.__dispatch, loop, topic, None if coalesce else data, coalesce)
+            except RuntimeError:
+                # 事件循环已关闭
+                with self._lock:
+                    self._pending.discard((loop, topic))
+        return len(subscribers)
+
+    def __dispatch(self, loop: asyncio.AbstractEventLoop, topic: str, data: Any, coalesce: bool):
+        """
+        在事件循环中唤醒该循环上的订阅者
+        """
+        with self._lock:
+            if coalesce:
+                self._pending.discard((loop, topic))
+            subscribers = [subscriber for subscriber in self._subscribers.get(topic) or []
+                           if subscriber.loop is loop]
+        for subscriber in subscribers:
+            if not coalesce:
+                subscriber.messages.append(data)
+            subscriber.event.set()
+
+    def register(self, topic: str) -> Subscriber:
+        """
+        在当前事件循环中注册订阅者，需要先注册再读取历史消息时使用
+        """
+        subscriber = Subscriber(topic, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(topic, set()).add(subscriber)
+        return subscriber
+
+    async def subscribe(self, topic: str, coalesce: bool = False, heartbeat: float = 15,
+                        subscriber: Subscriber = None) -> AsyncGenerator[Optional[List[Any]], None]:
+        """
+        订阅主题，有更新时返回新消息列表（合并型主题返回只含最新内容的列表），超过心跳时间无更新时返回None
+        :param topic: 主题
+        :param coalesce: 是否合并型主题
+        :param heartbeat: 心跳间隔（秒）
+        :param subscriber: 已注册的订阅者，为空时自动注册
+        """
+        if not subscriber:
+            subscriber = self.register(topic)
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.event.wait(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                subscriber.event.clear()
+                if coalesce:
+                    yield [self.latest(topic)]
+                else:
+                    messages = list(subscriber.messages)
+                    subscriber.messages.clear()
+                    yield messages
+        finally:
+            self.unregister(subscriber)
+
+    def unregister(self, subscriber: Subscriber):
+        """
+        取消订阅
+        """
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.topic)
+            if subscribers:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(subscriber.topic, None)
@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+from app.core.config import settings
+from app.core.metainfo import MetaInfo
+from app.db.systemconfig_oper import SystemConfigOper
+from app.schemas.types import SystemConfigKey
+from app.utils.singleton import Singleton
+from app.utils.system import SystemUtils
+
+
+class FileIndexHelper(metaclass=Singleton):
+    """
+    媒体库文件索引，按目录缓存扫描结果，目录修改时间未变化时不再重新扫描
+    同时缓存文件名识别出的季集信息
+    """
+
+    # 修改时间在此秒数内的目录不使用缓存，避免文件系统时间精度不足时漏掉变化
+    _settle_seconds = 2
+
+    def __init__(self):
+        self.systemconfig = SystemConfigOper()
+        self._lock = threading.Lock()
+        # 目录 -> (修改时间, {文件名: 大小}, [子目录名])
+        self._dirs = LRUCache(maxsize=settings.CACHE_CONF.get('fileindex'))
+        # 文件 -> (季, 集)
+        self._episodes = LRUCache(maxsize=settings.CACHE_CONF.get('fileindex'))
+
+    def __list_dir(self, path: str) -> Optional[Tuple[Dict[str, int], List[str]]]:
+        """
+        获取目录下的文件和子目录，优先使用缓存
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._dirs.get(path)
+        if cached and cached[0] == stat.st_mtime_ns \
+                and time.time() - stat.st_mtime > self._settle_seconds:
+            return cached[1], cached[2]
+        files: Dict[str, int] = {}
+        dirs: List[str] = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir() and not entry.is_symlink():
+                            dirs.append(entry.name)
+                        elif entry.is_file():
+                            files[entry.name] = entry.stat().st_size
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        with self._lock:
+            self._dirs[path] = (stat.st_mtime_ns, files, dirs)
+        return files, dirs
+
+    def list_files(self, directory: Path, extensions: list, min_filesize: int = 0) -> List[Path]:
+        """
+        获取目录下所有指定扩展名的文件（包括子目录），与SystemUtils.list_files结果一致
+        """
+        if not directory.exists():
+            return []
+        if directory.is_file():
+            return [directory]
+        min_size = (min_filesize or 0) * 1024 * 1024
+        ret = []
+        dirs = [str(directory)]
+        while dirs:
+            path = dirs.pop()
+            listing = self.__list_dir(path)
+            if not listing:
+                continue
+            files, subdirs = listing
+            for name, size in files.items():
+                if size >= min_size and SystemUtils.match_extensions(name, extensions):
+                    ret.append(Path(path) / name)
+            dirs.extend(os.path.join(path, name) for name in subdirs)
+        return ret
+
+    def exists_files(self, directory: Path, extensions: list, min_filesize: int = 0) -> bool:
+        """
+        判断目录下是否存在指定扩展名的文件
+        """
+        return True if self.list_files(directory, extensions, min_filesize) else False
+
+    def get_season_episode(self, file: Path) -> Tuple[int, Optional[int]]:
+        """
+        获取文件名识别出的季和开始集
+        """
+        # 自定义识别词变化后重新识别
+        key = (str(file), self.systemconfig.version(SystemConfigKey.CustomIdentifiers))
+        with self._lock:
+            cached = self._episodes.get(key)
+        if cached:
+            return cached
+        file_meta = MetaInfo(file.stem)
+        cached = (file_meta.begin_season or 1, file_meta.begin_episode)
+        with self._lock:
+            self._episodes[key] = cached
+        return cached
+
+    def clear(self):
+        """
+        清空索引
+        """
+        with self._lock:
+            self._dirs.clear()
+            self._episodes.clear()
@@ -0,0 +1,304 @@
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PIL import Image
+from requests import RequestException, Response
+
+from app.core.config import settings
+from app.log import logger
+from app.utils.common import retry
+from app.utils.http import RequestUtils
+from app.utils.singleton import Singleton
+
+
+class ImageCacheHelper(metaclass=Singleton):
+    """
+    图片本地缓存，按URL摘要存储，重复刮削、多个媒体库副本及图片代理复用已下载的图片
+    超出空间限制时按最近访问时间淘汰，过期后向源站验证图片是否变化
+    """
+
+    # 并发下载数
+    _workers = 5
+    # 重新验证间隔（秒）
+    _revalidate_seconds = 7 * 24 * 3600
+    # 缩略图宽度范围及步长
+    _min_width = 100
+    _max_width = 2000
+    _width_step = 100
+
+    def __init__(self):
+        self._cache_path: Path = settings.TEMP_PATH / "images"
+        self._lock = threading.Lock()
+        # 正在下载的URL，避免同一图片被重复下载
+        self._url_locks: Dict[str, threading.Lock] = {}
+        # 使用中的URL锁引用数，最后一个请求结束时才移除锁
+        self._url_refs: Dict[str, int] = {}
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="ImageCache")
+        # 缓存占用空间，为空时在下次写入后重新统计
+        self._total_size: Optional[int] = None
+
+    def get_cache_file(self, url: str, width: int = None) -> Path:
+        """
+        获取URL对应的缓存文件路径
+        """
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        name = f"{key}_w{width}" if width else key
+        return self._cache_path / key[:2] / (name + Path(url.split("?")[0]).suffix)
+
+    @staticmethod
+    def __get_meta_file(cache_file: Path) -> Path:
+        """
+        缓存文件的元数据文件
+        """
+        return cache_file.with_name(cache_file.stem + ".meta")
+
+    def get_meta(self, cache_file: Path) -> dict:
+        """
+        读取缓存文件的元数据：content_type、etag、last_modified、fetched
+        """
+        try:
+            return json.loads(self.__get_meta_file(cache_file).read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def get_content_type(self, cache_file: Path) -> str:
+        """
+        获取缓存图片的内容类型，缩略图与原图格式一致
+        """
+        original = cache_file.with_name(cache_file.stem.split("_w")[0] + cache_file.suffix)
+        content_type = self.get_meta(original).get("content_type")
+        if content_type and content_type.startswith("image/"):
+            return content_type
+        return mimetypes.guess_type(cache_file.name)[0] or "image/jpeg"
+
+    @staticmethod
+    def __touch(path: Path):
+        """
+        更新访问时间用于淘汰，修改时间保持不变用于ETag
+        """
+        try:
+            os.utime(path, (time.time(), path.stat().st_mtime))
+        except OSError:
+            pass
+
+    @retry(RequestException, logger=logger)
+    def __download(self, url: str, proxy: bool = True, headers: dict = None) -> Optional[Response]:
+        """
+        下载图片
+        """
+        return RequestUtils(headers={"User-Agent": settings.USER_AGENT, **(headers or {})},
+                            proxies=settings.PROXY if proxy else None).get_res(url=url, raise_exception=True)
+
+    def __write(self, path: Path, content: bytes):
+        """
+        写入缓存文件并统计占用空间
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            old_size = path.stat().st_size
+        except OSError:
+            old_size = 0
+        # 每次写入使用独立的临时文件，完成后原子替换
+        fd, tmp_file = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_file, path)
+        except OSError:
+            Path(tmp_file).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            if self._total_size is not None:
+                self._total_size += len(content) - old_size
+
+    def __fetch(self, url: str, cache_file: Path, proxy: bool) -> Optional[Path]:
+        """
+        下载原图，已缓存但超过验证间隔时向源站确认是否变化
+        """
+        meta = self.get_meta(cache_file) if cache_file.exists() else {}
+        if meta and time.time() - meta.get("fetched", 0) < self._revalidate_seconds:
+            self.__touch(cache_file)
+            return cache_file
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        if not meta:
+            logger.info(f"正在下载图片：{url} ...")
+        try:
+            response = self.__download(url, proxy=proxy, headers=headers)
+        except RequestException as err:
+            logger.error(f"图片下载失败：{url} - {str(err)}")
+            response = None
+        if meta and response is not None and response.status_code == 304:
+            # 图片未变化
+            meta["fetched"] = time.time()
+            self.__get_meta_file(cache_file).write_text(json.dumps(meta))
+            self.__touch(cache_file)
+            return cache_file
+        if response is None or response.status_code != 200 or not response.content:
+            if meta:
+                # 源站不可用时继续使用旧图片
+                self.__touch(cache_file)
+                return cache_file
+            logger.info(f"图片下载失败，请检查网络连通性：{url}")
+            return None
+        self.__write(cache_file, response.content)
+        self.__get_meta_file(cache_file).write_text(json.dumps({
+            "url": url,
+            "content_type": response.headers.get("Content-Type"),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched": time.time()
+        }))
+        if meta:
+            # 图片已变化，删除旧的缩略图
+            for thumb in cache_file.parent.glob(f"{cache_file.stem}_w*"):
+                thumb.unlink(missing_ok=True)
+        self.__evict()
+        return cache_file
+
+    def __resize(self, cache_file: Path, width: int, thumb_file: Path) -> Path:
+        """
+        按宽度生成缩略图，原图不大于该宽度或无法处理时使用原图
+        """
+        if thumb_file.exists():
+            self.__touch(thumb_file)
+            return thumb_file
+        try:
+            with Image.open(cache_file) as image:
+                if image.width <= width:
+                    return cache_file
+                image_format = image.format or "JPEG"
+                thumb = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+                if image_format == "JPEG" and thumb.mode not in ("RGB", "L"):
+                    thumb = thumb.convert("RGB")
+                buffer = BytesIO()
+                thumb.save(buffer, format=image_format, quality=85)
+        except Exception as err:
+            logger.debug(f"生成缩略图失败：{cache_file} - {str(err)}")
+            return cache_file
+        self.__write(thumb_file, buffer.getvalue())
+        self.__evict()
+        return thumb_file
+
+    def get(self, url: str, proxy: bool = True, width: int = None) -> Optional[Path]:
+        """
+        获取图片缓存文件，未缓存或需要验证时下载，同一URL的并发请求只下载一次
+        :param url: 图片地址
+        :param proxy: 是否使用代理服务器
+        :param width: 缩略图宽度，为空时返回原图
+        :return: 缓存文件路径，下载失败时返回None
+        """
+        cache_file = self.get_cache_file(url)
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+            self._url_refs[url] = self._url_refs.get(url, 0) + 1
+        try:
+            with url_lock:
+                cache_file = self.__fetch(url, cache_file, proxy)
+                if not cache_file or not width:
+                    return cache_file
+                # 宽度按步长向上取整，避免生成过多尺寸
+                width = min(max(width, self._min_width), self._max_width)
+                width = -(-width // self._width_step) * self._width_step
+                return self.__resize(cache_file, width, self.get_cache_file(url, width))
+        finally:
+            with self._lock:
+                self._url_refs[url] -= 1
+                if not self._url_refs[url]:
+                    self._url_refs.pop(url)
+                    self._url_locks.pop(url)
+
+    def get_all(self, urls: List[str]) -> Dict[str, Optional[Path]]:
+        """
+        并发获取多个图片的缓存文件
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+        if len(urls) == 1:
+            return {urls[0]: self.get(urls[0])}
+        return dict(zip(urls, self._executor.map(self.get, urls)))
+
+    def __scan(self) -> List[os.DirEntry]:
+        """
+        扫描所有缓存图片
+        """
+        entries = []
+        if not self._cache_path.exists():
+            return entries
+        with os.scandir(self._cache_path) as sub_dirs:
+            for sub_dir in sub_dirs:
+                if not sub_dir.is_dir():
+                    continue
+                with os.scandir(sub_dir.path) as sub_entries:
+                    entries.extend(entry for entry in sub_entries
+                                   if entry.is_file() and not entry.name.endswith((".meta", ".part")))
+        return entries
+
+    def __remove(self, path: str):
+        """
+        删除缓存图片及其元数据
+        """
+        os.remove(path)
+        self.__get_meta_file(Path(path)).unlink(missing_ok=True)
+
+    def __evict(self):
+        """
+        占用空间超出限制时，按最近访问时间淘汰图片，直至低于限制的90%
+        """
+        limit = max(settings.IMAGE_CACHE_SIZE, 1) * 1024 * 1024
+        with self._lock:
+            if self._total_size is not None and self._total_size <= limit:
+                return
+        entries = []
+        for entry in self.__scan():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, entry.path))
+        total_size = sum(size for _, size, _ in entries)
+        if total_size > limit:
+            count = 0
+            for _, size, path in sorted(entries):
+                if total_size <= limit * 0.9:
+                    break
+                try:
+                    self.__remove(path)
+                except OSError:
+                    continue
+                total_size -= size
+                count += 1
+            logger.info(f"图片缓存超出 {settings.IMAGE_CACHE_SIZE}MB，已淘汰 {count} 个图片")
+        with self._lock:
+            self._total_size = total_size
+
+    def clean(self, days: int = 7):
+        """
+        清理超过指定天数未使用的缓存图片
+        """
+        expire_time = time.time() - days * 86400
+        count = 0
+        for entry in self.__scan():
+            try:
+                if entry.stat().st_atime < expire_time:
+                    self.__remove(entry.path)
+                    count += 1
+            except OSError:
+                continue
+        with self._lock:
+            self._total_size = None
+        if count:
+            logger.info(f"已清理 {count} 个过期的缓存图片")
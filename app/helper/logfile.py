@@ -0,0 +1,250 @@
+import asyncio
+import os
+import re
+import threading
+from pathlib import Path
+from typing import AsyncGenerator, Dict, List, Optional, Set, Tuple
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from app.core.config import settings, global_vars
+from app.utils.singleton import Singleton
+
+# 日志级别前缀
+LOG_LEVEL_PATTERN = re.compile(r"^【(DEBUG|INFO|WARNING|ERROR|CRITICAL)】")
+
+
+class LogFileMonitorHandler(FileSystemEventHandler):
+    """
+    日志文件变化时通知订阅者
+    """
+
+    def __init__(self, helper: "LogFileHelper"):
+        super().__init__()
+        self._helper = helper
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._helper.notify(event.src_path)
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._helper.notify(event.src_path)
+
+
+class LogFileHelper(metaclass=Singleton):
+    """
+    日志文件读取，从文件末尾倒序读取、分页搜索及实时跟踪
+    """
+
+    # 倒序读取的块大小
+    _block_size = 64 * 1024
+    # 轮转保留的备份数，与日志配置一致
+    _backup_count = 3
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._observer: Optional[Observer] = None
+        # 文件路径 -> 订阅者 (事件循环, 事件)
+        self._watchers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+
+    @staticmethod
+    def get_log_path(logfile: str) -> Optional[Path]:
+        """
+        获取日志文件路径，不允许访问日志目录以外的文件
+        """
+        log_root = settings.LOG_PATH.resolve()
+        log_path = (log_root / logfile).resolve()
+        if log_root not in log_path.parents:
+            return None
+        return log_path
+
+    def get_log_files(self, log_path: Path) -> List[Path]:
+        """
+        获取日志文件及其轮转备份，按从新到旧排列
+        """
+        files = [log_path]
+        for i in range(1, self._backup_count + 1):
+            files.append(log_path.with_name(f"{log_path.name}.{i}"))
+        return [file for file in files if file.exists()]
+
+    def read_backward(self, file: Path, end: int = None) -> Tuple[List[Tuple[int, str]], int]:
+        """
+        从指定位置向前读取一个数据块内的完整行
+        :param file: 文件路径
+        :param end: 结束位置，为空时从文件末尾开始
+        :return: [(行开始位置, 行内容)]（按从后到前排列）、已读取部分的开始位置
+        """
+        with open(file, 'rb') as f:
+            if end is None:
+                f.seek(0, os.SEEK_END)
+                end = f.tell()
+            start = end
+            data = b""
+            while start > 0:
+                start = max(0, start - self._block_size)
+                f.seek(start)
+                data = f.read(end - start)
+                # 找到一个完整行的开头才停止，末尾的换行符不算
+                if start == 0 or data.find(b"\n", 0, len(data) - 1) != -1:
+                    break
+        if start > 0:
+            # 丢弃第一个不完整的行
+            cut = data.find(b"\n", 0, len(data) - 1) + 1
+            start += cut
+            data = data[cut:]
+        lines = []
+        pos = start + len(data)
+        for line in reversed(data.split(b"\n")):
+            pos -= len(line) + 1
+            if line.strip():
+                lines.append((pos + 1, line.decode("utf-8", errors="replace")))
+        return lines, start
+
+    def tail(self, log_path: Path, length: int = 50) -> List[str]:
+        """
+        读取文件最后若干行，不读取整个文件
+        """
+        if not log_path.exists():
+            return []
+        lines = []
+        end = None
+        while len(lines) < length:
+            block, start = self.read_backward(log_path, end)
+            lines.extend(line for _, line in block)
+            if start <= 0:
+                break
+            end = start
+        return list(reversed(lines[:length]))
+
+    def search(self, log_path: Path, keyword: str = None, level: str = None,
+               cursor: str = None, limit: int = 100) -> Tuple[List[str], Optional[str]]:
+        """
+        从新到旧分页搜索日志，包括已轮转的备份文件
+        :param log_path: 日志文件路径
+        :param keyword: 关键字，支持正则表达式
+        :param level: 日志级别
+        :param cursor: 分页游标，格式为 备份序号:字节位置，为空时从最新的日志开始
+        :param limit: 每页行数
+        :return: 匹配的行（从新到旧）、下一页游标
+        """
+        try:
+            pattern = re.compile(keyword, re.IGNORECASE) if keyword else None
+        except re.error:
+            pattern = re.compile(re.escape(keyword), re.IGNORECASE)
+        level = level.upper() if level else None
+        files = self.get_log_files(log_path)
+        index, end = 0, None
+        if cursor:
+            try:
+                index, end = [int(v) for v in cursor.split(":", 1)]
+            except ValueError:
+                index, end = 0, None
+        results = []
+        while index < len(files):
+            if end is not None and end <= 0:
+                index, end = index + 1, None
+                continue
+            block, start = self.read_backward(files[index], end)
+            for pos, line in block:
+                if level:
+                    match = LOG_LEVEL_PATTERN.match(line)
+                    if not match or match.group(1) != level:
+                        continue
+                if pattern and not pattern.search(line):
+                    continue
+                results.append(line)
+                if len(results) >= limit:
+                    return results, f"{index}:{pos}"
+            end = start
+        return results, None
+
+    def notify(self, path: str):
+        """
+        文件变化时唤醒订阅者
+        """
+        with self._lock:
+            watchers = list(self._watchers.get(os.path.abspath(path)) or [])
+        for loop, event in watchers:
+            loop.call_soon_threadsafe(event.set)
+
+    def __start_observer(self):
+        """
+        启动日志目录监控
+        """
+        if self._observer:
+            return
+        settings.LOG_PATH.mkdir(parents=True, exist_ok=True)
+        self._observer = Observer()
+        self._observer.daemon = True
+        self._observer.schedule(LogFileMonitorHandler(self), str(settings.LOG_PATH.resolve()), recursive=True)
+        self._observer.start()
+
+    async def follow(self, log_path: Path) -> AsyncGenerator[str, None]:
+        """
+        实时跟踪日志新增行，文件变化时由监控唤醒，等待期间不占用工作线程，读取文件在线程池中执行
+        """
+        key = os.path.abspath(log_path)
+        watcher = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self.__start_observer()
+            self._watchers.setdefault(key, set()).add(watcher)
+        try:
+            position, _, _ = await asyncio.to_thread(self.__read_new, log_path, None)
+            remain = b""
+            while not global_vars.is_system_stopped():
+                try:
+                    await asyncio.wait_for(watcher[1].wait(), timeout=5)
+                except asyncio.TimeoutError:
+                    pass
+                watcher[1].clear()
+                position, data, rotated = await asyncio.to_thread(self.__read_new, log_path, position)
+                if rotated:
+                    remain = b""
+                if not data:
+                    continue
+                lines = (remain + data).split(b"\n")
+                remain = lines.pop()
+                for line in lines:
+                    yield line.decode("utf-8", errors="replace")
+        finally:
+            with self._lock:
+                watchers = self._watchers.get(key)
+                if watchers:
+                    watchers.discard(watcher)
+                    if not watchers:
+                        self._watchers.pop(key, None)
+
+    @staticmethod
+    def __read_new(log_path: Path, position: Optional[int]) -> Tuple[int, bytes, bool]:
+        """
+        读取日志文件从指定位置起新增的内容，文件轮转时从头读取
+        :param log_path: 日志文件
+        :param position: 已读取的位置，为空时只返回文件末尾位置
+        :return: 新的读取位置、新增内容、文件是否已轮转
+        """
+        if not log_path.exists():
+            return position or 0, b"", False
+        size = log_path.stat().st_size
+        if position is None:
+            return size, b"", False
+        rotated = size < position
+        if rotated:
+            position = 0
+        if size == position:
+            return position, b"", rotated
+        with open(log_path, 'rb') as f:
+            f.seek(position)
+            data = f.read(size - position)
+        return position + len(data), data, rotated
+
+    def stop(self):
+        """
+        停止日志目录监控
+        """
+        with self._lock:
+            observer, self._observer = self._observer, None
+        if observer:
+            observer.stop()
+            observer.join()
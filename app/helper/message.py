@@ -3,6 +3,7 @@ import queue
 import time
 from typing import Optional, Any, Union
 
+from app.helper.broadcast import BroadcastHub
 from app.utils.singleton import Singleton
 
 
@@ -15,6 +16,24 @@ class MessageHelper(metaclass=Singleton):
         self.sys_queue = queue.Queue()
         self.user_queue = queue.Queue()
 
+    @staticmethod
+    def get_topic(role: str = "system") -> str:
+        """
+        消息通道的广播主题
+        """
+        return "message:system" if role == "system" else "message:user"
+
+    def __put(self, role: str, message: str):
+        """
+        有订阅者时直接广播，否则放入队列等待取出
+        """
+        if BroadcastHub().publish(self.get_topic(role), message):
+            return
+        if role == "system":
+            self.sys_queue.put(message)
+        else:
+            self.user_queue.put(message)
+
     def put(self, message: Any, role: str = "plugin", title: str = None, note: Union[list, dict] = None):
         """
         存消息
@@ -28,7 +47,7 @@ class MessageHelper(metaclass=Singleton):
             if role == "plugin" and not title:
                 title = "插件通知"
             # 系统通知，默认
-            self.sys_queue.put(json.dumps({
+            self.__put("system", json.dumps({
                 "type": role,
                 "title": title,
                 "text": message,
@@ -38,7 +57,7 @@ class MessageHelper(metaclass=Singleton):
         else:
             if isinstance(message, str):
                 # 非系统的文本通知
-                self.user_queue.put(json.dumps({
+                self.__put("user", json.dumps({
                     "title": title,
                     "text": message,
                     "date": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()),
@@ -50,7 +69,7 @@ class MessageHelper(metaclass=Singleton):
                 content['title'] = title
                 content['date'] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
                 content['note'] = note
-                self.user_queue.put(json.dumps(content))
+                self.__put("user", json.dumps(content))
 
     def get(self, role: str = "system") -> Optional[str]:
         """
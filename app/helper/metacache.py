@@ -0,0 +1,188 @@
+import pickle
+import sqlite3
+import time
+import traceback
+from pathlib import Path
+from threading import RLock
+from typing import Any, Dict, Optional
+
+from cachetools import LRUCache
+
+from app.core.config import settings
+from app.log import logger
+from app.utils.singleton import Singleton
+
+CACHE_EXPIRE_TIMESTAMP_STR = "cache_expire_timestamp"
+
+
+class MetaCacheHelper(metaclass=Singleton):
+    """
+    识别元数据缓存存储，SQLite持久化 + 内存LRU前置缓存
+    缓存值为字典，其中id为媒体ID，cache_expire_timestamp为过期时间
+    未识别（id为空）的记录只保存在内存中，重启后允许重新识别
+    """
+
+    def __init__(self, name: str, legacy_file: str = None):
+        """
+        :param name: 缓存名称，对应数据库文件 __{name}_cache__.db
+        :param legacy_file: 旧版整体pickle缓存文件名，存在时导入后删除
+        """
+        self._lock = RLock()
+        self._db_path: Path = settings.TEMP_PATH / f"__{name}_cache__.db"
+        self._conn: Optional[sqlite3.Connection] = None
+        # 内存前置缓存
+        self._front = LRUCache(maxsize=settings.CACHE_CONF.get('metacache'))
+        # 只更新了过期时间、待写入的记录
+        self._dirty: Dict[str, dict] = {}
+        if legacy_file:
+            self.__migrate(settings.TEMP_PATH / legacy_file)
+
+    def __connect(self) -> sqlite3.Connection:
+        """
+        打开数据库连接并初始化表结构
+        """
+        if self._conn is None:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta ("
+                         "key TEXT PRIMARY KEY, "
+                         "mid TEXT, "
+                         "expire INTEGER, "
+                         "data BLOB NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_meta_mid ON meta (mid)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_meta_expire ON meta (expire)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def __row(key: str, info: dict) -> tuple:
+        """
+        组装数据库记录
+        """
+        return key, str(info.get("id")), info.get(CACHE_EXPIRE_TIMESTAMP_STR), \
+            pickle.dumps(info, pickle.HIGHEST_PROTOCOL)
+
+    def __migrate(self, path: Path):
+        """
+        导入旧版pickle缓存文件
+        """
+        if not path.exists():
+            return
+        try:
+            with open(path, 'rb') as f:
+                data: dict = pickle.load(f) or {}
+            with self._lock, self.__connect() as conn:
+                conn.executemany("INSERT OR REPLACE INTO meta (key, mid, expire, data) VALUES (?, ?, ?, ?)",
+                                 [self.__row(k, v) for k, v in data.items() if v and v.get("id")])
+            logger.info(f"已导入旧版缓存 {path.name}，共 {len(data)} 条")
+        except Exception as e:
+            logger.error(f'导入旧版缓存失败：{str(e)} - {traceback.format_exc()}')
+        path.unlink(missing_ok=True)
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        获取缓存记录，优先从内存读取
+        """
+        with self._lock:
+            info = self._front.get(key)
+            if info is not None:
+                return info
+            try:
+                row = self.__connect().execute("SELECT data FROM meta WHERE key = ?", (key,)).fetchone()
+            except Exception as e:
+                logger.error(f'读取缓存失败：{str(e)}')
+                return None
+            if not row:
+                return None
+            info = pickle.loads(row[0])
+            self._front[key] = info
+            return info
+
+    def set(self, key: str, info: dict) -> None:
+        """
+        新增或更新缓存记录，有媒体ID的记录立即写入数据库
+        """
+        with self._lock:
+            self._front[key] = info
+            self._dirty.pop(key, None)
+            if not info.get("id"):
+                return
+            try:
+                with self.__connect() as conn:
+                    conn.execute("INSERT OR REPLACE INTO meta (key, mid, expire, data) VALUES (?, ?, ?, ?)",
+                                 self.__row(key, info))
+            except Exception as e:
+                logger.error(f'写入缓存失败：{str(e)}')
+
+    def touch(self, key: str, info: dict) -> None:
+        """
+        标记记录已更新过期时间，在flush时批量写入
+        """
+        with self._lock:
+            self._front[key] = info
+            if info.get("id"):
+                self._dirty[key] = info
+
+    def delete(self, key: str) -> Optional[dict]:
+        """
+        删除缓存记录
+        :return: 被删除的缓存内容
+        """
+        with self._lock:
+            info = self.get(key)
+            self._front.pop(key, None)
+            self._dirty.pop(key, None)
+            try:
+                with self.__connect() as conn:
+                    conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+            except Exception as e:
+                logger.error(f'删除缓存失败：{str(e)}')
+            return info
+
+    def delete_by_id(self, mid: Any) -> None:
+        """
+        删除媒体ID对应的所有缓存记录
+        """
+        with self._lock:
+            for key in [k for k, v in self._front.items() if v.get("id") == mid]:
+                self._front.pop(key, None)
+            for key in [k for k, v in self._dirty.items() if v.get("id") == mid]:
+                self._dirty.pop(key, None)
+            try:
+                with self.__connect() as conn:
+                    conn.execute("DELETE FROM meta WHERE mid = ?", (str(mid),))
+            except Exception as e:
+                logger.error(f'删除缓存失败：{str(e)}')
+
+    def clear(self) -> None:
+        """
+        清空所有缓存
+        """
+        with self._lock:
+            self._front.clear()
+            self._dirty.clear()
+            try:
+                with self.__connect() as conn:
+                    conn.execute("DELETE FROM meta")
+            except Exception as e:
+                logger.error(f'清空缓存失败：{str(e)}')
+
+    def flush(self, expire: bool = True) -> None:
+        """
+        写入待更新的过期时间，同时清理已过期的记录
+        :param expire: 是否删除过期记录
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            try:
+                with self.__connect() as conn:
+                    if dirty:
+                        conn.executemany("INSERT OR REPLACE INTO meta (key, mid, expire, data) VALUES (?, ?, ?, ?)",
+                                         [self.__row(k, v) for k, v in dirty.items()])
+                    if expire:
+                        conn.execute("DELETE FROM meta WHERE expire < ?", (int(time.time()),))
+            except Exception as e:
+                logger.error(f'保存缓存失败：{str(e)}')
@@ -0,0 +1,283 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.log import logger
+from app.schemas import Notification
+from app.schemas.types import MessageChannel
+from app.utils.singleton import Singleton
+
+
+class TokenBucket:
+    """
+    令牌桶限速
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        # 每秒补充的令牌数
+        self.rate = rate
+        # 令牌桶容量，即允许的突发数量
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def wait_time(self) -> float:
+        """
+        获取令牌需要等待的时间，为0时表示已取得令牌
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class NotificationHelper(metaclass=Singleton):
+    """
+    消息发送队列，消息先写入发件箱，由各渠道的工作线程按平台频率限制异步发送，失败时退避重试
+    同一合并键的消息在合并时间内汇总为一条发送，避免批量整理、下载时刷屏
+    """
+
+    _db_file = "outbox.db"
+    # 各渠道的频率限制：(每秒发送数, 突发数)
+    _channel_limits = {
+        # 同一会话每秒1条
+        MessageChannel.Telegram: (1, 3),
+        # 企业微信应用消息每分钟30条
+        MessageChannel.Wechat: (0.5, 5),
+        # chat.postMessage每秒1条
+        MessageChannel.Slack: (1, 3),
+        MessageChannel.SynologyChat: (1, 3),
+        MessageChannel.VoceChat: (2, 5),
+        MessageChannel.WebPush: (5, 10),
+    }
+    # 配置名称与渠道的对应关系
+    _messagers = {
+        "wechat": MessageChannel.Wechat,
+        "telegram": MessageChannel.Telegram,
+        "slack": MessageChannel.Slack,
+        "synologychat": MessageChannel.SynologyChat,
+        "vocechat": MessageChannel.VoceChat,
+        "webpush": MessageChannel.WebPush,
+    }
+    # 合并等待时间（秒）
+    _coalesce_seconds = 30
+    # 单条汇总消息最多合并的消息数
+    _coalesce_limit = 50
+    # 汇总消息内容最多展示的行数
+    _digest_lines = 20
+    # 最大重试次数
+    _max_attempts = 5
+    # 重试退避基数及上限（秒）
+    _retry_seconds = 30
+    _retry_max_seconds = 1800
+
+    def __init__(self, db_path: Path = None):
+        self._db_path = db_path or settings.CONFIG_PATH / self._db_file
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._sender: Optional[Callable[[Notification], Optional[bool]]] = None
+        self._stop_event = threading.Event()
+        # 渠道 -> 工作线程
+        self._workers: Dict[MessageChannel, threading.Thread] = {}
+        # 渠道 -> 唤醒事件
+        self._events: Dict[MessageChannel, threading.Event] = {}
+        # 渠道 -> 令牌桶
+        self._buckets: Dict[MessageChannel, TokenBucket] = {
+            channel: TokenBucket(rate, capacity) for channel, (rate, capacity) in self._channel_limits.items()
+        }
+
+    def __connect(self) -> sqlite3.Connection:
+        """
+        打开数据库连接并初始化表结构
+        """
+        if self._conn is None:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS outbox ("
+                         "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                         "channel TEXT NOT NULL, "
+                         "coalesce_key TEXT, "
+                         "messages TEXT NOT NULL, "
+                         "attempts INTEGER NOT NULL DEFAULT 0, "
+                         "next_time REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_outbox_channel ON outbox (channel, next_time)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_channels(self, message: Notification) -> List[MessageChannel]:
+        """
+        获取消息需要发送的渠道，未指定渠道时发送到所有已启用的消息渠道
+        """
+        if message.channel:
+            return [message.channel] if message.channel in self._channel_limits else []
+        channels = []
+        for name in (settings.MESSAGER or "").split(","):
+            channel = self._messagers.get(name.strip().lower())
+            if channel and channel not in channels:
+                channels.append(channel)
+        return channels
+
+    def put(self, message: Notification, coalesce_key: str = None):
+        """
+        写入发件箱
+        :param message: 消息
+        :param coalesce_key: 合并键，相同合并键的消息在合并时间内汇总为一条
+        """
+        channels = self.get_channels(message)
+        if not channels:
+            return
+        data = message.to_dict()
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self.__connect()
+                with conn:
+                    for channel in channels:
+                        if coalesce_key:
+                            row = conn.execute(
+                                "SELECT id, messages FROM outbox WHERE channel = ? AND coalesce_key = ? "
+                                "AND attempts = 0 AND next_time > ? ORDER BY id DESC LIMIT 1",
+                                (channel.value, coalesce_key, now)).fetchone()
+                            if row:
+                                messages = json.loads(row[1])
+                                if len(messages) < self._coalesce_limit:
+                                    messages.append(data)
+                                    conn.execute("UPDATE outbox SET messages = ? WHERE id = ?",
+                                                 (json.dumps(messages, ensure_ascii=False), row[0]))
+                                    continue
+                        conn.execute(
+                            "INSERT INTO outbox (channel, coalesce_key, messages, next_time) VALUES (?, ?, ?, ?)",
+                            (channel.value, coalesce_key, json.dumps([data], ensure_ascii=False),
+                             now + self._coalesce_seconds if coalesce_key else now))
+            except Exception as err:
+                logger.error(f"消息写入发件箱失败：{str(err)}")
+                return
+        for channel in channels:
+            self.__wakeup(channel)
+
+    def __wakeup(self, channel: MessageChannel):
+        """
+        唤醒渠道工作线程，未启动时启动
+        """
+        with self._lock:
+            if not self._sender or self._stop_event.is_set():
+                return
+            event = self._events.setdefault(channel, threading.Event())
+            if channel not in self._workers:
+                worker = threading.Thread(target=self.__run, args=(channel, event), daemon=True,
+                                          name=f"Notification-{channel.name}")
+                self._workers[channel] = worker
+                worker.start()
+        event.set()
+
+    def start(self, sender: Callable[[Notification], Optional[bool]]):
+        """
+        启动发送，为发件箱中已有的消息启动工作线程
+        :param sender: 发送单个渠道消息的方法，返回False时表示发送失败
+        """
+        with self._lock:
+            self._sender = sender
+            self._stop_event.clear()
+            try:
+                rows = self.__connect().execute("SELECT DISTINCT channel FROM outbox").fetchall()
+            except Exception as err:
+                logger.error(f"读取发件箱失败：{str(err)}")
+                rows = []
+        for (channel,) in rows:
+            try:
+                self.__wakeup(MessageChannel(channel))
+            except ValueError:
+                continue
+
+    def stop(self):
+        """
+        停止发送，未发送的消息保留在发件箱中，下次启动时继续发送
+        """
+        self._stop_event.set()
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+            for event in self._events.values():
+                event.set()
+        for worker in workers:
+            worker.join(timeout=10)
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+
+    def __run(self, channel: MessageChannel, event: threading.Event):
+        """
+        渠道工作线程，按限速依次发送到期的消息
+        """
+        bucket = self._buckets[channel]
+        while not self._stop_event.is_set():
+            event.clear()
+            with self._lock:
+                try:
+                    row = self.__connect().execute(
+                        "SELECT id, messages, attempts, next_time FROM outbox WHERE channel = ? "
+                        "ORDER BY next_time, id LIMIT 1", (channel.value,)).fetchone()
+                except Exception as err:
+                    logger.error(f"读取发件箱失败：{str(err)}")
+                    row = None
+            if not row:
+                event.wait(60)
+                continue
+            rowid, messages, attempts, next_time = row
+            wait_time = next_time - time.time()
+            if wait_time <= 0:
+                with self._lock:
+                    wait_time = bucket.wait_time()
+            if wait_time > 0:
+                # 有新消息写入时重新检查
+                event.wait(wait_time)
+                continue
+            message = self.__digest([Notification(**data) for data in json.loads(messages)])
+            message.channel = channel
+            try:
+                state = self._sender(message)
+            except Exception as err:
+                logger.error(f"{channel.value} 消息发送出错：{str(err)}")
+                state = False
+            with self._lock:
+                try:
+                    conn = self.__connect()
+                    with conn:
+                        if state is not False:
+                            conn.execute("DELETE FROM outbox WHERE id = ?", (rowid,))
+                        elif attempts + 1 >= self._max_attempts:
+                            logger.error(f"{channel.value} 消息发送失败，已重试 {attempts} 次，放弃发送：{message.title}")
+                            conn.execute("DELETE FROM outbox WHERE id = ?", (rowid,))
+                        else:
+                            delay = min(self._retry_seconds * 2 ** attempts, self._retry_max_seconds)
+                            logger.warn(f"{channel.value} 消息发送失败，{delay} 秒后重试：{message.title}")
+                            conn.execute("UPDATE outbox SET attempts = ?, next_time = ? WHERE id = ?",
+                                         (attempts + 1, time.time() + delay, rowid))
+                except Exception as err:
+                    logger.error(f"更新发件箱失败：{str(err)}")
+                    event.wait(5)
+
+    def __digest(self, messages: List[Notification]) -> Notification:
+        """
+        将合并的多条消息汇总为一条，使用第一条消息的图片和链接，内容为各消息标题
+        """
+        if len(messages) == 1:
+            return messages[0]
+        first = messages[0]
+        lines = [message.title or message.text for message in messages[:self._digest_lines]]
+        if len(messages) > self._digest_lines:
+            lines.append("……")
+        return Notification(mtype=first.mtype, userid=first.userid, image=first.image, link=first.link,
+                            title=f"{first.title} 等{len(messages)}条消息",
+                            text="\n".join(lines))
@@ -1,6 +1,7 @@
 from enum import Enum
 from typing import Union, Dict
 
+from app.helper.broadcast import BroadcastHub
 from app.schemas.types import ProgressKey
 from app.utils.singleton import Singleton
 
@@ -14,6 +15,21 @@ class ProgressHelper(metaclass=Singleton):
     def init_config(self):
         pass
 
+    @staticmethod
+    def get_topic(key: Union[ProgressKey, str]) -> str:
+        """
+        进度变化通知的广播主题
+        """
+        if isinstance(key, Enum):
+            key = key.value
+        return f"progress:{key}"
+
+    def __publish(self, key: str):
+        """
+        通知进度变化
+        """
+        BroadcastHub().publish(self.get_topic(key), dict(self._process_detail[key]), coalesce=True)
+
     def __reset(self, key: Union[ProgressKey, str]):
         if isinstance(key, Enum):
             key = key.value
@@ -28,6 +44,7 @@ class ProgressHelper(metaclass=Singleton):
         if isinstance(key, Enum):
             key = key.value
         self._process_detail[key]['enable'] = True
+        self.__publish(key)
 
     def end(self, key: Union[ProgressKey, str]):
         if isinstance(key, Enum):
@@ -39,8 +56,9 @@ class ProgressHelper(metaclass=Singleton):
             "value": 100,
             "text": "正在处理..."
         }
+        self.__publish(key)
 
-    def update(self, key: Union[ProgressKey, str], value: float = None, text: str = None):
+    def update(self, key: Union[ProgressKey, str], value: float = None, text: str = None, data: dict = None):
         if isinstance(key, Enum):
             key = key.value
         if not self._process_detail.get(key, {}).get('enable'):
@@ -49,6 +67,9 @@ class ProgressHelper(metaclass=Singleton):
             self._process_detail[key]['value'] = value
         if text:
             self._process_detail[key]['text'] = text
+        if data:
+            self._process_detail[key]['data'] = data
+        self.__publish(key)
 
     def get(self, key: Union[ProgressKey, str]) -> dict:
         if isinstance(key, Enum):
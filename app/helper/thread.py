@@ -8,6 +8,7 @@ class ThreadHelper(metaclass=Singleton):
     线程池管理
     """
     def __init__(self, max_workers=50):
+        self.max_workers = max_workers
         self.pool = ThreadPoolExecutor(max_workers=max_workers)
 
     def submit(self, func, *args, **kwargs):
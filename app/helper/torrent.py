@@ -197,45 +197,37 @@ class TorrentHelper(metaclass=Singleton):
         if not torrent_list:
             return []
 
-        def get_sort_str(_context):
+        # 优先规则，每次排序只读取一次
+        priority = self.system_config.get(SystemConfigKey.TorrentsPriority)
+
+        def get_sort_key(_context) -> tuple:
             """
-            排序函数，值越大越优先
+            排序键，值越大越优先
             """
             _meta = _context.meta_info
             _torrent = _context.torrent_info
-            _media = _context.media_info
-            # 站点优先级
-            _site_order = 999 - (_torrent.site_order or 0)
             # 季数
-            _season_len = str(len(_meta.season_list)).rjust(2, '0')
-            # 集数
-            if not _meta.episode_list:
-                # 无集数的排最前面
-                _episode_len = "9999"
-            else:
-                # 集数越多的排越前面
-                _episode_len = str(len(_meta.episode_list)).rjust(4, '0')
-            # 优先规则
-            priority = self.system_config.get(SystemConfigKey.TorrentsPriority)
+            _season_len = len(_meta.season_list)
+            # 集数，无集数的排最前面，集数越多的排越前面
+            _episode_len = len(_meta.episode_list) if _meta.episode_list else 9999
             if priority != "site":
                 # 排序：标题、资源类型、做种、季集
-                return "%s%s%s%s" % (str(_media.title).ljust(100, ' '),
-                                     str(_torrent.pri_order).rjust(3, '0'),
-                                     str(_torrent.seeders).rjust(10, '0'),
-                                     "%s%s" % (_season_len, _episode_len))
-            else:
-                # 排序：标题、资源类型、站点、做种、季集
-                return "%s%s%s%s%s" % (str(_media.title).ljust(100, ' '),
-                                       str(_torrent.pri_order).rjust(3, '0'),
-                                       str(_site_order).rjust(3, '0'),
-                                       str(_torrent.seeders).rjust(10, '0'),
-                                       "%s%s" % (_season_len, _episode_len))
+                return (str(_context.media_info.title),
+                        _torrent.pri_order or 0,
+                        _torrent.seeders or 0,
+                        _season_len,
+                        _episode_len)
+            # 排序：标题、资源类型、站点、做种、季集
+            return (str(_context.media_info.title),
+                    _torrent.pri_order or 0,
+                    999 - (_torrent.site_order or 0),
+                    _torrent.seeders or 0,
+                    _season_len,
+                    _episode_len)
 
         # 匹配的资源中排序分组选最好的一个下载
         # 按站点顺序、资源匹配顺序、做种人数下载数逆序排序
-        torrent_list = sorted(torrent_list, key=lambda x: get_sort_str(x), reverse=True)
-
-        return torrent_list
+        return sorted(torrent_list, key=get_sort_key, reverse=True)
 
     def sort_group_torrents(self, torrent_list: List[Context]) -> List[Context]:
         """
@@ -244,24 +236,18 @@ class TorrentHelper(metaclass=Singleton):
         if not torrent_list:
             return []
 
-        # 排序
-        torrent_list = self.sort_torrents(torrent_list)
-
-        # 控重
+        # 排序后按真实名称控重，即只取每个名称的第一个
         result = []
-        _added = []
-        # 排序后重新加入数组，按真实名称控重，即只取每个名称的第一个
-        for context in torrent_list:
+        _added = set()
+        for context in self.sort_torrents(torrent_list):
             # 控重的主链是名称、年份、季、集
-            meta = context.meta_info
             media = context.media_info
             if media.type == MediaType.TV:
-                media_name = "%s%s" % (media.title_year,
-                                       meta.season_episode)
+                media_name = (media.title_year, context.meta_info.season_episode)
             else:
                 media_name = media.title_year
             if media_name not in _added:
-                _added.append(media_name)
+                _added.add(media_name)
                 result.append(context)
 
         return result
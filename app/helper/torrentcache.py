@@ -0,0 +1,156 @@
+import hashlib
+import pickle
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.context import Context
+from app.log import logger
+from app.utils.singleton import Singleton
+
+
+class TorrentCacheHelper(metaclass=Singleton):
+    """
+    站点种子缓存存储，按 缓存类型+站点域名 分区追加写入，替代整体pickle文件
+    """
+
+    _db_file = "__torrents_cache__.db"
+
+    def __init__(self, db_path: Path = None):
+        self._db_path = db_path or settings.TEMP_PATH / self._db_file
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # 已缓存种子的键集合，(stype, domain) -> {key}
+        self._keys: Dict[Tuple[str, str], Set[str]] = {}
+
+    @staticmethod
+    def get_key(title: str, description: str = None) -> str:
+        """
+        计算种子的去重键
+        """
+        return hashlib.md5(f"{title}{description}".encode("utf-8")).hexdigest()
+
+    def __connect(self) -> sqlite3.Connection:
+        """
+        打开数据库连接并初始化表结构
+        """
+        if self._conn is None:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS torrents ("
+                         "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                         "stype TEXT NOT NULL, "
+                         "domain TEXT NOT NULL, "
+                         "key TEXT NOT NULL, "
+                         "data BLOB NOT NULL)")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_torrents_key "
+                         "ON torrents (stype, domain, key)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def __get_keys(self, stype: str, domain: str) -> Set[str]:
+        """
+        获取某站点已缓存种子的键集合，首次访问时从数据库加载
+        """
+        keys = self._keys.get((stype, domain))
+        if keys is None:
+            rows = self.__connect().execute(
+                "SELECT key FROM torrents WHERE stype = ? AND domain = ?", (stype, domain))
+            keys = {row[0] for row in rows}
+            self._keys[(stype, domain)] = keys
+        return keys
+
+    def exists(self, stype: str, domain: str, key: str) -> bool:
+        """
+        判断种子是否已缓存
+        """
+        with self._lock:
+            try:
+                return key in self.__get_keys(stype, domain)
+            except Exception as err:
+                logger.error(f"读取种子缓存出错：{str(err)}")
+                return False
+
+    def add(self, stype: str, domain: str, contexts: List[Context], limit: int = None):
+        """
+        追加缓存种子，超过限制条数时淘汰该站点最早的种子
+        :param stype: 缓存类型，spider/rss
+        :param domain: 站点域名
+        :param contexts: 种子上下文列表
+        :param limit: 每个站点最多保留的条数
+        """
+        if not contexts:
+            return
+        with self._lock:
+            try:
+                conn = self.__connect()
+                keys = self.__get_keys(stype, domain)
+                rows = []
+                for context in contexts:
+                    key = self.get_key(context.torrent_info.title, context.torrent_info.description)
+                    if key in keys:
+                        continue
+                    keys.add(key)
+                    rows.append((stype, domain, key, pickle.dumps(context)))
+                with conn:
+                    conn.executemany("INSERT OR IGNORE INTO torrents (stype, domain, key, data) "
+                                     "VALUES (?, ?, ?, ?)", rows)
+                    if limit and len(keys) > limit:
+                        evicted = conn.execute(
+                            "SELECT seq, key FROM torrents WHERE stype = ? AND domain = ? "
+                            "ORDER BY seq DESC LIMIT -1 OFFSET ?", (stype, domain, limit)).fetchall()
+                        conn.executemany("DELETE FROM torrents WHERE seq = ?",
+                                         [(seq,) for seq, _ in evicted])
+                        keys.difference_update(key for _, key in evicted)
+            except Exception as err:
+                # 丢弃内存键集合，下次从数据库重新加载
+                self._keys.pop((stype, domain), None)
+                logger.error(f"保存种子缓存出错：{str(err)}")
+
+    def get(self, stype: str, domains: List[str] = None) -> Dict[str, List[Context]]:
+        """
+        读取缓存种子，按写入顺序排列
+        :param stype: 缓存类型，spider/rss
+        :param domains: 只读取指定站点，为空则读取全部
+        """
+        sql = "SELECT domain, data FROM torrents WHERE stype = ?"
+        params = [stype]
+        if domains:
+            sql += f" AND domain IN ({','.join('?' * len(domains))})"
+            params.extend(domains)
+        sql += " ORDER BY seq"
+        ret: Dict[str, List[Context]] = {}
+        with self._lock:
+            try:
+                rows = self.__connect().execute(sql, params).fetchall()
+            except Exception as err:
+                logger.error(f"读取种子缓存出错：{str(err)}")
+                return ret
+        for domain, data in rows:
+            try:
+                ret.setdefault(domain, []).append(pickle.loads(data))
+            except Exception as err:
+                logger.error(f"加载种子缓存 {domain} 出错：{str(err)}")
+        return ret
+
+    def clear(self, stype: str = None):
+        """
+        清空缓存
+        :param stype: 缓存类型，为空则清空全部
+        """
+        with self._lock:
+            try:
+                with self.__connect() as conn:
+                    if stype:
+                        conn.execute("DELETE FROM torrents WHERE stype = ?", (stype,))
+                        self._keys = {k: v for k, v in self._keys.items() if k[0] != stype}
+                    else:
+                        conn.execute("DELETE FROM torrents")
+                        self._keys = {}
+            except Exception as err:
+                logger.error(f"清理种子缓存出错：{str(err)}")
@@ -1,8 +1,14 @@
-import inspect
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import sys
+import threading
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from pathlib import Path
-from typing import Dict, Any
+from types import CodeType
+from typing import Dict, Any, List, Optional, Tuple
 
 import click
 
@@ -19,6 +25,15 @@ level_name_colors = {
     ),
 }
 
+# 日志方法对应的级别
+method_levels = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL
+}
+
 
 class CustomFormatter(logging.Formatter):
     """
@@ -31,17 +46,132 @@ class CustomFormatter(logging.Formatter):
         return super().format(record)
 
 
+class JsonFormatter(logging.Formatter):
+    """
+    JSON行格式日志
+    """
+
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "caller": getattr(record, "caller", None),
+            "plugin": getattr(record, "plugin", None),
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class DispatchHandler(logging.Handler):
+    """
+    后台写日志线程使用的分发器，按logger名称写入对应的文件
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._handlers: Dict[str, List[logging.Handler]] = {}
+
+    def register(self, name: str, handlers: List[logging.Handler]):
+        """
+        注册logger对应的输出，与写日志线程互斥，旧的输出写完当前记录后才关闭
+        """
+        with self.lock:
+            old_handlers = self._handlers.get(name) or []
+            self._handlers[name] = handlers
+            for handler in old_handlers:
+                handler.close()
+
+    def handle(self, record):
+        with self.lock:
+            for handler in self._handlers.get(record.name) or []:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+        return True
+
+    def flush(self):
+        with self.lock:
+            for handlers in self._handlers.values():
+                for handler in handlers:
+                    try:
+                        handler.flush()
+                    except (OSError, ValueError):
+                        # 退出时终端输出流可能已关闭
+                        pass
+
+
 class LoggerManager:
     """
-    日志管理
+    日志管理，日志记录放入队列后由后台线程统一写入终端和文件
     """
     # 管理所有的Logger
     _loggers: Dict[str, Any] = {}
     # 默认日志文件
     _default_log_file = "moviepilot.log"
+    # 代码对象 -> 调用者信息
+    _code_cache: Dict[CodeType, Tuple[Optional[str], Optional[str], bool]] = {}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = queue.SimpleQueue()
+        self._dispatcher = DispatchHandler()
+        self.__start_listener()
+        atexit.register(self.stop)
+        if hasattr(os, "register_at_fork"):
+            # 子进程中重新启动写日志线程
+            os.register_at_fork(after_in_child=self.__start_listener)
+
+    def __start_listener(self):
+        """
+        启动后台写日志线程
+        """
+        self._listener = QueueListener(self._queue, self._dispatcher)
+        self._listener.start()
+
+    def stop(self):
+        """
+        停止后台写日志线程，写完队列中剩余的日志
+        """
+        if self._listener._thread is not None:
+            self._listener.stop()
+            self._dispatcher.flush()
+
+    @classmethod
+    def __get_code_info(cls, code: CodeType) -> Tuple[Optional[str], Optional[str], bool]:
+        """
+        解析代码对象所在文件，按代码对象缓存
+        :return: 文件名称、插件名称、是否停止向上查找
+        """
+        info = cls._code_cache.get(code)
+        if info:
+            return info
+        parts = Path(code.co_filename).parts
+        if parts[-1] == "__init__.py":
+            file_name = parts[-2] if len(parts) > 1 else parts[-1]
+        else:
+            file_name = parts[-1]
+        plugin_name = None
+        stop = False
+        if "app" in parts:
+            if "plugins" in parts:
+                # 插件名称
+                plugin_name = parts[parts.index("plugins") + 1]
+                if plugin_name == "__init__.py":
+                    plugin_name = "plugin"
+                stop = True
+            elif "main.py" in parts:
+                # 已经到达程序的入口
+                stop = True
+        elif len(parts) != 1:
+            # 已经超出程序范围
+            stop = True
+        info = (file_name, plugin_name, stop)
+        cls._code_cache[code] = info
+        return info
 
-    @staticmethod
-    def __get_caller():
+    @classmethod
+    def __get_caller(cls):
         """
         获取调用者的文件名称与插件名称(如果是插件调用内置的模块, 也能写入到插件日志文件中)
         """
@@ -49,32 +179,22 @@ class LoggerManager:
         caller_name = None
         # 调用者插件名称
         plugin_name = None
-        for i in inspect.stack()[3:]:
-            filepath = Path(i.filename)
-            parts = filepath.parts
+        try:
+            frame = sys._getframe(3)
+        except ValueError:
+            frame = None
+        while frame:
+            file_name, frame_plugin, stop = cls.__get_code_info(frame.f_code)
             if not caller_name:
                 # 设定调用者文件名称
-                if parts[-1] == "__init__.py":
-                    caller_name = parts[-2]
-                else:
-                    caller_name = parts[-1]
-            if "app" in parts:
-                if not plugin_name and "plugins" in parts:
-                    # 设定调用者插件名称
-                    plugin_name = parts[parts.index("plugins") + 1]
-                    if plugin_name == "__init__.py":
-                        plugin_name = "plugin"
-                    break
-                if "main.py" in parts:
-                    # 已经到达程序的入口
-                    break
-            elif len(parts) != 1:
-                # 已经超出程序范围
+                caller_name = file_name
+            if stop:
+                plugin_name = frame_plugin
                 break
+            frame = frame.f_back
         return caller_name or "log.py", plugin_name
 
-    @staticmethod
-    def __setup_logger(log_file: str):
+    def __setup_logger(self, log_file: str):
         """
         设置日志
         log_file：日志文件相对路径
@@ -85,6 +205,7 @@ class LoggerManager:
 
         # 创建新实例
         _logger = logging.getLogger(log_file_path.stem)
+        _logger.propagate = False
 
         # DEBUG
         if settings.DEBUG:
@@ -93,14 +214,14 @@ class LoggerManager:
             _logger.setLevel(logging.INFO)
 
         # 移除已有的 handler，避免重复添加
-        for handler in _logger.handlers:
+        for handler in list(_logger.handlers):
             _logger.removeHandler(handler)
 
         # 终端日志
         console_handler = logging.StreamHandler()
-        console_formatter = CustomFormatter(f"%(leveltext)s%(message)s")
+        console_formatter = CustomFormatter(f"%(leveltext)s%(caller)s - %(message)s")
         console_handler.setFormatter(console_formatter)
-        _logger.addHandler(console_handler)
+        handlers = [console_handler]
 
         # 文件日志
         file_handler = RotatingFileHandler(filename=log_file_path,
@@ -108,9 +229,23 @@ class LoggerManager:
                                            maxBytes=5 * 1024 * 1024,
                                            backupCount=3,
                                            encoding='utf-8')
-        file_formater = CustomFormatter(f"【%(levelname)s】%(asctime)s - %(message)s")
+        file_formater = CustomFormatter(f"【%(levelname)s】%(asctime)s - %(caller)s - %(message)s")
         file_handler.setFormatter(file_formater)
-        _logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+        # JSON行日志
+        if settings.LOG_JSON:
+            json_handler = RotatingFileHandler(filename=log_file_path.with_suffix(".jsonl"),
+                                               mode='w',
+                                               maxBytes=5 * 1024 * 1024,
+                                               backupCount=3,
+                                               encoding='utf-8')
+            json_handler.setFormatter(JsonFormatter())
+            handlers.append(json_handler)
+
+        # 日志记录只放入队列，由后台线程写入
+        self._dispatcher.register(_logger.name, handlers)
+        _logger.addHandler(QueueHandler(self._queue))
 
         return _logger
 
@@ -120,6 +255,10 @@ class LoggerManager:
         :param method: 日志方法
         :param msg: 日志信息
         """
+        # 未开启的日志级别直接跳过，不再查找调用者
+        level = method_levels.get(method, logging.INFO)
+        if level < (logging.DEBUG if settings.DEBUG else logging.INFO):
+            return
 
         # 获取调用者文件名和插件名
         caller_name, plugin_name = self.__get_caller()
@@ -134,12 +273,15 @@ class LoggerManager:
         # 获取调用者的模块的logger
         _logger = self._loggers.get(logfile)
         if not _logger:
-            _logger = self.__setup_logger(logfile)
-            self._loggers[logfile] = _logger
-        # 调用logger的方法打印日志
-        if hasattr(_logger, method):
-            method = getattr(_logger, method)
-            method(f"{caller_name} - {msg}", *args, **kwargs)
+            with self._lock:
+                _logger = self._loggers.get(logfile)
+                if not _logger:
+                    _logger = self.__setup_logger(logfile)
+                    self._loggers[logfile] = _logger
+        # 调用者信息放在记录的附加字段中，由写日志线程格式化
+        extra = kwargs.pop("extra", None) or {}
+        extra.update({"caller": caller_name, "plugin": plugin_name})
+        _logger.log(level, msg, *args, extra=extra, **kwargs)
 
     def info(self, msg: str, *args, **kwargs):
         """
@@ -33,11 +33,14 @@ from app.core.plugin import PluginManager
 from app.db.init import init_db, update_db, init_super_user
 from app.helper.thread import ThreadHelper
 from app.helper.display import DisplayHelper
+from app.helper.logfile import LogFileHelper
 from app.helper.resource import ResourceHelper
 from app.helper.message import MessageHelper
+from app.helper.notification import NotificationHelper
 from app.scheduler import Scheduler
 from app.command import Command, CommandChian
 from app.schemas import Notification, NotificationType
+from app.utils.http import SessionRegistry
 
 # App
 App = FastAPI(title=settings.PROJECT_NAME,
@@ -192,6 +195,8 @@ def shutdown_server():
     """
     服务关闭
     """
+    # 停止消息发送，未发送的消息下次启动时继续发送
+    NotificationHelper().stop()
     # 停止模块
     ModuleManager().stop()
     # 停止插件
@@ -205,6 +210,10 @@ def shutdown_server():
     Scheduler().stop()
     # 停止线程池
     ThreadHelper().shutdown()
+    # 关闭HTTP会话池
+    SessionRegistry().close()
+    # 停止日志文件监控
+    LogFileHelper().stop()
     # 停止前端服务
     stop_frontend()
 
@@ -232,6 +241,8 @@ def start_module():
     Scheduler()
     # 启动事件消费
     Command()
+    # 启动消息发送
+    NotificationHelper().start(sender=CommandChian().send_message)
     # 初始化路由
     init_routers()
     # 启动前端服务
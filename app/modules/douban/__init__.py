@@ -33,6 +33,7 @@ class DoubanModule(_ModuleBase):
         self.cache = DoubanCache()
 
     def stop(self):
+        self.cache.save()
         self.doubanapi.close()
 
     def test(self) -> Tuple[bool, str]:
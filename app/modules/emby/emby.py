@@ -588,7 +588,8 @@ class Emby:
                     tmdbid=int(tmdbid) if tmdbid else None,
                     imdbid=item.get("ProviderIds", {}).get("Imdb"),
                     tvdbid=item.get("ProviderIds", {}).get("Tvdb"),
-                    path=item.get("Path")
+                    path=item.get("Path"),
+                    lst_mod_date=item.get("DateLastMediaAdded")
                 )
         except Exception as e:
             logger.error(f"连接Items/Id出错：" + str(e))
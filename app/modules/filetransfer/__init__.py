@@ -1,6 +1,5 @@
 import re
 from pathlib import Path
-from threading import Lock
 from typing import Optional, List, Tuple, Union, Dict
 
 from jinja2 import Template
@@ -10,15 +9,15 @@ from app.core.context import MediaInfo
 from app.core.meta import MetaBase
 from app.core.metainfo import MetaInfo, MetaInfoPath
 from app.helper.directory import DirectoryHelper
+from app.helper.fileindex import FileIndexHelper
 from app.helper.message import MessageHelper
 from app.log import logger
 from app.modules import _ModuleBase
+from app.modules.filetransfer.executor import TransferExecutor
 from app.schemas import TransferInfo, ExistMediaInfo, TmdbEpisode, MediaDirectory
 from app.schemas.types import MediaType
 from app.utils.system import SystemUtils
 
-lock = Lock()
-
 
 class FileTransferModule(_ModuleBase):
     """
@@ -166,28 +165,9 @@ class FileTransferModule(_ModuleBase):
         :param target_file: 目标文件路径
         :param transfer_type: RmtMode转移方式
         """
-        with lock:
-
-            # 转移
-            if transfer_type == 'link':
-                # 硬链接
-                retcode, retmsg = SystemUtils.link(file_item, target_file)
-            elif transfer_type == 'softlink':
-                # 软链接
-                retcode, retmsg = SystemUtils.softlink(file_item, target_file)
-            elif transfer_type == 'move':
-                # 移动
-                retcode, retmsg = SystemUtils.move(file_item, target_file)
-            elif transfer_type == 'rclone_move':
-                # Rclone 移动
-                retcode, retmsg = SystemUtils.rclone_move(file_item, target_file)
-            elif transfer_type == 'rclone_copy':
-                # Rclone 复制
-                retcode, retmsg = SystemUtils.rclone_copy(file_item, target_file)
-            else:
-                # 复制
-                retcode, retmsg = SystemUtils.copy(file_item, target_file)
-
+        retcode, retmsg = TransferExecutor().execute(file_item=file_item,
+                                                     target_file=target_file,
+                                                     transfer_type=transfer_type)
         if retcode != 0:
             logger.error(retmsg)
 
@@ -761,7 +741,7 @@ class FileTransferModule(_ModuleBase):
                 continue
 
             # 检索媒体文件
-            media_files = SystemUtils.list_files(directory=media_path, extensions=settings.RMT_MEDIAEXT)
+            media_files = FileIndexHelper().list_files(directory=media_path, extensions=settings.RMT_MEDIAEXT)
             if not media_files:
                 continue
 
@@ -773,9 +753,7 @@ class FileTransferModule(_ModuleBase):
                 # 电视剧检索集数
                 seasons: Dict[int, list] = {}
                 for media_file in media_files:
-                    file_meta = MetaInfo(media_file.stem)
-                    season_index = file_meta.begin_season or 1
-                    episode_index = file_meta.begin_episode
+                    season_index, episode_index = FileIndexHelper().get_season_episode(media_file)
                     if not episode_index:
                         continue
                     if season_index not in seasons:
@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Tuple, Union
+
+from app.core.config import settings
+from app.helper.progress import ProgressHelper
+from app.log import logger
+from app.schemas.types import ProgressKey
+from app.utils.singleton import Singleton
+from app.utils.string import StringUtils
+from app.utils.system import SystemUtils
+
+
+class TransferExecutor(metaclass=Singleton):
+    """
+    文件转移执行器
+    链接及同盘移动只修改元数据，直接并行执行；跨盘复制/移动按目标磁盘分道，限制每个磁盘的并发数
+    同一目标文件的转移依次执行，避免并发整理时互相覆盖
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 目标磁盘 -> 并发信号量
+        self._lanes: Dict[Union[int, str], threading.BoundedSemaphore] = {}
+        # 目标文件 -> (锁, 使用数)
+        self._targets: Dict[str, Tuple[threading.Lock, int]] = {}
+        # 统计信息
+        self._waiting = 0
+        self._waiting_bytes = 0
+        self._running = 0
+        self._running_bytes = 0
+        self._done_bytes = 0
+        self._busy_time = 0.0
+
+    @staticmethod
+    def __get_device(path: Path) -> Union[int, str]:
+        """
+        获取路径所在磁盘，路径不存在时取最近的已存在上级目录
+        """
+        for parent in [path, *path.parents]:
+            if parent.exists():
+                if os.name == "nt":
+                    return parent.drive
+                return os.stat(parent).st_dev
+        return str(path.anchor)
+
+    def __get_lane(self, device: Union[int, str]) -> threading.BoundedSemaphore:
+        """
+        获取目标磁盘的并发信号量
+        """
+        with self._lock:
+            lane = self._lanes.get(device)
+            if not lane:
+                lane = threading.BoundedSemaphore(max(settings.TRANSFER_DEVICE_THREADS, 1))
+                self._lanes[device] = lane
+            return lane
+
+    def __acquire_target(self, target_file: Path) -> threading.Lock:
+        """
+        获取目标文件的锁，等待同一目标文件的其它转移完成
+        """
+        key = str(target_file)
+        with self._lock:
+            target_lock, count = self._targets.get(key) or (threading.Lock(), 0)
+            self._targets[key] = (target_lock, count + 1)
+        if count:
+            logger.info(f"{target_file} 正在被其它任务转移，等待完成 ...")
+        target_lock.acquire()
+        return target_lock
+
+    def __release_target(self, target_file: Path):
+        """
+        释放目标文件的锁，没有其它转移使用时移除
+        """
+        key = str(target_file)
+        with self._lock:
+            target_lock, count = self._targets[key]
+            if count > 1:
+                self._targets[key] = (target_lock, count - 1)
+            else:
+                self._targets.pop(key)
+        target_lock.release()
+
+    def __report(self, file_item: Path):
+        """
+        通过进度条报告队列、速率及预计剩余时间
+        """
+        with self._lock:
+            waiting, running = self._waiting, self._running
+            speed = self._done_bytes / self._busy_time if self._busy_time else 0
+            left_bytes = self._waiting_bytes + self._running_bytes
+        text = f"正在复制 {file_item.name}，排队 {waiting} 个，进行中 {running} 个"
+        if speed:
+            text += f"，速率 {StringUtils.str_filesize(speed)}/s，" \
+                    f"预计剩余 {StringUtils.str_secends(left_bytes / speed)}"
+        ProgressHelper().update(key=ProgressKey.FileTransfer, text=text)
+
+    def execute(self, file_item: Path, target_file: Path, transfer_type: str) -> Tuple[int, str]:
+        """
+        执行单个文件转移
+        :param file_item: 文件路径
+        :param target_file: 目标文件路径
+        :param transfer_type: RmtMode转移方式
+        """
+        self.__acquire_target(target_file)
+        try:
+            return self.__execute(file_item=file_item, target_file=target_file, transfer_type=transfer_type)
+        finally:
+            self.__release_target(target_file)
+
+    def __execute(self, file_item: Path, target_file: Path, transfer_type: str) -> Tuple[int, str]:
+        """
+        执行单个文件转移，链接及同盘移动直接执行，跨盘复制/移动按目标磁盘排队
+        """
+        if transfer_type == 'link':
+            return SystemUtils.link(file_item, target_file)
+        if transfer_type == 'softlink':
+            return SystemUtils.softlink(file_item, target_file)
+        if transfer_type == 'move' \
+                and self.__get_device(file_item) == self.__get_device(target_file.parent):
+            # 同盘移动
+            return SystemUtils.move(file_item, target_file)
+        # 跨盘数据复制，按目标磁盘排队
+        if transfer_type.startswith('rclone'):
+            device = 'rclone'
+        else:
+            device = self.__get_device(target_file.parent)
+        try:
+            size = file_item.stat().st_size
+        except OSError:
+            size = 0
+        with self._lock:
+            self._waiting += 1
+            self._waiting_bytes += size
+        lane = self.__get_lane(device)
+        if not lane.acquire(blocking=False):
+            logger.info(f"{file_item.name} 等待目标磁盘空闲 ...")
+            self.__report(file_item)
+            lane.acquire()
+        with self._lock:
+            self._waiting -= 1
+            self._waiting_bytes -= size
+            self._running += 1
+            self._running_bytes += size
+        self.__report(file_item)
+        start_time = time.perf_counter()
+        # 已计入统计的字节数、上次报告时间
+        reported = [0, start_time]
+
+        def copy_progress(copied: int, total: int):
+            """
+            单个文件的复制进度
+            """
+            with self._lock:
+                self._done_bytes += copied - reported[0]
+                self._running_bytes -= copied - reported[0]
+            reported[0] = copied
+            now = time.perf_counter()
+            if copied < total and now - reported[1] < 1:
+                return
+            reported[1] = now
+            speed = copied / (now - start_time) if now > start_time else 0
+            text = f"正在复制 {file_item.name}，{StringUtils.str_filesize(copied)}/{StringUtils.str_filesize(total)}"
+            if speed and copied < total:
+                text += f"，速率 {StringUtils.str_filesize(speed)}/s，" \
+                        f"预计剩余 {StringUtils.str_secends((total - copied) / speed)}"
+            ProgressHelper().update(key=ProgressKey.FileTransfer, text=text)
+
+        try:
+            if transfer_type == 'move':
+                return SystemUtils.move(file_item, target_file, callback=copy_progress)
+            elif transfer_type == 'rclone_move':
+                return SystemUtils.rclone_move(file_item, target_file)
+            elif transfer_type == 'rclone_copy':
+                return SystemUtils.rclone_copy(file_item, target_file)
+            return SystemUtils.copy(file_item, target_file, callback=copy_progress)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            with self._lock:
+                self._running -= 1
+                self._running_bytes -= size - reported[0]
+                self._done_bytes += size - reported[0]
+                self._busy_time += elapsed
+            lane.release()
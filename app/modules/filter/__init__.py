@@ -1,11 +1,16 @@
 import re
+import threading
 from typing import List, Tuple, Union, Dict, Optional
 
+from cachetools import LRUCache
+
 from app.core.context import TorrentInfo, MediaInfo
 from app.core.metainfo import MetaInfo
+from app.db.systemconfig_oper import SystemConfigOper
 from app.log import logger
 from app.modules import _ModuleBase
 from app.modules.filter.RuleParser import RuleParser
+from app.schemas.types import SystemConfigKey
 
 
 class FilterModule(_ModuleBase):
@@ -13,6 +18,22 @@ class FilterModule(_ModuleBase):
     parser: RuleParser = None
     # 媒体信息
     media: MediaInfo = None
+    # 系统配置
+    systemconfig: SystemConfigOper = None
+    # 预编译的规则集
+    _compiled_rules: Dict[str, dict] = {}
+    # 规则计划缓存，key为规则字符串，值为按优先级排列的已解析规则组
+    _plan_cache: LRUCache = None
+    # 规则计划缓存对应的规则配置版本
+    _plan_versions: tuple = ()
+    # 规则计划缓存锁
+    _plan_lock = threading.Lock()
+    # 影响规则计划缓存的配置项
+    _rule_keys = [
+        SystemConfigKey.SearchFilterRules,
+        SystemConfigKey.SubscribeFilterRules,
+        SystemConfigKey.BestVersionFilterRules
+    ]
 
     # 内置规则集
     rule_set: Dict[str, dict] = {
@@ -135,6 +156,10 @@ class FilterModule(_ModuleBase):
 
     def init_module(self) -> None:
         self.parser = RuleParser()
+        self.systemconfig = SystemConfigOper()
+        self._plan_cache = LRUCache(maxsize=128)
+        self._plan_versions = ()
+        self.__compile_rule_set()
 
     @staticmethod
     def get_name() -> str:
@@ -164,6 +189,8 @@ class FilterModule(_ModuleBase):
         if not rule_string:
             return torrent_list
         self.media = mediainfo
+        # 编译后的规则计划
+        plan = self.__get_plan(rule_string)
         # 返回种子列表
         ret_torrents = []
         for torrent in torrent_list:
@@ -172,13 +199,47 @@ class FilterModule(_ModuleBase):
                     and not self.__match_season_episodes(torrent, season_episodes):
                 continue
             # 能命中优先级的才返回
-            if not self.__get_order(torrent, rule_string):
+            if not self.__get_order(torrent, plan):
                 logger.debug(f"种子 {torrent.site_name} - {torrent.title} {torrent.description} 不匹配优先级规则")
                 continue
             ret_torrents.append(torrent)
 
         return ret_torrents
 
+    def __compile_rule_set(self):
+        """
+        预编译规则集，正则表达式统一编译为忽略大小写的Pattern
+        """
+        compiled_rules = {}
+        for rule_name, rule in self.rule_set.items():
+            try:
+                compiled_rules[rule_name] = {
+                    "include": [re.compile(r"%s" % include, re.IGNORECASE) for include in rule.get("include") or []],
+                    "exclude": [re.compile(r"%s" % exclude, re.IGNORECASE) for exclude in rule.get("exclude") or []],
+                    "match": rule.get("match") or [],
+                    "tmdb": rule.get("tmdb"),
+                    "downloadvolumefactor": rule.get("downloadvolumefactor")
+                }
+            except re.error as err:
+                logger.error(f"规则 {rule_name} 编译失败：{str(err)}")
+        self._compiled_rules = compiled_rules
+
+    def __get_plan(self, rule_string: str) -> List[Union[list, str]]:
+        """
+        获取规则字符串编译后的规则计划，按优先级从高到低排列，规则配置变化时缓存失效
+        """
+        versions = tuple(self.systemconfig.version(key) for key in self._rule_keys)
+        with self._plan_lock:
+            if versions != self._plan_versions:
+                self._plan_cache.clear()
+                self._plan_versions = versions
+            plan = self._plan_cache.get(rule_string)
+            if plan is None:
+                plan = [self.parser.parse(rule_group.strip()).as_list()[0]
+                        for rule_group in rule_string.split('>')]
+                self._plan_cache[rule_string] = plan
+        return plan
+
     @staticmethod
     def __match_season_episodes(torrent: TorrentInfo, season_episodes: Dict[int, list]):
         """
@@ -211,21 +272,21 @@ class FilterModule(_ModuleBase):
                 return False
         return True
 
-    def __get_order(self, torrent: TorrentInfo, rule_str: str) -> Optional[TorrentInfo]:
+    def __get_order(self, torrent: TorrentInfo, plan: List[Union[list, str]]) -> Optional[TorrentInfo]:
         """
         获取种子匹配的规则优先级，值越大越优先，未匹配时返回None
         """
-        # 多级规则
-        rule_groups = rule_str.split('>')
         # 优先级
         res_order = 100
         # 是否匹配
         matched = False
+        # 匹配项：标题、副标题、标签
+        content = f"{torrent.title} {torrent.description} {' '.join(torrent.labels or [])}"
+        # 当前种子的规则项匹配结果，同一规则项在多个规则组中只匹配一次
+        rule_results: Dict[str, bool] = {}
 
-        for rule_group in rule_groups:
-            # 解析规则组
-            parsed_group = self.parser.parse(rule_group.strip())
-            if self.__match_group(torrent, parsed_group.as_list()[0]):
+        for parsed_group in plan:
+            if self.__match_group(torrent, parsed_group, content, rule_results):
                 # 出现匹配时中断
                 matched = True
                 logger.debug(f"种子 {torrent.site_name} - {torrent.title} 优先级为 {100 - res_order + 1}")
@@ -236,43 +297,47 @@ class FilterModule(_ModuleBase):
 
         return None if not matched else torrent
 
-    def __match_group(self, torrent: TorrentInfo, rule_group: Union[list, str]) -> bool:
+    def __match_group(self, torrent: TorrentInfo, rule_group: Union[list, str],
+                      content: str, rule_results: Dict[str, bool]) -> bool:
         """
         判断种子是否匹配规则组
         """
         if not isinstance(rule_group, list):
             # 不是列表，说明是规则名称
-            return self.__match_rule(torrent, rule_group)
+            if rule_group not in rule_results:
+                rule_results[rule_group] = self.__match_rule(torrent, rule_group, content)
+            return rule_results[rule_group]
         elif isinstance(rule_group, list) and len(rule_group) == 1:
             # 只有一个规则项
-            return self.__match_group(torrent, rule_group[0])
+            return self.__match_group(torrent, rule_group[0], content, rule_results)
         elif rule_group[0] == "not":
             # 非操作
-            return not self.__match_group(torrent, rule_group[1:])
+            return not self.__match_group(torrent, rule_group[1:], content, rule_results)
         elif rule_group[1] == "and":
             # 与操作
-            return self.__match_group(torrent, rule_group[0]) and self.__match_group(torrent, rule_group[2:])
+            return self.__match_group(torrent, rule_group[0], content, rule_results) \
+                and self.__match_group(torrent, rule_group[2:], content, rule_results)
         elif rule_group[1] == "or":
             # 或操作
-            return self.__match_group(torrent, rule_group[0]) or self.__match_group(torrent, rule_group[2:])
+            return self.__match_group(torrent, rule_group[0], content, rule_results) \
+                or self.__match_group(torrent, rule_group[2:], content, rule_results)
 
-    def __match_rule(self, torrent: TorrentInfo, rule_name: str) -> bool:
+    def __match_rule(self, torrent: TorrentInfo, rule_name: str, content: str) -> bool:
         """
         判断种子是否匹配规则项
         """
-        if not self.rule_set.get(rule_name):
+        rule = self._compiled_rules.get(rule_name)
+        if not rule:
             # 规则不存在
             return False
         # TMDB规则
-        tmdb = self.rule_set[rule_name].get("tmdb")
+        tmdb = rule.get("tmdb")
         # 符合TMDB规则的直接返回True，即不过滤
         if tmdb and self.__match_tmdb(tmdb):
             return True
-        # 匹配项：标题、副标题、标签
-        content = f"{torrent.title} {torrent.description} {' '.join(torrent.labels or [])}"
         # 只匹配指定关键字
         match_content = []
-        matchs = self.rule_set[rule_name].get("match") or []
+        matchs = rule.get("match")
         if matchs:
             for match in matchs:
                 if not hasattr(torrent, match):
@@ -286,18 +351,14 @@ class FilterModule(_ModuleBase):
                     match_content.append(match_value)
         if match_content:
             content = " ".join(match_content)
-        # 包含规则项
-        includes = self.rule_set[rule_name].get("include") or []
-        # 排除规则项
-        excludes = self.rule_set[rule_name].get("exclude") or []
         # FREE规则
-        downloadvolumefactor = self.rule_set[rule_name].get("downloadvolumefactor")
-        for include in includes:
-            if not re.search(r"%s" % include, content, re.IGNORECASE):
+        downloadvolumefactor = rule.get("downloadvolumefactor")
+        for include in rule.get("include"):
+            if not include.search(content):
                 # 未发现包含项
                 return False
-        for exclude in excludes:
-            if re.search(r"%s" % exclude, content, re.IGNORECASE):
+        for exclude in rule.get("exclude"):
+            if exclude.search(content):
                 # 发现排除项
                 return False
         if downloadvolumefactor is not None:
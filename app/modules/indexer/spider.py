@@ -2,12 +2,15 @@ import copy
 import datetime
 import re
 import traceback
-from typing import List
+from typing import List, Dict, Generator, Optional
 from urllib.parse import quote, urlencode, urlparse, parse_qs
 
 import chardet
+import lxml.html
 from jinja2 import Template
-from pyquery import PyQuery
+from lxml import etree
+from pyquery.cssselectpatch import JQueryTranslator
+from pyquery.text import extract_text
 from ruamel.yaml import CommentedMap
 
 from app.core.config import settings
@@ -65,6 +68,12 @@ class TorrentSpider:
     torrents_info_array: list = []
     # 搜索超时, 默认: 15秒
     _timeout = 15
+    # CSS选择器转换器，支持jQuery扩展语法
+    _translator = JQueryTranslator(xhtml=False)
+    # 已编译的XPath，CSS选择器 -> XPath，所有索引器共享
+    _xpath_cache: Dict[str, etree.XPath] = {}
+    # 已编译的模板，模板文本 -> Template
+    _template_cache: Dict[str, Template] = {}
 
     def __init__(self,
                  indexer: CommentedMap,
@@ -281,27 +290,27 @@ class TorrentSpider:
             return
         selector = self.fields.get('title', {})
         if 'selector' in selector:
-            title = torrent(selector.get('selector', '')).clone()
-            self.__remove(title, selector)
+            title = self.__select(torrent, selector.get('selector', ''))
+            title = self.__remove(title, selector)
             items = self.__attribute_or_text(title, selector)
             self.torrents_info['title'] = self.__index(items, selector)
         elif 'text' in selector:
             render_dict = {}
             if "title_default" in self.fields:
                 title_default_selector = self.fields.get('title_default', {})
-                title_default_item = torrent(title_default_selector.get('selector', '')).clone()
-                self.__remove(title_default_item, title_default_selector)
+                title_default_item = self.__select(torrent, title_default_selector.get('selector', ''))
+                title_default_item = self.__remove(title_default_item, title_default_selector)
                 items = self.__attribute_or_text(title_default_item, selector)
                 title_default = self.__index(items, title_default_selector)
                 render_dict.update({'title_default': title_default})
             if "title_optional" in self.fields:
                 title_optional_selector = self.fields.get('title_optional', {})
-                title_optional_item = torrent(title_optional_selector.get('selector', '')).clone()
-                self.__remove(title_optional_item, title_optional_selector)
+                title_optional_item = self.__select(torrent, title_optional_selector.get('selector', ''))
+                title_optional_item = self.__remove(title_optional_item, title_optional_selector)
                 items = self.__attribute_or_text(title_optional_item, title_optional_selector)
                 title_optional = self.__index(items, title_optional_selector)
                 render_dict.update({'title_optional': title_optional})
-            self.torrents_info['title'] = Template(selector.get('text')).render(fields=render_dict)
+            self.torrents_info['title'] = self.__template(selector.get('text')).render(fields=render_dict)
         self.torrents_info['title'] = self.__filter_text(self.torrents_info.get('title'),
                                                          selector.get('filters'))
 
@@ -312,42 +321,44 @@ class TorrentSpider:
         selector = self.fields.get('description', {})
         if "selector" in selector \
                 or "selectors" in selector:
-            description = torrent(selector.get('selector', selector.get('selectors', ''))).clone()
+            description = self.__select(torrent, selector.get('selector', selector.get('selectors', '')))
             if description:
-                self.__remove(description, selector)
+                description = self.__remove(description, selector)
                 items = self.__attribute_or_text(description, selector)
                 self.torrents_info['description'] = self.__index(items, selector)
         elif "text" in selector:
             render_dict = {}
             if "tags" in self.fields:
                 tags_selector = self.fields.get('tags', {})
-                tags_item = torrent(tags_selector.get('selector', '')).clone()
-                self.__remove(tags_item, tags_selector)
+                tags_item = self.__select(torrent, tags_selector.get('selector', ''))
+                tags_item = self.__remove(tags_item, tags_selector)
                 items = self.__attribute_or_text(tags_item, tags_selector)
                 tag = self.__index(items, tags_selector)
                 render_dict.update({'tags': tag})
             if "subject" in self.fields:
                 subject_selector = self.fields.get('subject', {})
-                subject_item = torrent(subject_selector.get('selector', '')).clone()
-                self.__remove(subject_item, subject_selector)
+                subject_item = self.__select(torrent, subject_selector.get('selector', ''))
+                subject_item = self.__remove(subject_item, subject_selector)
                 items = self.__attribute_or_text(subject_item, subject_selector)
                 subject = self.__index(items, subject_selector)
                 render_dict.update({'subject': subject})
             if "description_free_forever" in self.fields:
                 description_free_forever_selector = self.fields.get("description_free_forever", {})
-                description_free_forever_item = torrent(description_free_forever_selector.get("selector", '')).clone()
-                self.__remove(description_free_forever_item, description_free_forever_selector)
+                description_free_forever_item = self.__select(torrent,
+                                                              description_free_forever_selector.get("selector", ''))
+                description_free_forever_item = self.__remove(description_free_forever_item,
+                                                              description_free_forever_selector)
                 items = self.__attribute_or_text(description_free_forever_item, description_free_forever_selector)
                 description_free_forever = self.__index(items, description_free_forever_selector)
                 render_dict.update({"description_free_forever": description_free_forever})
             if "description_normal" in self.fields:
                 description_normal_selector = self.fields.get("description_normal", {})
-                description_normal_item = torrent(description_normal_selector.get("selector", '')).clone()
-                self.__remove(description_normal_item, description_normal_selector)
+                description_normal_item = self.__select(torrent, description_normal_selector.get("selector", ''))
+                description_normal_item = self.__remove(description_normal_item, description_normal_selector)
                 items = self.__attribute_or_text(description_normal_item, description_normal_selector)
                 description_normal = self.__index(items, description_normal_selector)
                 render_dict.update({"description_normal": description_normal})
-            self.torrents_info['description'] = Template(selector.get('text')).render(fields=render_dict)
+            self.torrents_info['description'] = self.__template(selector.get('text')).render(fields=render_dict)
         self.torrents_info['description'] = self.__filter_text(self.torrents_info.get('description'),
                                                                selector.get('filters'))
 
@@ -356,8 +367,8 @@ class TorrentSpider:
         if 'details' not in self.fields:
             return
         selector = self.fields.get('details', {})
-        details = torrent(selector.get('selector', '')).clone()
-        self.__remove(details, selector)
+        details = self.__select(torrent, selector.get('selector', ''))
+        details = self.__remove(details, selector)
         items = self.__attribute_or_text(details, selector)
         item = self.__index(items, selector)
         detail_link = self.__filter_text(item, selector.get('filters'))
@@ -377,8 +388,8 @@ class TorrentSpider:
         if 'download' not in self.fields:
             return
         selector = self.fields.get('download', {})
-        download = torrent(selector.get('selector', '')).clone()
-        self.__remove(download, selector)
+        download = self.__select(torrent, selector.get('selector', ''))
+        download = self.__remove(download, selector)
         items = self.__attribute_or_text(download, selector)
         item = self.__index(items, selector)
         download_link = self.__filter_text(item, selector.get('filters'))
@@ -404,8 +415,8 @@ class TorrentSpider:
         if "imdbid" not in self.fields:
             return
         selector = self.fields.get('imdbid', {})
-        imdbid = torrent(selector.get('selector', '')).clone()
-        self.__remove(imdbid, selector)
+        imdbid = self.__select(torrent, selector.get('selector', ''))
+        imdbid = self.__remove(imdbid, selector)
         items = self.__attribute_or_text(imdbid, selector)
         item = self.__index(items, selector)
         self.torrents_info['imdbid'] = item
@@ -417,8 +428,8 @@ class TorrentSpider:
         if 'size' not in self.fields:
             return
         selector = self.fields.get('size', {})
-        size = torrent(selector.get('selector', selector.get("selectors", ''))).clone()
-        self.__remove(size, selector)
+        size = self.__select(torrent, selector.get('selector', selector.get("selectors", '')))
+        size = self.__remove(size, selector)
         items = self.__attribute_or_text(size, selector)
         item = self.__index(items, selector)
         if item:
@@ -434,8 +445,8 @@ class TorrentSpider:
         if 'leechers' not in self.fields:
             return
         selector = self.fields.get('leechers', {})
-        leechers = torrent(selector.get('selector', '')).clone()
-        self.__remove(leechers, selector)
+        leechers = self.__select(torrent, selector.get('selector', ''))
+        leechers = self.__remove(leechers, selector)
         items = self.__attribute_or_text(leechers, selector)
         item = self.__index(items, selector)
         if item:
@@ -452,8 +463,8 @@ class TorrentSpider:
         if 'seeders' not in self.fields:
             return
         selector = self.fields.get('seeders', {})
-        seeders = torrent(selector.get('selector', '')).clone()
-        self.__remove(seeders, selector)
+        seeders = self.__select(torrent, selector.get('selector', ''))
+        seeders = self.__remove(seeders, selector)
         items = self.__attribute_or_text(seeders, selector)
         item = self.__index(items, selector)
         if item:
@@ -470,8 +481,8 @@ class TorrentSpider:
         if 'grabs' not in self.fields:
             return
         selector = self.fields.get('grabs', {})
-        grabs = torrent(selector.get('selector', '')).clone()
-        self.__remove(grabs, selector)
+        grabs = self.__select(torrent, selector.get('selector', ''))
+        grabs = self.__remove(grabs, selector)
         items = self.__attribute_or_text(grabs, selector)
         item = self.__index(items, selector)
         if item:
@@ -488,8 +499,8 @@ class TorrentSpider:
         if 'date_added' not in self.fields:
             return
         selector = self.fields.get('date_added', {})
-        pubdate = torrent(selector.get('selector', '')).clone()
-        self.__remove(pubdate, selector)
+        pubdate = self.__select(torrent, selector.get('selector', ''))
+        pubdate = self.__remove(pubdate, selector)
         items = self.__attribute_or_text(pubdate, selector)
         pubdate_str = self.__index(items, selector)
         if pubdate_str:
@@ -502,8 +513,8 @@ class TorrentSpider:
         if 'date_elapsed' not in self.fields:
             return
         selector = self.fields.get('date_elapsed', {})
-        date_elapsed = torrent(selector.get('selector', '')).clone()
-        self.__remove(date_elapsed, selector)
+        date_elapsed = self.__select(torrent, selector.get('selector', ''))
+        date_elapsed = self.__remove(date_elapsed, selector)
         items = self.__attribute_or_text(date_elapsed, selector)
         self.torrents_info['date_elapsed'] = self.__index(items, selector)
         self.torrents_info['date_elapsed'] = self.__filter_text(self.torrents_info.get('date_elapsed'),
@@ -517,14 +528,14 @@ class TorrentSpider:
         self.torrents_info['downloadvolumefactor'] = 1
         if 'case' in selector:
             for downloadvolumefactorselector in list(selector.get('case', {}).keys()):
-                downloadvolumefactor = torrent(downloadvolumefactorselector)
+                downloadvolumefactor = self.__select(torrent, downloadvolumefactorselector)
                 if len(downloadvolumefactor) > 0:
                     self.torrents_info['downloadvolumefactor'] = selector.get('case', {}).get(
                         downloadvolumefactorselector)
                     break
         elif "selector" in selector:
-            downloadvolume = torrent(selector.get('selector', '')).clone()
-            self.__remove(downloadvolume, selector)
+            downloadvolume = self.__select(torrent, selector.get('selector', ''))
+            downloadvolume = self.__remove(downloadvolume, selector)
             items = self.__attribute_or_text(downloadvolume, selector)
             item = self.__index(items, selector)
             if item:
@@ -540,14 +551,14 @@ class TorrentSpider:
         self.torrents_info['uploadvolumefactor'] = 1
         if 'case' in selector:
             for uploadvolumefactorselector in list(selector.get('case', {}).keys()):
-                uploadvolumefactor = torrent(uploadvolumefactorselector)
+                uploadvolumefactor = self.__select(torrent, uploadvolumefactorselector)
                 if len(uploadvolumefactor) > 0:
                     self.torrents_info['uploadvolumefactor'] = selector.get('case', {}).get(
                         uploadvolumefactorselector)
                     break
         elif "selector" in selector:
-            uploadvolume = torrent(selector.get('selector', '')).clone()
-            self.__remove(uploadvolume, selector)
+            uploadvolume = self.__select(torrent, selector.get('selector', ''))
+            uploadvolume = self.__remove(uploadvolume, selector)
             items = self.__attribute_or_text(uploadvolume, selector)
             item = self.__index(items, selector)
             if item:
@@ -560,8 +571,8 @@ class TorrentSpider:
         if 'labels' not in self.fields:
             return
         selector = self.fields.get('labels', {})
-        labels = torrent(selector.get("selector", "")).clone()
-        self.__remove(labels, selector)
+        labels = self.__select(torrent, selector.get("selector", ""))
+        labels = self.__remove(labels, selector)
         items = self.__attribute_or_text(labels, selector)
         if items:
             self.torrents_info['labels'] = [item for item in items if item]
@@ -573,8 +584,8 @@ class TorrentSpider:
         if 'freedate' not in self.fields:
             return
         selector = self.fields.get('freedate', {})
-        freedate = torrent(selector.get('selector', '')).clone()
-        self.__remove(freedate, selector)
+        freedate = self.__select(torrent, selector.get('selector', ''))
+        freedate = self.__remove(freedate, selector)
         items = self.__attribute_or_text(freedate, selector)
         self.torrents_info['freedate'] = self.__index(items, selector)
         self.torrents_info['freedate'] = self.__filter_text(self.torrents_info.get('freedate'),
@@ -585,7 +596,7 @@ class TorrentSpider:
         if 'hr' not in self.fields:
             return
         selector = self.fields.get('hr', {})
-        hit_and_run = torrent(selector.get('selector', ''))
+        hit_and_run = self.__select(torrent, selector.get('selector', ''))
         if hit_and_run:
             self.torrents_info['hit_and_run'] = True
         else:
@@ -596,8 +607,8 @@ class TorrentSpider:
         if 'category' not in self.fields:
             return
         selector = self.fields.get('category', {})
-        category = torrent(selector.get('selector', '')).clone()
-        self.__remove(category, selector)
+        category = self.__select(torrent, selector.get('selector', ''))
+        category = self.__remove(category, selector)
         items = self.__attribute_or_text(category, selector)
         category_value = self.__index(items, selector)
         category_value = self.__filter_text(category_value,
@@ -699,26 +710,82 @@ class TorrentSpider:
                 logger.debug(f'过滤器 {method_name} 处理失败：{str(err)} - {traceback.format_exc()}')
         return text.strip()
 
-    @staticmethod
-    def __remove(item, selector):
+    @classmethod
+    def __xpath(cls, css_selector: str) -> etree.XPath:
+        """
+        将CSS选择器编译为XPath，编译结果缓存
+        """
+        xpath = cls._xpath_cache.get(css_selector)
+        if xpath is None:
+            xpath = etree.XPath(
+                cls._translator.css_to_xpath(css_selector.replace('[@', '['), 'descendant-or-self::')
+            )
+            cls._xpath_cache[css_selector] = xpath
+        return xpath
+
+    @classmethod
+    def __template(cls, text: str) -> Template:
         """
-        移除元素
+        获取编译后的模板，编译结果缓存
         """
-        if selector and "remove" in selector:
-            removelist = selector.get('remove', '').split(', ')
-            for v in removelist:
-                item.remove(v)
+        template = cls._template_cache.get(text)
+        if template is None:
+            template = Template(text)
+            cls._template_cache[text] = template
+        return template
+
+    def __select(self, element, css_selector: str) -> list:
+        """
+        在元素及其子孙元素中查找匹配CSS选择器的元素
+        """
+        if not css_selector or element is None:
+            return []
+        return self.__xpath(css_selector)(element)
+
+    def __remove(self, items: list, selector: dict) -> list:
+        """
+        移除元素，在副本上移除，不影响原页面
+        """
+        if not items or not selector or "remove" not in selector:
+            return items
+        items = [copy.deepcopy(item) for item in items]
+        removelist = selector.get('remove', '').split(', ')
+        for v in removelist:
+            for item in items:
+                for tag in self.__select(item, v):
+                    parent = tag.getparent()
+                    if parent is None:
+                        continue
+                    # 保留被移除元素后面的文本
+                    if tag.tail:
+                        prev = tag.getprevious()
+                        if prev is None:
+                            parent.text = (parent.text or '') + tag.tail
+                        else:
+                            prev.tail = (prev.tail or '') + tag.tail
+                    parent.remove(tag)
+        return items
 
     @staticmethod
-    def __attribute_or_text(item, selector: dict):
+    def __text(element) -> str:
+        """
+        获取元素文本，与PyQuery的text()一致
+        """
+        if element.tag == 'textarea':
+            return (element.text or '') + ''.join(
+                etree.tostring(child, encoding=str, method='html') for child in element
+            )
+        return extract_text(element)
+
+    def __attribute_or_text(self, item: list, selector: dict):
         if not selector:
             return item
         if not item:
             return []
         if 'attribute' in selector:
-            items = [i.attr(selector.get('attribute')) for i in item.items() if i]
+            items = [i.get(selector.get('attribute')) for i in item]
         else:
-            items = [i.text() for i in item.items() if i]
+            items = [self.__text(i) for i in item]
         return items
 
     @staticmethod
@@ -746,16 +813,39 @@ class TorrentSpider:
         # 清空旧结果
         self.torrents_info_array = []
         try:
-            # 解析站点文本对象
-            html_doc = PyQuery(html_text)
-            # 种子筛选器
-            torrents_selector = self.list.get('selector', '')
-            # 遍历种子html列表
-            for torn in html_doc(torrents_selector):
-                self.torrents_info_array.append(copy.deepcopy(self.get_info(PyQuery(torn))))
-                if len(self.torrents_info_array) >= int(self.result_num):
-                    break
+            for torrent_info in self.iter_torrents(html_text):
+                self.torrents_info_array.append(torrent_info)
             return self.torrents_info_array
         except Exception as err:
             self.is_error = True
             logger.warn(f"错误：{self.indexername} {str(err)}")
+
+    def iter_torrents(self, html_text: str) -> Generator[dict, None, None]:
+        """
+        逐条解析页面中的种子，达到搜索条数后停止
+        """
+        html_doc = self.__fromstring(html_text)
+        if html_doc is None:
+            return
+        # 种子筛选器
+        torrents_selector = self.list.get('selector', '')
+        count = 0
+        # 遍历种子html列表
+        for torn in self.__select(html_doc, torrents_selector):
+            yield self.get_info(torn)
+            count += 1
+            if count >= int(self.result_num):
+                break
+
+    @staticmethod
+    def __fromstring(html_text: str) -> Optional[etree.ElementBase]:
+        """
+        解析页面文本
+        """
+        if not html_text or not html_text.strip():
+            return None
+        try:
+            return lxml.html.fromstring(html_text)
+        except ValueError:
+            # 带编码声明的文本需要按字节解析
+            return lxml.html.fromstring(html_text.encode("utf-8"))
@@ -403,11 +403,23 @@ class Plex:
                 imdbid=ids['imdb_id'],
                 tvdbid=ids['tvdb_id'],
                 path=path,
+                lst_mod_date=self.__get_mod_date(item),
             )
         except Exception as err:
             logger.error(f"获取项目详情出错：{str(err)}")
         return None
 
+    @staticmethod
+    def __get_mod_date(item: Any) -> Optional[str]:
+        """
+        获取项目的修改标识，剧集同时包含集数，用于增量同步
+        """
+        if not item.updatedAt:
+            return None
+        if item.type == "show":
+            return f"{item.updatedAt.strftime('%Y-%m-%d %H:%M:%S')}|{item.leafCount}"
+        return item.updatedAt.strftime('%Y-%m-%d %H:%M:%S')
+
     @staticmethod
     def __get_ids(guids: List[Any]) -> dict:
         def parse_tmdb_id(value: str) -> (bool, int):
@@ -471,6 +483,7 @@ class Plex:
                             imdbid=ids['imdb_id'],
                             tvdbid=ids['tvdb_id'],
                             path=path,
+                            lst_mod_date=self.__get_mod_date(item),
                         )
                     except Exception as e:
                         logger.error(f"处理媒体项目时出错：{str(e)}, 跳过此项目。")
@@ -195,14 +195,15 @@ class SlackModule(_ModuleBase):
         return None
 
     @checkMessage(MessageChannel.Slack)
-    def post_message(self, message: Notification) -> None:
+    def post_message(self, message: Notification) -> Optional[bool]:
         """
         发送消息
         :param message: 消息
         :return: 成功或失败
         """
-        self.slack.send_msg(title=message.title, text=message.text,
-                            image=message.image, userid=message.userid, link=message.link)
+        state, _ = self.slack.send_msg(title=message.title, text=message.text,
+                                       image=message.image, userid=message.userid, link=message.link)
+        return state
 
     @checkMessage(MessageChannel.Slack)
     def post_medias_message(self, message: Notification, medias: List[MediaInfo]) -> Optional[bool]:
@@ -67,14 +67,14 @@ class SynologyChatModule(_ModuleBase):
         return None
 
     @checkMessage(MessageChannel.SynologyChat)
-    def post_message(self, message: Notification) -> None:
+    def post_message(self, message: Notification) -> Optional[bool]:
         """
         发送消息
         :param message: 消息体
         :return: 成功或失败
         """
-        self.synologychat.send_msg(title=message.title, text=message.text,
-                                   image=message.image, userid=message.userid, link=message.link)
+        return self.synologychat.send_msg(title=message.title, text=message.text,
+                                          image=message.image, userid=message.userid, link=message.link)
 
     @checkMessage(MessageChannel.SynologyChat)
     def post_medias_message(self, message: Notification, medias: List[MediaInfo]) -> Optional[bool]:
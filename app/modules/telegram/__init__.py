@@ -103,14 +103,14 @@ class TelegramModule(_ModuleBase):
         return None
 
     @checkMessage(MessageChannel.Telegram)
-    def post_message(self, message: Notification) -> None:
+    def post_message(self, message: Notification) -> Optional[bool]:
         """
         发送消息
         :param message: 消息体
         :return: 成功或失败
         """
-        self.telegram.send_msg(title=message.title, text=message.text,
-                               image=message.image, userid=message.userid, link=message.link)
+        return self.telegram.send_msg(title=message.title, text=message.text,
+                                      image=message.image, userid=message.userid, link=message.link)
 
     @checkMessage(MessageChannel.Telegram)
     def post_medias_message(self, message: Notification, medias: List[MediaInfo]) -> Optional[bool]:
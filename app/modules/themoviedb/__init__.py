@@ -7,6 +7,7 @@ from app import schemas
 from app.core.config import settings
 from app.core.context import MediaInfo
 from app.core.meta import MetaBase
+from app.helper.imagecache import ImageCacheHelper
 from app.log import logger
 from app.modules import _ModuleBase
 from app.modules.themoviedb.category import CategoryHelper
@@ -101,7 +102,7 @@ class TheMovieDbModule(_ModuleBase):
             # 缓存没有或者强制不使用缓存
             if tmdbid:
                 # 直接查询详情
-                info = self.tmdb.get_info(mtype=mtype, tmdbid=tmdbid)
+                info = self.tmdb.get_info(mtype=mtype, tmdbid=tmdbid, cache=cache)
             elif meta:
                 info = {}
                 # 使用中英文名分别识别，去重去空，但要保持顺序
@@ -423,6 +424,7 @@ class TheMovieDbModule(_ModuleBase):
         定时任务，每10分钟调用一次
         """
         self.cache.save()
+        ImageCacheHelper().clean()
 
     def obtain_images(self, mediainfo: MediaInfo) -> Optional[MediaInfo]:
         """
@@ -592,4 +594,5 @@ class TheMovieDbModule(_ModuleBase):
         logger.info("开始清除TMDB缓存 ...")
         self.tmdb.clear_cache()
         self.cache.clear()
+        self.scraper.clear_cache()
         logger.info("TMDB缓存清除完成")
@@ -1,19 +1,20 @@
+import shutil
+import threading
 import traceback
 from pathlib import Path
-from typing import Union, Optional, Tuple
+from typing import Union, Optional, Tuple, Dict
 from xml.dom import minidom
 
-from requests import RequestException
+from cachetools import TTLCache
 
 from app.core.config import settings
 from app.core.context import MediaInfo
 from app.core.meta import MetaBase
 from app.core.metainfo import MetaInfo
+from app.helper.imagecache import ImageCacheHelper
 from app.log import logger
 from app.schemas.types import MediaType
-from app.utils.common import retry
 from app.utils.dom import DomUtils
-from app.utils.http import RequestUtils
 from app.utils.system import SystemUtils
 
 
@@ -25,6 +26,11 @@ class TmdbScraper:
 
     def __init__(self, tmdb):
         self.tmdb = tmdb
+        # 季详情缓存，(tmdbid, 季号) -> 季详情
+        self._season_cache = TTLCache(maxsize=128, ttl=600)
+        self._season_lock = threading.Lock()
+        # 正在查询的季详情，(tmdbid, 季号) -> 锁，同一季只查询一次，不同季并行查询
+        self._season_loading: Dict[Tuple[int, int], threading.Lock] = {}
 
     def get_metadata_nfo(self, meta: MetaBase, mediainfo: MediaInfo,
                          season: int = None, episode: int = None) -> Optional[str]:
@@ -128,6 +134,8 @@ class TmdbScraper:
         self._transfer_type = transfer_type
         self._force_nfo = force_nfo
         self._force_img = force_img
+        # 需要保存的图片，路径 -> URL
+        images: Dict[Path, str] = {}
 
         try:
             # 电影，路径为文件名 名称/名称.xxx 或者蓝光原盘目录 名称/名称
@@ -143,7 +151,7 @@ class TmdbScraper:
                 for image_name, image_url in image_dict.items():
                     image_path = file_path.with_name(image_name)
                     if self._force_img or not image_path.exists():
-                        self.__save_image(url=image_url, file_path=image_path)
+                        images[image_path] = image_url
             # 电视剧，路径为每一季的文件名 名称/Season xx/名称 SxxExx.xxx
             else:
                 # 如果有上游传入的元信息则使用，否则使用文件名识别
@@ -160,9 +168,9 @@ class TmdbScraper:
                 for image_name, image_url in image_dict.items():
                     image_path = file_path.parent.with_name(image_name)
                     if self._force_img or not image_path.exists():
-                        self.__save_image(url=image_url, file_path=image_path)
+                        images[image_path] = image_url
                 # 查询季信息
-                seasoninfo = self.tmdb.get_tv_season_detail(mediainfo.tmdb_id, meta.begin_season)
+                seasoninfo = self.__get_season_detail(mediainfo.tmdb_id, meta.begin_season)
                 if seasoninfo:
                     # 季目录NFO
                     if self._force_nfo or not file_path.with_name("season.nfo").exists():
@@ -174,7 +182,7 @@ class TmdbScraper:
                     if poster_name and poster_url:
                         image_path = file_path.parent.with_name(poster_name)
                         if self._force_img or not image_path.exists():
-                            self.__save_image(url=poster_url, file_path=image_path)
+                            images[image_path] = poster_url
                 # 查询集详情
                 episodeinfo = self.__get_episode_detail(seasoninfo, meta.begin_episode)
                 if episodeinfo:
@@ -191,9 +199,9 @@ class TmdbScraper:
                         image_path = file_path.with_name(file_path.stem + "-thumb.jpg").with_suffix(
                             Path(episode_image).suffix)
                         if self._force_img or not image_path.exists():
-                            self.__save_image(
-                                f"https://{settings.TMDB_IMAGE_DOMAIN}/t/p/original{episode_image}",
-                                image_path)
+                            images[image_path] = f"https://{settings.TMDB_IMAGE_DOMAIN}/t/p/original{episode_image}"
+            # 并发下载所有图片
+            self.__save_images(images)
         except Exception as e:
             logger.error(f"{file_path} 刮削失败：{str(e)} - {traceback.format_exc()}")
 
@@ -409,26 +417,61 @@ class TmdbScraper:
             self.__save_nfo(doc, file_path.with_suffix(".nfo"))
         return doc
 
-    @retry(RequestException, logger=logger)
-    def __save_image(self, url: str, file_path: Path):
+    def __get_season_detail(self, tmdbid: int, season: int) -> dict:
         """
-        下载图片并保存
+        查询季详情，同一转移任务中的多个集文件只查询一次
         """
-        try:
-            logger.info(f"正在下载{file_path.stem}图片：{url} ...")
-            r = RequestUtils(proxies=settings.PROXY).get_res(url=url, raise_exception=True)
-            if r:
+        key = (tmdbid, season)
+        with self._season_lock:
+            seasoninfo = self._season_cache.get(key)
+            if seasoninfo:
+                return seasoninfo
+            loading_lock = self._season_loading.setdefault(key, threading.Lock())
+        with loading_lock:
+            # 等待期间其它线程可能已查询完成
+            with self._season_lock:
+                seasoninfo = self._season_cache.get(key)
+            if seasoninfo:
+                return seasoninfo
+            seasoninfo = self.tmdb.get_tv_season_detail(tmdbid, season)
+            with self._season_lock:
+                # 查询失败不缓存，下次重新查询
+                if seasoninfo:
+                    self._season_cache[key] = seasoninfo
+                self._season_loading.pop(key, None)
+        return seasoninfo or {}
+
+    def __save_images(self, images: Dict[Path, str]):
+        """
+        并发下载图片到本地缓存，再保存到目标路径
+        """
+        if not images:
+            return
+        cache_files = ImageCacheHelper().get_all(list(images.values()))
+        for file_path, url in images.items():
+            cache_file = cache_files.get(url)
+            if not cache_file:
+                logger.info(f"{file_path.stem}图片下载失败，请检查网络连通性")
+                continue
+            try:
                 if self._transfer_type in ['rclone_move', 'rclone_copy']:
-                    self.__save_remove_file(file_path, r.content)
+                    # 缓存文件需保留，直接复制到远端
+                    retcode, retmsg = SystemUtils.rclone_copy(cache_file, file_path)
+                    if retcode != 0:
+                        logger.error(f"{file_path.stem}图片保存失败：{retmsg or f'rclone返回码 {retcode}'}")
+                        continue
                 else:
-                    file_path.write_bytes(r.content)
+                    shutil.copyfile(cache_file, file_path)
                 logger.info(f"图片已保存：{file_path}")
-            else:
-                logger.info(f"{file_path.stem}图片下载失败，请检查网络连通性")
-        except RequestException as err:
-            raise err
-        except Exception as err:
-            logger.error(f"{file_path.stem}图片下载失败：{str(err)}")
+            except Exception as err:
+                logger.error(f"{file_path.stem}图片保存失败：{str(err)}")
+
+    def clear_cache(self):
+        """
+        清除季详情缓存
+        """
+        with self._season_lock:
+            self._season_cache.clear()
 
     def __save_nfo(self, doc: minidom.Document, file_path: Path):
         """
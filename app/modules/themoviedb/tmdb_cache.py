@@ -1,20 +1,21 @@
-import pickle
-import random
+import copy
+import threading
 import time
-import traceback
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from threading import RLock
-from typing import Optional
+from typing import Callable, Dict, Optional, Tuple
+
+from cachetools import LRUCache
 
 from app.core.config import settings
 from app.core.meta import MetaBase
+from app.helper.metacache import MetaCacheHelper, CACHE_EXPIRE_TIMESTAMP_STR
 from app.log import logger
 from app.utils.singleton import Singleton
 from app.schemas.types import MediaType
 
 lock = RLock()
 
-CACHE_EXPIRE_TIMESTAMP_STR = "cache_expire_timestamp"
 EXPIRE_TIMESTAMP = settings.CACHE_CONF.get('meta')
 
 
@@ -28,22 +29,20 @@ class TmdbCache(metaclass=Singleton):
         "type": MediaType
     }
     """
-    _meta_data: dict = {}
-    # 缓存文件路径
-    _meta_path: Path = None
+    # 缓存存储
+    _store: MetaCacheHelper = None
     # TMDB缓存过期
     _tmdb_cache_expire: bool = True
 
     def __init__(self):
-        self._meta_path = settings.TEMP_PATH / "__tmdb_cache__"
-        self._meta_data = self.__load(self._meta_path)
+        self._store = MetaCacheHelper(name="tmdb", legacy_file="__tmdb_cache__")
 
     def clear(self):
         """
         清空所有TMDB缓存
         """
         with lock:
-            self._meta_data = {}
+            self._store.clear()
 
     @staticmethod
     def __get_key(meta: MetaBase) -> str:
@@ -58,12 +57,12 @@ class TmdbCache(metaclass=Singleton):
         """
         key = self.__get_key(meta)
         with lock:
-            info: dict = self._meta_data.get(key)
+            info: dict = self._store.get(key)
             if info:
                 expire = info.get(CACHE_EXPIRE_TIMESTAMP_STR)
                 if not expire or int(time.time()) < expire:
                     info[CACHE_EXPIRE_TIMESTAMP_STR] = int(time.time()) + EXPIRE_TIMESTAMP
-                    self._meta_data[key] = info
+                    self._store.touch(key, info)
                 elif expire and self._tmdb_cache_expire:
                     self.delete(key)
             return info or {}
@@ -75,25 +74,21 @@ class TmdbCache(metaclass=Singleton):
         @return: 被删除的缓存内容
         """
         with lock:
-            return self._meta_data.pop(key, None)
+            return self._store.delete(key)
 
     def delete_by_tmdbid(self, tmdbid: int) -> None:
         """
         清空对应TMDBID的所有缓存记录，以强制更新TMDB中最新的数据
         """
-        for key in list(self._meta_data):
-            if self._meta_data.get(key, {}).get("id") == tmdbid:
-                with lock:
-                    self._meta_data.pop(key)
+        with lock:
+            self._store.delete_by_id(tmdbid)
 
     def delete_unknown(self) -> None:
         """
         清除未识别的缓存记录，以便重新搜索TMDB
         """
-        for key in list(self._meta_data):
-            if self._meta_data.get(key, {}).get("id") == 0:
-                with lock:
-                    self._meta_data.pop(key)
+        with lock:
+            self._store.delete_by_id(0)
 
     def modify(self, key: str, title: str) -> dict:
         """
@@ -103,25 +98,12 @@ class TmdbCache(metaclass=Singleton):
         @return: 被修改后缓存内容
         """
         with lock:
-            if self._meta_data.get(key):
-                self._meta_data[key]['title'] = title
-                self._meta_data[key][CACHE_EXPIRE_TIMESTAMP_STR] = int(time.time()) + EXPIRE_TIMESTAMP
-            return self._meta_data.get(key)
-
-    @staticmethod
-    def __load(path: Path) -> dict:
-        """
-        从文件中加载缓存
-        """
-        try:
-            if path.exists():
-                with open(path, 'rb') as f:
-                    data = pickle.load(f)
-                return data
-            return {}
-        except Exception as e:
-            logger.error(f'加载缓存失败：{str(e)} - {traceback.format_exc()}')
-            return {}
+            info = self._store.get(key)
+            if info:
+                info['title'] = title
+                info[CACHE_EXPIRE_TIMESTAMP_STR] = int(time.time()) + EXPIRE_TIMESTAMP
+                self._store.set(key, info)
+            return info
 
     def update(self, meta: MetaBase, info: dict) -> None:
         """
@@ -137,75 +119,30 @@ class TmdbCache(metaclass=Singleton):
                     if info.get("media_type") == MediaType.MOVIE else info.get('first_air_date')
                 if cache_year:
                     cache_year = cache_year[:4]
-                self._meta_data[self.__get_key(meta)] = {
-                        "id": info.get("id"),
-                        "type": info.get("media_type"),
-                        "year": cache_year,
-                        "title": cache_title,
-                        "poster_path": info.get("poster_path"),
-                        "backdrop_path": info.get("backdrop_path"),
-                        CACHE_EXPIRE_TIMESTAMP_STR: int(time.time()) + EXPIRE_TIMESTAMP
-                    }
+                self._store.set(self.__get_key(meta), {
+                    "id": info.get("id"),
+                    "type": info.get("media_type"),
+                    "year": cache_year,
+                    "title": cache_title,
+                    "poster_path": info.get("poster_path"),
+                    "backdrop_path": info.get("backdrop_path"),
+                    CACHE_EXPIRE_TIMESTAMP_STR: int(time.time()) + EXPIRE_TIMESTAMP
+                })
             elif info is not None:
                 # None时不缓存，此时代表网络错误，允许重复请求
-                self._meta_data[self.__get_key(meta)] = {'id': 0}
+                self._store.set(self.__get_key(meta), {'id': 0})
 
     def save(self, force: bool = False) -> None:
         """
-        保存缓存数据到文件
-        """
-
-        meta_data = self.__load(self._meta_path)
-        new_meta_data = {k: v for k, v in self._meta_data.items() if v.get("id")}
-
-        if not force \
-                and not self._random_sample(new_meta_data) \
-                and meta_data.keys() == new_meta_data.keys():
-            return
-
-        with open(self._meta_path, 'wb') as f:
-            pickle.dump(new_meta_data, f, pickle.HIGHEST_PROTOCOL)
-
-    def _random_sample(self, new_meta_data: dict) -> bool:
-        """
-        采样分析是否需要保存
+        保存缓存数据，写入待更新的过期时间并清理过期记录
         """
-        ret = False
-        if len(new_meta_data) < 25:
-            keys = list(new_meta_data.keys())
-            for k in keys:
-                info = new_meta_data.get(k)
-                expire = info.get(CACHE_EXPIRE_TIMESTAMP_STR)
-                if not expire:
-                    ret = True
-                    info[CACHE_EXPIRE_TIMESTAMP_STR] = int(time.time()) + EXPIRE_TIMESTAMP
-                elif int(time.time()) >= expire:
-                    ret = True
-                    if self._tmdb_cache_expire:
-                        new_meta_data.pop(k)
-        else:
-            count = 0
-            keys = random.sample(sorted(new_meta_data.keys()), 25)
-            for k in keys:
-                info = new_meta_data.get(k)
-                expire = info.get(CACHE_EXPIRE_TIMESTAMP_STR)
-                if not expire:
-                    ret = True
-                    info[CACHE_EXPIRE_TIMESTAMP_STR] = int(time.time()) + EXPIRE_TIMESTAMP
-                elif int(time.time()) >= expire:
-                    ret = True
-                    if self._tmdb_cache_expire:
-                        new_meta_data.pop(k)
-                        count += 1
-            if count >= 5:
-                ret |= self._random_sample(new_meta_data)
-        return ret
+        self._store.flush(expire=self._tmdb_cache_expire)
 
     def get_title(self, key: str) -> Optional[str]:
         """
         获取缓存的标题
         """
-        cache_media_info = self._meta_data.get(key)
+        cache_media_info = self._store.get(key)
         if not cache_media_info or not cache_media_info.get("id"):
             return None
         return cache_media_info.get("title")
@@ -214,7 +151,120 @@ class TmdbCache(metaclass=Singleton):
         """
         重新设置缓存标题
         """
-        cache_media_info = self._meta_data.get(key)
-        if not cache_media_info:
-            return
-        self._meta_data[key]['title'] = cn_title
+        with lock:
+            cache_media_info = self._store.get(key)
+            if not cache_media_info:
+                return
+            cache_media_info['title'] = cn_title
+            self._store.set(key, cache_media_info)
+
+
+class TmdbDetailCache(metaclass=Singleton):
+    """
+    TMDB媒体详情缓存，按类型+TMDBID缓存
+    过期后在容忍时间内先返回旧数据并在后台刷新，同一ID的并发查询只请求一次
+    """
+
+    # 后台刷新线程数
+    _workers = 2
+
+    def __init__(self):
+        self._cache = LRUCache(maxsize=settings.CACHE_CONF.get('tmdbinfo'))
+        self._lock = threading.Lock()
+        # 正在查询的键 -> 查询完成事件
+        self._loading: Dict[Tuple[Optional[str], int], threading.Event] = {}
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="TmdbDetail")
+        self._hits = 0
+        self._stales = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._refreshes = 0
+
+    @staticmethod
+    def __get_key(mtype: Optional[MediaType], tmdbid: int) -> Tuple[Optional[str], int]:
+        return mtype.value if mtype else None, int(tmdbid)
+
+    def get(self, mtype: Optional[MediaType], tmdbid: int,
+            loader: Callable[[], Optional[dict]], refresh: bool = False) -> Optional[dict]:
+        """
+        获取媒体详情，返回副本
+        :param mtype: 媒体类型，为空时表示电视剧、电影都查询
+        :param tmdbid: TMDBID
+        :param loader: 从TMDB查询详情的方法
+        :param refresh: 是否忽略缓存重新查询
+        """
+        if not tmdbid:
+            return loader()
+        key = self.__get_key(mtype, tmdbid)
+        with self._lock:
+            entry = None if refresh else self._cache.get(key)
+            if entry:
+                info, fetched = entry
+                age = time.time() - fetched
+                if age < settings.TMDB_DETAIL_CACHE_TTL:
+                    self._hits += 1
+                    return copy.deepcopy(info)
+                if age < settings.TMDB_DETAIL_CACHE_TTL + settings.TMDB_DETAIL_CACHE_STALE:
+                    # 先返回旧数据，后台刷新
+                    self._stales += 1
+                    if key not in self._loading:
+                        self._loading[key] = threading.Event()
+                        self._refreshes += 1
+                        self._executor.submit(self.__load, key, loader)
+                    return copy.deepcopy(info)
+            event = self._loading.get(key)
+            if event is None:
+                self._loading[key] = threading.Event()
+                self._misses += 1
+            else:
+                self._coalesced += 1
+        if event is None:
+            info = self.__load(key, loader)
+            return copy.deepcopy(info) if info else info
+        # 等待正在进行的查询，查询失败时返回空
+        event.wait()
+        with self._lock:
+            entry = self._cache.get(key)
+        return copy.deepcopy(entry[0]) if entry else None
+
+    def __load(self, key: Tuple[Optional[str], int], loader: Callable[[], Optional[dict]]) -> Optional[dict]:
+        """
+        查询详情并写入缓存，查询失败时保留旧数据
+        """
+        info = None
+        try:
+            info = loader()
+        except Exception as err:
+            logger.error(f"查询TMDB详情失败：{key} - {str(err)}")
+        finally:
+            with self._lock:
+                if info:
+                    self._cache[key] = (info, time.time())
+                event = self._loading.pop(key, None)
+            if event:
+                event.set()
+        return info
+
+    def clear(self):
+        """
+        清空缓存
+        """
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        """
+        缓存命中统计
+        """
+        with self._lock:
+            total = self._hits + self._stales + self._misses + self._coalesced
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "hits": self._hits,
+                "stale_hits": self._stales,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "refreshes": self._refreshes,
+                "hit_rate": round((self._hits + self._stales + self._coalesced) / total, 4) if total else 0
+            }
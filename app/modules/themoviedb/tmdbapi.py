@@ -11,6 +11,7 @@ from app.log import logger
 from app.schemas.types import MediaType
 from app.utils.http import RequestUtils
 from app.utils.string import StringUtils
+from .tmdb_cache import TmdbDetailCache
 from .tmdbv3api import TMDb, Search, Movie, TV, Season, Episode, Discover, Trending, Person
 from .tmdbv3api.exceptions import TMDbException
 
@@ -37,6 +38,8 @@ class TmdbApi:
         self.tmdb.proxies = settings.PROXY
         # 调试模式
         self.tmdb.debug = False
+        # 媒体详情缓存
+        self.detail_cache = TmdbDetailCache()
         # TMDB查询对象
         self.search = Search()
         self.movie = Movie()
@@ -527,11 +530,23 @@ class TmdbApi:
 
     def get_info(self,
                  mtype: MediaType,
-                 tmdbid: int) -> dict:
+                 tmdbid: int,
+                 cache: bool = True) -> dict:
         """
-        给定TMDB号，查询一条媒体信息
+        给定TMDB号，查询一条媒体信息，优先使用详情缓存
         :param mtype: 类型：电影、电视剧，为空时都查（此时用不上年份）
         :param tmdbid: TMDB的ID，有tmdbid时优先使用tmdbid，否则使用年份和标题
+        :param cache: 是否使用缓存，为False时重新查询并更新缓存
+        """
+        return self.detail_cache.get(mtype, tmdbid,
+                                     loader=lambda: self.__get_info(mtype=mtype, tmdbid=tmdbid),
+                                     refresh=not cache)
+
+    def __get_info(self,
+                   mtype: MediaType,
+                   tmdbid: int) -> dict:
+        """
+        从TMDB查询一条媒体信息
         """
 
         def __get_genre_ids(genres: list) -> list:
@@ -1253,6 +1268,7 @@ class TmdbApi:
         清除缓存
         """
         self.tmdb.cache_clear()
+        self.detail_cache.clear()
 
     def get_tv_episode_years(self, tv_id: int):
         """
@@ -97,14 +97,14 @@ class VoceChatModule(_ModuleBase):
         return None
 
     @checkMessage(MessageChannel.VoceChat)
-    def post_message(self, message: Notification) -> None:
+    def post_message(self, message: Notification) -> Optional[bool]:
         """
         发送消息
         :param message: 消息内容
         :return: 成功或失败
         """
-        self.vocechat.send_msg(title=message.title, text=message.text,
-                               userid=message.userid, link=message.link)
+        return self.vocechat.send_msg(title=message.title, text=message.text,
+                                      userid=message.userid, link=message.link)
 
     @checkMessage(MessageChannel.VoceChat)
     def post_medias_message(self, message: Notification, medias: List[MediaInfo]) -> Optional[bool]:
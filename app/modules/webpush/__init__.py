@@ -1,5 +1,6 @@
 import json
-from typing import Union, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union, Tuple
 
 from pywebpush import webpush, WebPushException
 
@@ -10,6 +11,9 @@ from app.schemas import MessageChannel, Notification
 
 
 class WebPushModule(_ModuleBase):
+    # 并发推送线程池
+    _executor = ThreadPoolExecutor(max_workers=10, thread_name_prefix="WebPush")
+
     def init_module(self) -> None:
         pass
 
@@ -30,39 +34,49 @@ class WebPushModule(_ModuleBase):
         return "MESSAGER", "webpush"
 
     @checkMessage(MessageChannel.WebPush)
-    def post_message(self, message: Notification) -> None:
+    def post_message(self, message: Notification) -> Optional[bool]:
         """
-        发送消息
+        发送消息，并发推送到所有浏览器订阅
         :param message: 消息内容
         :return: 成功或失败
         """
         if not message.title and not message.text:
             logger.warn("标题和内容不能同时为空")
-            return
-        try:
-            if message.title:
-                caption = message.title
-                content = message.text
-            else:
-                caption = message.text
-                content = ""
-            for sub in global_vars.get_subscriptions():
-                logger.debug(f"给 {sub} 发送WebPush：{caption} {content}")
-                try:
-                    webpush(
-                        subscription_info=sub,
-                        data=json.dumps({
-                            "title": caption,
-                            "body": content,
-                            "url": message.link or "/?shotcut=message"
-                        }),
-                        vapid_private_key=settings.VAPID.get("privateKey"),
-                        vapid_claims={
-                            "sub": settings.VAPID.get("subject")
-                        },
-                    )
-                except WebPushException as err:
-                    logger.error(f"WebPush发送失败: {str(err)}")
+            return None
+        subscriptions = global_vars.get_subscriptions()
+        if not subscriptions:
+            return None
+        if message.title:
+            caption = message.title
+            content = message.text
+        else:
+            caption = message.text
+            content = ""
+        data = json.dumps({
+            "title": caption,
+            "body": content,
+            "url": message.link or "/?shotcut=message"
+        })
+
+        def __push(sub: dict) -> bool:
+            logger.debug(f"给 {sub} 发送WebPush：{caption} {content}")
+            try:
+                webpush(
+                    subscription_info=sub,
+                    data=data,
+                    vapid_private_key=settings.VAPID.get("privateKey"),
+                    vapid_claims={
+                        "sub": settings.VAPID.get("subject")
+                    },
+                )
+                return True
+            except WebPushException as err:
+                logger.error(f"WebPush发送失败: {str(err)}")
+            except Exception as msg_e:
+                logger.error(f"发送消息失败：{msg_e}")
+            return False
 
-        except Exception as msg_e:
-            logger.error(f"发送消息失败：{msg_e}")
+        if len(subscriptions) == 1:
+            return __push(subscriptions[0])
+        # 只要有一个订阅推送成功即视为成功，避免重试时重复推送给已成功的订阅
+        return any(list(self._executor.map(__push, subscriptions)))
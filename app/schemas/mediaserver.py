@@ -104,7 +104,7 @@ class MediaServerItem(BaseModel):
     seasoninfo: Optional[Dict[int, list]] = None
     # 备注
     note: Optional[str] = None
-    # 同步时间
+    # 媒体服务器最后修改时间，未提供时为同步时间
     lst_mod_date: Optional[str] = None
 
     class Config:
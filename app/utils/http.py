@@ -1,16 +1,181 @@
-from typing import Union, Any, Optional
+import threading
+import time
+from collections import deque
+from http.cookiejar import DefaultCookiePolicy
+from typing import Union, Any, Optional, Dict, Tuple
 from urllib.parse import urljoin, urlparse, parse_qs, urlencode, urlunparse
 
 import requests
 import urllib3
 from requests import Session, Response
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
 from urllib3.exceptions import InsecureRequestWarning
 
 from app.log import logger
+from app.utils.singleton import Singleton
 
 urllib3.disable_warnings(InsecureRequestWarning)
 
 
+class _RejectCookiePolicy(DefaultCookiePolicy):
+    """
+    共享会话不保存响应Cookie，避免不同调用方之间串用
+    """
+
+    def set_ok(self, cookie, request):
+        return False
+
+
+class SessionRegistry(metaclass=Singleton):
+    """
+    全局HTTP会话池，按 主机+代理 复用长连接，并限制每个主机的并发请求数
+    """
+
+    # 每个主机的连接池大小
+    _pool_size = 10
+    # 每个主机的最大并发请求数
+    _host_concurrency = 10
+    # 每个主机保留的耗时样本数
+    _latency_samples = 200
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (主机, 代理) -> 会话
+        self._sessions: Dict[Tuple[str, str], Session] = {}
+        # 主机 -> 并发信号量
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        # 主机 -> 统计信息
+        self._stats: Dict[str, dict] = {}
+
+    def __new_session(self) -> Session:
+        """
+        创建会话，连接错误时按退避策略重试，不重试HTTP状态码
+        """
+        session = requests.Session()
+        session.cookies.set_policy(_RejectCookiePolicy())
+        retries = Retry(total=2, connect=2, read=1, status=0, backoff_factor=0.5,
+                        allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"]),
+                        raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self._pool_size, max_retries=retries)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def get(self, url: str, proxies: dict = None) -> Tuple[Optional[Session], Optional[str]]:
+        """
+        获取URL对应的会话
+        :return: 会话、主机名
+        """
+        parsed = urlparse(url)
+        host = parsed.hostname
+        if not host or parsed.scheme not in ("http", "https"):
+            return None, None
+        proxy = (proxies or {}).get(parsed.scheme) or ""
+        key = (f"{parsed.scheme}://{parsed.netloc}", proxy)
+        with self._lock:
+            session = self._sessions.get(key)
+            if not session:
+                session = self.__new_session()
+                self._sessions[key] = session
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self._host_concurrency)
+                self._stats[host] = {
+                    "requests": 0,
+                    "errors": 0,
+                    "latency": deque(maxlen=self._latency_samples)
+                }
+        return session, host
+
+    def request(self, method: str, url: str, proxies: dict = None, **kwargs) -> Response:
+        """
+        通过共享会话发起请求
+        """
+        session, host = self.get(url, proxies)
+        if not session:
+            return requests.request(method, url, proxies=proxies, **kwargs)
+        start_time = time.perf_counter()
+        failed = True
+        try:
+            with self._semaphores[host]:
+                response = session.request(method, url, proxies=proxies, **kwargs)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            elapsed = (time.perf_counter() - start_time) * 1000
+            with self._lock:
+                stat = self._stats[host]
+                stat["requests"] += 1
+                if failed:
+                    stat["errors"] += 1
+                stat["latency"].append(elapsed)
+
+    @staticmethod
+    def __percentile(values: list, percent: int) -> float:
+        """
+        计算百分位数
+        """
+        if not values:
+            return 0
+        return round(values[min(len(values) - 1, len(values) * percent // 100)], 1)
+
+    @staticmethod
+    def __pool_counts(session: Session) -> Tuple[int, int]:
+        """
+        统计会话连接池新建的连接数和复用连接发出的请求数
+        """
+        connections, reused = 0, 0
+        for adapter in set(session.adapters.values()):
+            managers = [adapter.poolmanager, *adapter.proxy_manager.values()]
+            for manager in managers:
+                if not manager:
+                    continue
+                for pool_key in list(manager.pools.keys()):
+                    pool = manager.pools.get(pool_key)
+                    if pool:
+                        connections += pool.num_connections
+                        reused += max(pool.num_requests - pool.num_connections, 0)
+        return connections, reused
+
+    def stats(self) -> dict:
+        """
+        按主机统计请求数、错误率、连接复用及耗时百分位（毫秒）
+        """
+        with self._lock:
+            sessions = list(self._sessions.items())
+            hosts = {host: (stat["requests"], stat["errors"], sorted(stat["latency"]))
+                     for host, stat in self._stats.items()}
+        pools: Dict[str, list] = {}
+        for (base_url, _), session in sessions:
+            connections, reused = self.__pool_counts(session)
+            pool = pools.setdefault(urlparse(base_url).hostname, [0, 0])
+            pool[0] += connections
+            pool[1] += reused
+        ret = {}
+        for host, (total, errors, latency) in hosts.items():
+            connections, reused = pools.get(host, [0, 0])
+            ret[host] = {
+                "requests": total,
+                "errors": errors,
+                "error_rate": round(errors / total, 4) if total else 0,
+                "connections": connections,
+                "reused": reused,
+                "p50": self.__percentile(latency, 50),
+                "p90": self.__percentile(latency, 90),
+                "p99": self.__percentile(latency, 99)
+            }
+        return ret
+
+    def close(self):
+        """
+        关闭所有会话
+        """
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            session.close()
+
+
 class RequestUtils:
     _headers: dict = None
     _cookies: Union[str, dict] = None
@@ -62,7 +227,8 @@ class RequestUtils:
         :raises: requests.exceptions.RequestException 仅raise_exception为True时会抛出
         """
         if self._session is None:
-            req_method = requests.request
+            # 未指定会话时使用全局会话池复用连接
+            req_method = SessionRegistry().request
         else:
             req_method = self._session.request
         kwargs.setdefault("headers", self._headers)
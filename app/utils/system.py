@@ -1,12 +1,16 @@
 import datetime
+import errno
+import hashlib
 import os
 import platform
 import re
 import shutil
 import subprocess
 import sys
+import zipfile
 from pathlib import Path
-from typing import List, Union, Tuple
+from functools import lru_cache
+from typing import List, Union, Tuple, Callable, Optional, Generator
 
 import docker
 import psutil
@@ -87,32 +91,171 @@ class SystemUtils:
             return "Linux"
 
     @staticmethod
-    def copy(src: Path, dest: Path) -> Tuple[int, str]:
+    def copy(src: Path, dest: Path, callback: Callable[[int, int], None] = None) -> Tuple[int, str]:
         """
         复制
+        :param callback: 进度回调，参数为已复制字节数、总字节数
         """
         try:
-            shutil.copy2(src, dest)
+            SystemUtils.copy_file(src, dest, callback=callback)
             return 0, ""
         except Exception as err:
             print(str(err))
             return -1, str(err)
 
     @staticmethod
-    def move(src: Path, dest: Path) -> Tuple[int, str]:
+    def move(src: Path, dest: Path, callback: Callable[[int, int], None] = None) -> Tuple[int, str]:
         """
         移动
+        :param callback: 跨盘复制时的进度回调，参数为已复制字节数、总字节数
         """
         try:
             # 当前目录改名
             temp = src.replace(src.parent / dest.name)
-            # 移动到目标目录
-            shutil.move(temp, dest)
+            try:
+                # 同盘直接移动到目标目录
+                os.rename(temp, dest)
+            except OSError as err:
+                if err.errno != errno.EXDEV or not temp.is_file():
+                    # 目录等情况交由shutil处理
+                    shutil.move(temp, dest)
+                else:
+                    # 跨盘先复制再删除
+                    SystemUtils.copy_file(temp, dest, callback=callback)
+                    temp.unlink()
             return 0, ""
         except Exception as err:
             print(str(err))
             return -1, str(err)
 
+    @staticmethod
+    def copy_file(src: Path, dest: Path, callback: Callable[[int, int], None] = None,
+                  hash_name: str = None, chunk_size: int = 16 * 1024 * 1024) -> Optional[str]:
+        """
+        分块复制文件，先写入临时文件再原子改名，临时文件存在时断点续传
+        Linux下优先使用copy_file_range/sendfile在内核中复制，需要校验时使用大缓冲区读写并同步计算摘要
+        :param src: 源文件
+        :param dest: 目标文件
+        :param callback: 进度回调，参数为已复制字节数、总字节数
+        :param hash_name: 摘要算法，如sha1、md5，为空时不计算
+        :param chunk_size: 每次复制的字节数
+        :return: 文件摘要
+        """
+        total = src.stat().st_size
+        tmp_path = dest.with_name(dest.name + ".part")
+        digest = hashlib.new(hash_name) if hash_name else None
+        with open(src, 'rb') as fsrc:
+            # 断点续传，逐块校验已复制部分与源文件一致，已复制部分同时计入摘要
+            offset = 0
+            if tmp_path.exists():
+                offset = tmp_path.stat().st_size
+                if 0 < offset <= total and not tmp_path.samefile(src):
+                    with open(tmp_path, 'rb') as ftmp:
+                        remain = offset
+                        while remain:
+                            data = fsrc.read(min(chunk_size, remain))
+                            if not data or ftmp.read(len(data)) != data:
+                                offset = 0
+                                break
+                            if digest:
+                                digest.update(data)
+                            remain -= len(data)
+                else:
+                    offset = 0
+                if not offset:
+                    # 不可续传时删除临时文件，避免其为源文件的硬链接时被截断
+                    tmp_path.unlink()
+                    if digest:
+                        digest = hashlib.new(hash_name)
+            with open(tmp_path, 'r+b' if offset else 'wb') as fdst:
+                fsrc.seek(offset)
+                fdst.seek(offset)
+                fdst.truncate(offset)
+                copied = offset
+                if callback:
+                    callback(copied, total)
+                # 零拷贝方式，不支持时回退到缓冲区读写
+                zero_copy = None
+                if not digest:
+                    if hasattr(os, "copy_file_range"):
+                        zero_copy = os.copy_file_range
+                    elif hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+                        zero_copy = os.sendfile
+                buffer = None
+                while copied < total:
+                    count = min(chunk_size, total - copied)
+                    sent = 0
+                    if zero_copy:
+                        try:
+                            if zero_copy is os.sendfile:
+                                sent = os.sendfile(fdst.fileno(), fsrc.fileno(), copied, count)
+                            else:
+                                sent = os.copy_file_range(fsrc.fileno(), fdst.fileno(), count, copied, copied)
+                        except OSError as err:
+                            if err.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL,
+                                                 errno.EOPNOTSUPP, errno.EBADF):
+                                raise
+                            sent = 0
+                        if not sent:
+                            # 不支持或未到文件末尾即返回0时，回退到缓冲区读写
+                            zero_copy = None
+                            fsrc.seek(copied)
+                            fdst.seek(copied)
+                            continue
+                        if zero_copy is os.sendfile:
+                            fdst.seek(copied + sent)
+                    else:
+                        if buffer is None:
+                            buffer = memoryview(bytearray(chunk_size))
+                        sent = fsrc.readinto(buffer[:count])
+                        if sent:
+                            fdst.write(buffer[:sent])
+                            if digest:
+                                digest.update(buffer[:sent])
+                    if not sent:
+                        raise IOError(f"{src} 复制中断，已复制 {copied}/{total}")
+                    copied += sent
+                    if callback:
+                        callback(copied, total)
+        shutil.copystat(src, tmp_path)
+        os.replace(tmp_path, dest)
+        return digest.hexdigest() if digest else None
+
+    @staticmethod
+    def zip_stream(directory: Path, store_exts: List[str] = None,
+                   chunk_size: int = 1024 * 1024) -> Generator[bytes, None, None]:
+        """
+        边读取边生成目录的zip压缩包，内存占用与目录大小无关
+        :param directory: 目录
+        :param store_exts: 不压缩直接存储的扩展名，如已压缩的媒体文件
+        :param chunk_size: 每次读取的字节数
+        """
+        store_exts = [ext.lower() for ext in store_exts or []]
+        buffer = _ZipStreamBuffer()
+        with zipfile.ZipFile(buffer, mode="w", allowZip64=True) as zf:
+            for root, dirs, files in os.walk(directory):
+                dirs.sort()
+                for name in sorted(files):
+                    file = Path(root) / name
+                    try:
+                        zinfo = zipfile.ZipInfo.from_file(file, arcname=file.relative_to(directory.parent))
+                    except OSError:
+                        continue
+                    if file.suffix.lower() in store_exts:
+                        zinfo.compress_type = zipfile.ZIP_STORED
+                    else:
+                        zinfo.compress_type = zipfile.ZIP_DEFLATED
+                    with open(file, "rb") as src, zf.open(zinfo, mode="w", force_zip64=True) as dest:
+                        while True:
+                            data = src.read(chunk_size)
+                            if not data:
+                                break
+                            dest.write(data)
+                            if buffer.size >= chunk_size:
+                                yield buffer.pop()
+        # 剩余数据及目录区
+        yield buffer.pop()
+
     @staticmethod
     def link(src: Path, dest: Path) -> Tuple[int, str]:
         """
@@ -193,34 +336,56 @@ class SystemUtils:
             return None
 
     @staticmethod
-    def list_files(directory: Path, extensions: list, min_filesize: int = 0) -> List[Path]:
+    @lru_cache(maxsize=64)
+    def __get_ext_pattern(extensions: Tuple[str, ...]) -> re.Pattern:
         """
-        获取目录下所有指定扩展名的文件（包括子目录）
+        编译扩展名匹配正则
         """
+        return re.compile(r".*(" + "|".join(extensions) + ")$", re.IGNORECASE)
 
-        if not min_filesize:
-            min_filesize = 0
+    @staticmethod
+    def match_extensions(name: str, extensions: list) -> bool:
+        """
+        判断文件名是否为指定扩展名
+        """
+        return True if SystemUtils.__get_ext_pattern(tuple(extensions)).match(name) else False
 
+    @staticmethod
+    def scan_files(directory: Path, extensions: list, min_filesize: int = 0) -> Generator[Path, None, None]:
+        """
+        使用scandir遍历目录及子目录中指定扩展名的文件，不进入符号链接目录
+        """
+        pattern = SystemUtils.__get_ext_pattern(tuple(extensions))
+        min_size = (min_filesize or 0) * 1024 * 1024
+        dirs = [str(directory)]
+        while dirs:
+            try:
+                with os.scandir(dirs.pop()) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir() and not entry.is_symlink():
+                                dirs.append(entry.path)
+                            elif entry.is_file() \
+                                    and pattern.match(entry.name) \
+                                    and (not min_size or entry.stat().st_size >= min_size):
+                                yield Path(entry.path)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+
+    @staticmethod
+    def list_files(directory: Path, extensions: list, min_filesize: int = 0) -> List[Path]:
+        """
+        获取目录下所有指定扩展名的文件（包括子目录）
+        """
         if not directory.exists():
             return []
 
         if directory.is_file():
             return [directory]
 
-        if not min_filesize:
-            min_filesize = 0
-
-        files = []
-        pattern = r".*(" + "|".join(extensions) + ")$"
-
-        # 遍历目录及子目录
-        for path in directory.rglob('**/*'):
-            if path.is_file() \
-                    and re.match(pattern, path.name, re.IGNORECASE) \
-                    and path.stat().st_size >= min_filesize * 1024 * 1024:
-                files.append(path)
-
-        return files
+        return list(SystemUtils.scan_files(directory, extensions, min_filesize))
 
     @staticmethod
     def exits_files(directory: Path, extensions: list, min_filesize: int = 0) -> bool:
@@ -228,27 +393,14 @@ class SystemUtils:
         判断目录下是否存在指定扩展名的文件
         :return True存在 False不存在
         """
-
-        if not min_filesize:
-            min_filesize = 0
-
         if not directory.exists():
             return False
 
         if directory.is_file():
             return True
 
-        if not min_filesize:
-            min_filesize = 0
-
-        pattern = r".*(" + "|".join(extensions) + ")$"
-
-        # 遍历目录及子目录
-        for path in directory.rglob('**/*'):
-            if path.is_file() \
-                    and re.match(pattern, path.name, re.IGNORECASE) \
-                    and path.stat().st_size >= min_filesize * 1024 * 1024:
-                return True
+        for _ in SystemUtils.scan_files(directory, extensions, min_filesize):
+            return True
 
         return False
 
@@ -263,13 +415,14 @@ class SystemUtils:
         if directory.is_file():
             return [directory]
 
+        pattern = SystemUtils.__get_ext_pattern(tuple(extensions))
         files = []
-        pattern = r".*(" + "|".join(extensions) + ")$"
 
         # 遍历目录
-        for path in directory.iterdir():
-            if path.is_file() and re.match(pattern, path.name, re.IGNORECASE):
-                files.append(path)
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file() and pattern.match(entry.name):
+                    files.append(Path(entry.path))
 
         return files
 
@@ -523,3 +676,39 @@ class SystemUtils:
         if os.name == "nt":
             return src.drive == dest.drive
         return os.stat(src).st_dev == os.stat(dest).st_dev
+
+
+class _ZipStreamBuffer:
+    """
+    流式生成zip时使用的不可寻址缓冲区，写入的数据由生成器及时取走
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    @property
+    def size(self) -> int:
+        """
+        待取走的字节数
+        """
+        return sum(len(chunk) for chunk in self._chunks)
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        """
+        取走已写入的数据
+        """
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
@@ -0,0 +1,36 @@
+"""1.0.21
+
+Revision ID: 3d8d6ab4c9f1
+Revises: a40261701909
+Create Date: 2024-06-03 10:12:36.418562
+
+"""
+from alembic import op
+
+from app.db import fts_statements
+
+# revision identifiers, used by Alembic.
+revision = '3d8d6ab4c9f1'
+down_revision = 'a40261701909'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    创建转移历史、下载历史的全文索引
+    """
+    for table, columns in {
+        "transferhistory": ["title", "src", "dest", "seasons", "episodes"],
+        "downloadhistory": ["title", "path", "torrent_name", "seasons", "episodes"]
+    }.items():
+        try:
+            for statement in fts_statements(table, columns):
+                op.execute(statement)
+        except Exception as e:
+            # SQLite版本过低不支持trigram分词时，继续使用LIKE查询
+            pass
+
+
+def downgrade() -> None:
+    pass
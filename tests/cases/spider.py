@@ -0,0 +1,159 @@
+spider_indexer = {
+    "id": "nexusphp",
+    "name": "NexusPHP",
+    "domain": "https://nexus.example.org/",
+    "encoding": "UTF-8",
+    "public": False,
+    "search": {
+        "paths": [{
+            "path": "torrents.php",
+            "method": "get"
+        }],
+        "params": {
+            "search": "{keyword}",
+            "search_area": 4
+        }
+    },
+    "category": {
+        "movie": [{"id": 401, "cat": "Movies", "desc": "Movies"}],
+        "tv": [{"id": 402, "cat": "TV", "desc": "TV Series"}]
+    },
+    "torrents": {
+        "list": {
+            "selector": 'table.torrents > tr:has("table.torrentname")'
+        },
+        "fields": {
+            "title_default": {
+                "selector": 'a[href*="details.php?id="]'
+            },
+            "title_optional": {
+                "optional": True,
+                "selector": 'a[title][href*="details.php?id="]',
+                "attribute": "title"
+            },
+            "title": {
+                "text": "{% if fields['title_optional'] %}{{ fields['title_optional'] }}"
+                        "{% else %}{{ fields['title_default'] }}{% endif %}"
+            },
+            "details": {
+                "selector": 'a[href*="details.php?id="]',
+                "attribute": "href"
+            },
+            "download": {
+                "selector": 'a[href*="download.php?id="]',
+                "attribute": "href"
+            },
+            "imdbid": {
+                "selector": 'div.imdb_100 > a',
+                "attribute": "href",
+                "filters": [{"name": "re_search", "args": ["tt\\d+", 0]}]
+            },
+            "date_elapsed": {
+                "selector": 'td:nth-child(4) > span',
+                "optional": True
+            },
+            "date_added": {
+                "selector": 'td:nth-child(4) > span',
+                "attribute": "title",
+                "optional": True
+            },
+            "size": {
+                "selector": 'td:nth-child(5)'
+            },
+            "seeders": {
+                "selector": 'td:nth-child(6)'
+            },
+            "leechers": {
+                "selector": 'td:nth-child(7)'
+            },
+            "grabs": {
+                "selector": 'td:nth-child(8)'
+            },
+            "downloadvolumefactor": {
+                "case": {
+                    "img.pro_free": 0,
+                    "img.pro_free2up": 0,
+                    "img.pro_50pctdown": 0.5,
+                    "*": 1
+                }
+            },
+            "uploadvolumefactor": {
+                "case": {
+                    "img.pro_free2up": 2,
+                    "img.pro_2up": 2,
+                    "*": 1
+                }
+            },
+            "description": {
+                "selector": 'table.torrentname > tr > td.embedded',
+                "remove": "a, b, img, span",
+                "contents": -1
+            },
+            "labels": {
+                "selector": 'table.torrentname > tr > td.embedded > span.tags'
+            },
+            "category": {
+                "selector": 'a[href*="?cat="]',
+                "attribute": "href",
+                "filters": [{"name": "querystring", "args": "cat"}]
+            },
+            "hr": {
+                "selector": 'img.hitandrun'
+            }
+        }
+    }
+}
+
+
+def spider_html(rows: int = 100) -> str:
+    """
+    生成NexusPHP种子列表页面
+    """
+    trs = []
+    for i in range(rows):
+        promotion = '<img class="pro_free" src="pic/trans.gif" alt="Free" />' if i % 3 == 0 else ''
+        hr = '<img class="hitandrun" src="pic/trans.gif" alt="H&amp;R" />' if i % 5 == 0 else ''
+        trs.append(f'''
+<tr>
+  <td class="rowfollow nowrap" valign="middle" style="padding: 0px">
+    <a href="?cat={401 if i % 2 else 402}"><img class="c_movie" src="pic/cattrans.gif" alt="Movies" /></a>
+  </td>
+  <td class="rowfollow" width="100%" align="left">
+    <table class="torrentname" width="100%">
+      <tr>
+        <td class="embedded">
+          <a title="Show.Name.{i}.S01E{i % 20 + 1:02d}.2160p.WEB-DL.H265.DDP5.1-TEAM" href="details.php?id={1000 + i}&amp;hit=1">
+            <b>Show.Name.{i}.S01E{i % 20 + 1:02d}.2160p.WEB-DL...</b></a>
+          {promotion}{hr}
+          <span class="tags">官方</span><span class="tags">中字</span>
+          <br />剧集名称 第{i % 20 + 1}集 | 类型: 剧情
+        </td>
+        <td width="80" class="embedded" style="text-align: right; " valign="middle">
+          <a href="download.php?id={1000 + i}"><img class="download" src="pic/trans.gif" alt="download" /></a>
+          <div class="imdb_100"><a href="https://www.imdb.com/title/tt{1234500 + i}/">IMDb</a></div>
+        </td>
+      </tr>
+    </table>
+  </td>
+  <td class="rowfollow"><a href="comment.php?id={1000 + i}">{i}</a></td>
+  <td class="rowfollow nowrap"><span title="2024-01-{i % 28 + 1:02d} 12:00:00">{i}天</span></td>
+  <td class="rowfollow">{i % 50 + 1}.{i % 10}<br />GB</td>
+  <td class="rowfollow" align="center"><b><a href="details.php?id={1000 + i}#peers">{i * 3:,}</a></b></td>
+  <td class="rowfollow"><b><a href="details.php?id={1000 + i}#leechers">{i}</a></b></td>
+  <td class="rowfollow"><a href="viewsnatches.php?id={1000 + i}"><b>{i * 7}</b></a></td>
+  <td class="rowfollow"><i>anonymous</i></td>
+</tr>''')
+    return f'''<!DOCTYPE html>
+<html>
+<head><meta http-equiv="Content-Type" content="text/html; charset=utf-8" /><title>Torrents</title></head>
+<body>
+<table class="torrents" cellspacing="0" cellpadding="5" width="100%">
+<tr>
+  <td class="colhead">类型</td><td class="colhead">标题</td><td class="colhead">评论</td><td class="colhead">存活</td>
+  <td class="colhead">大小</td><td class="colhead">种子</td><td class="colhead">下载</td><td class="colhead">完成</td>
+  <td class="colhead">发布者</td>
+</tr>
+{"".join(trs)}
+</table>
+</body>
+</html>'''
@@ -1,12 +1,54 @@
 import unittest
 
+from tests.test_copy import CopyFileTest
+from tests.test_fileindex import FileIndexTest
+from tests.test_history_search import HistorySearchTest
+from tests.test_local_download import LocalDownloadTest
+from tests.test_logfile import LogFileTest
 from tests.test_metainfo import MetaInfoTest
+from tests.test_notification import NotificationTest
+from tests.test_spider import TorrentSpiderTest
+from tests.test_subscribe_match import SubscribeMatchTest
+from tests.test_tmdb_cache import TmdbDetailCacheTest
+from tests.test_torrent_sort import TorrentSortTest
+from tests.test_torrentcache import TorrentCacheTest
+from tests.test_words import WordsMatcherTest
 
 if __name__ == '__main__':
     suite = unittest.TestSuite()
 
     # 测试名称识别
     suite.addTest(MetaInfoTest('test_metainfo'))
+    # 测试自定义识别词
+    suite.addTest(WordsMatcherTest('test_prepare'))
+    # 测试站点页面解析
+    suite.addTest(TorrentSpiderTest('test_parse'))
+    # 测试订阅匹配索引
+    suite.addTest(SubscribeMatchTest('test_match_by_subtitle'))
+    # 测试种子缓存存储
+    suite.addTest(TorrentCacheTest('test_add_and_evict'))
+    # 测试文件复制
+    suite.addTest(CopyFileTest('test_copy_file'))
+    suite.addTest(CopyFileTest('test_copy_resume'))
+    suite.addTest(CopyFileTest('test_copy_fallback'))
+    # 测试媒体库文件索引
+    suite.addTest(FileIndexTest('test_list_files'))
+    # 测试种子排序
+    suite.addTest(TorrentSortTest('test_sort_torrents'))
+    # 测试日志读取
+    suite.addTest(LogFileTest('test_tail'))
+    suite.addTest(LogFileTest('test_search'))
+    # 测试本地文件下载
+    suite.addTest(LocalDownloadTest('test_download_range'))
+    suite.addTest(LocalDownloadTest('test_zip_stream'))
+    # 测试历史记录搜索
+    suite.addTest(HistorySearchTest('test_search'))
+    # 测试消息发送队列
+    suite.addTest(NotificationTest('test_coalesce'))
+    suite.addTest(NotificationTest('test_retry_and_rate_limit'))
+    # 测试TMDB详情缓存
+    suite.addTest(TmdbDetailCacheTest('test_single_flight'))
+    suite.addTest(TmdbDetailCacheTest('test_stale_while_revalidate'))
 
     # 运行测试
     runner = unittest.TextTestRunner()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+from app.utils.system import SystemUtils
+
+
+class CopyFileTest(TestCase):
+    # 基准测试文件大小
+    bench_size = 256 * 1024 * 1024
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tempdir.name)
+        self.src = self.root / "src.mkv"
+        self.data = os.urandom(5 * 1024 * 1024 + 123)
+        self.src.write_bytes(self.data)
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def test_copy_file(self):
+        dest = self.root / "dest.mkv"
+        progress = []
+        SystemUtils.copy_file(self.src, dest, callback=lambda c, t: progress.append((c, t)), chunk_size=1024 * 1024)
+        self.assertEqual(dest.read_bytes(), self.data)
+        self.assertFalse((self.root / "dest.mkv.part").exists())
+        self.assertEqual(progress[-1], (len(self.data), len(self.data)))
+        self.assertEqual(os.stat(dest).st_mtime, os.stat(self.src).st_mtime)
+        # 流式校验
+        digest = SystemUtils.copy_file(self.src, self.root / "sum.mkv", hash_name="sha1")
+        self.assertEqual(digest, hashlib.sha1(self.data).hexdigest())
+
+    def test_copy_resume(self):
+        dest = self.root / "dest.mkv"
+        part = self.root / "dest.mkv.part"
+        # 已复制一半的临时文件从断点继续
+        part.write_bytes(self.data[:3 * 1024 * 1024])
+        progress = []
+        digest = SystemUtils.copy_file(self.src, dest, callback=lambda c, t: progress.append(c), hash_name="md5")
+        self.assertEqual(progress[0], 3 * 1024 * 1024)
+        self.assertEqual(dest.read_bytes(), self.data)
+        self.assertEqual(digest, hashlib.md5(self.data).hexdigest())
+        # 内容不一致的临时文件重新复制
+        part.write_bytes(b"x" * 1024)
+        progress.clear()
+        SystemUtils.copy_file(self.src, dest, callback=lambda c, t: progress.append(c))
+        self.assertEqual(progress[0], 0)
+        self.assertEqual(dest.read_bytes(), self.data)
+        # 只有中间部分不一致时也重新复制
+        part.write_bytes(b"x" * 1024 + self.data[1024:3 * 1024 * 1024])
+        progress.clear()
+        digest = SystemUtils.copy_file(self.src, dest, callback=lambda c, t: progress.append(c), hash_name="md5")
+        self.assertEqual(progress[0], 0)
+        self.assertEqual(dest.read_bytes(), self.data)
+        self.assertEqual(digest, hashlib.md5(self.data).hexdigest())
+
+    @skipUnless(hasattr(os, "copy_file_range"), "不支持copy_file_range")
+    def test_copy_fallback(self):
+        dest = self.root / "dest.mkv"
+        # copy_file_range未到文件末尾返回0时回退到缓冲区读写
+        with patch("os.copy_file_range", return_value=0):
+            SystemUtils.copy_file(self.src, dest, chunk_size=1024 * 1024)
+        self.assertEqual(dest.read_bytes(), self.data)
+
+    @skipUnless(os.environ.get("MP_BENCHMARK"), "设置环境变量MP_BENCHMARK时运行基准测试")
+    def test_copy_benchmark(self):
+        src = self.root / "bench.mkv"
+        with open(src, 'wb') as f:
+            for _ in range(self.bench_size // (16 * 1024 * 1024)):
+                f.write(os.urandom(16 * 1024 * 1024))
+        start_time = time.perf_counter()
+        shutil.copy2(src, self.root / "bench_shutil.mkv")
+        shutil_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        SystemUtils.copy_file(src, self.root / "bench_engine.mkv")
+        engine_time = time.perf_counter() - start_time
+        print(f"shutil.copy2: {shutil_time:.3f}s, copy_file: {engine_time:.3f}s")
+        self.assertEqual(os.stat(self.root / "bench_engine.mkv").st_size, self.bench_size)
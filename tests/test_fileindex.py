@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase
+
+from app.helper.fileindex import FileIndexHelper
+from app.utils.system import SystemUtils
+
+
+class FileIndexTest(TestCase):
+    extensions = ['.mkv', '.mp4']
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tempdir.name) / "Show (2020)"
+        for season in range(1, 3):
+            season_dir = self.root / f"Season {season}"
+            season_dir.mkdir(parents=True)
+            for episode in range(1, 4):
+                (season_dir / f"Show - S{season:02d}E{episode:02d}.mkv").write_bytes(b"0")
+                (season_dir / f"Show - S{season:02d}E{episode:02d}.nfo").write_bytes(b"0")
+        # 目录修改时间置为过去，使索引缓存生效
+        past = time.time() - 60
+        for path in [self.root, *self.root.iterdir()]:
+            os.utime(path, (past, past))
+        self.index = FileIndexHelper()
+
+    def tearDown(self) -> None:
+        self.index.clear()
+        self.tempdir.cleanup()
+
+    def test_list_files(self):
+        files = self.index.list_files(self.root, self.extensions)
+        self.assertEqual(sorted(files), sorted(SystemUtils.list_files(self.root, self.extensions)))
+        self.assertEqual(len(files), 6)
+        # 新增文件后目录修改时间变化，重新扫描
+        (self.root / "Season 2" / "Show - S02E04.mp4").write_bytes(b"0")
+        self.assertEqual(len(self.index.list_files(self.root, self.extensions)), 7)
+        self.assertTrue(self.index.exists_files(self.root / "Season 1", self.extensions))
+        self.assertFalse(self.index.exists_files(self.root / "Season 1", ['.mp4']))
+        seasons = {}
+        for file in self.index.list_files(self.root, self.extensions):
+            season, episode = self.index.get_season_episode(file)
+            seasons.setdefault(season, []).append(episode)
+        self.assertEqual({k: sorted(v) for k, v in seasons.items()}, {1: [1, 2, 3], 2: [1, 2, 3, 4]})
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base, fts_statements
+from app.db.models.downloadhistory import DownloadHistory
+from app.db.models.transferhistory import TransferHistory
+
+
+class HistorySearchTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{Path(self.tempdir.name) / 'user.db'}")
+        Base.metadata.create_all(bind=self.engine)
+        with self.engine.begin() as conn:
+            for statement in fts_statements("transferhistory", ["title", "src", "dest", "seasons", "episodes"]):
+                conn.execute(text(statement))
+            for statement in fts_statements("downloadhistory", ["title", "path", "torrent_name",
+                                                                "seasons", "episodes"]):
+                conn.execute(text(statement))
+        self.db = sessionmaker(bind=self.engine)()
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+        self.tempdir.cleanup()
+
+    def _add_transfers(self, count: int):
+        self.db.bulk_insert_mappings(TransferHistory, [{
+            "title": f"流浪地球{i % 50}" if i % 10 else f"The Wandering Earth {i}",
+            "src": f"/downloads/movie.{i}.mkv",
+            "dest": f"/library/电影/流浪地球{i % 50}/movie.{i}.mkv",
+            "seasons": "S01",
+            "episodes": f"E{i % 24:02d}",
+            "status": i % 3 != 0,
+            "date": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(1700000000 + i))
+        } for i in range(count)])
+        self.db.commit()
+
+    def test_search(self):
+        self._add_transfers(1000)
+        # 全文索引与LIKE结果一致
+        for keyword in ["Wandering", "流浪地球1", "movie.99", "地球", "E05"]:
+            like = self.db.execute(text(
+                "SELECT count(*) FROM transferhistory WHERE title LIKE :kw OR src LIKE :kw OR dest LIKE :kw "
+                "OR seasons LIKE :kw OR episodes LIKE :kw"), {"kw": f"%{keyword}%"}).scalar()
+            _, total = TransferHistory.list_with_total(self.db, title=keyword, count=10)
+            self.assertEqual(total, like, keyword)
+        # 游标翻页与OFFSET翻页结果一致，总数不受游标影响
+        ids, cursor = [], None
+        while True:
+            result, total = TransferHistory.list_with_total(self.db, title="流浪地球", status=True,
+                                                            cursor=cursor, count=100)
+            if not result:
+                break
+            self.assertEqual(total, 666)
+            ids.extend(history.id for history in result)
+            cursor = result[-1].id
+        self.assertEqual(ids, [history.id for history in TransferHistory.list_by_title(
+            self.db, title="流浪地球", status=True, count=1000)])
+        # 修改、删除后索引同步
+        history = TransferHistory.get(self.db, ids[0])
+        history.update(self.db, {"title": "三体世界", "dest": "/library/三体世界"})
+        self.assertEqual(TransferHistory.count_by_title(self.db, title="三体世界"), 1)
+        self.assertEqual(TransferHistory.list_with_total(self.db, title="流浪地球", status=True)[1], 665)
+        TransferHistory.delete(self.db, ids[0])
+        self.assertEqual(TransferHistory.list_with_total(self.db, title="三体世界")[1], 0)
+        # 下载历史
+        DownloadHistory(path="/downloads/Three.Body.S01", type="电视剧", title="三体", seasons="S01",
+                        torrent_name="Three.Body.S01.2023.1080p").create(self.db)
+        self.assertEqual(len(DownloadHistory.list_by_page(self.db, title="1080p")), 1)
+        self.assertEqual(len(DownloadHistory.list_by_page(self.db, title="三体")), 1)
+        # 少于3个字符的关键字使用LIKE查询，同样匹配季集
+        DownloadHistory(path="/downloads/三体", type="电视剧", title="三体", seasons="S02", episodes="E07",
+                        torrent_name="三体.第二季").create(self.db)
+        self.assertEqual(len(DownloadHistory.list_by_page(self.db, title="07")), 1)
+        like = self.db.execute(text(
+            "SELECT count(*) FROM transferhistory WHERE title LIKE :kw OR src LIKE :kw OR dest LIKE :kw "
+            "OR seasons LIKE :kw OR episodes LIKE :kw"), {"kw": "%E1%"}).scalar()
+        self.assertEqual(TransferHistory.list_with_total(self.db, title="E1")[1], like)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import TestCase
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.endpoints import local
+from app.core.security import verify_uri_token
+from app.utils.system import SystemUtils
+
+
+class LocalDownloadTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tempdir.name)
+        self.file = self.root / "movie.mkv"
+        self.data = os.urandom(100 * 1024 + 7)
+        self.file.write_bytes(self.data)
+        app = FastAPI()
+        app.include_router(local.router)
+        app.dependency_overrides[verify_uri_token] = lambda: None
+        self.client = TestClient(app)
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.tempdir.cleanup()
+
+    def _download(self, range_header: str = None):
+        headers = {"Range": range_header} if range_header else {}
+        return self.client.get("/download", params={"path": str(self.file)}, headers=headers)
+
+    def test_download_range(self):
+        size = len(self.data)
+        # 无范围时返回整个文件
+        response = self._download()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.data)
+        # 指定范围
+        response = self._download("bytes=10-99")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers["Content-Range"], f"bytes 10-99/{size}")
+        self.assertEqual(response.content, self.data[10:100])
+        # 不指定结束位置
+        response = self._download("bytes=1000-")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers["Content-Range"], f"bytes 1000-{size - 1}/{size}")
+        self.assertEqual(response.content, self.data[1000:])
+        # 结束位置超出文件大小
+        response = self._download(f"bytes=1000-{size + 100}")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, self.data[1000:])
+        # 最后若干字节
+        response = self._download("bytes=-500")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, self.data[-500:])
+        # 后缀长度超出文件大小时返回整个文件
+        response = self._download(f"bytes=-{size + 100}")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, self.data)
+        # 无法满足的范围
+        for range_header in ["bytes=-0", f"bytes={size}-", f"bytes={size + 10}-{size + 20}", "bytes=100-10"]:
+            response = self._download(range_header)
+            self.assertEqual(response.status_code, 416, range_header)
+            self.assertEqual(response.headers["Content-Range"], f"bytes */{size}")
+
+    def test_zip_stream(self):
+        directory = self.root / "Show"
+        (directory / "Season 1").mkdir(parents=True)
+        files = {
+            "Show/movie.mkv": self.data,
+            "Show/Season 1/S01E01.nfo": ("<episodedetails/>" * 1000).encode()
+        }
+        for name, content in files.items():
+            (self.root / name).write_bytes(content)
+        data = b"".join(SystemUtils.zip_stream(directory, store_exts=[".mkv"], chunk_size=4096))
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(sorted(zf.namelist()), sorted(files))
+            for name, content in files.items():
+                self.assertEqual(zf.read(name), content)
+            # 媒体文件不压缩，其它文件压缩
+            self.assertEqual(zf.getinfo("Show/movie.mkv").compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(zf.getinfo("Show/Season 1/S01E01.nfo").compress_type, zipfile.ZIP_DEFLATED)
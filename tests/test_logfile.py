@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from app.helper.logfile import LogFileHelper
+
+
+class LogFileTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.log_path = Path(self.tempdir.name) / "test.log"
+        self.lines = [f"【{'ERROR' if i % 7 == 0 else 'INFO'}】line {i} " + "x" * (i % 300) for i in range(5000)]
+        # 较早的日志在轮转备份文件中
+        self.log_path.with_name("test.log.1").write_text("\n".join(self.lines[:2000]) + "\n", encoding="utf-8")
+        self.log_path.write_text("\n".join(self.lines[2000:]) + "\n", encoding="utf-8")
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def test_tail(self):
+        helper = LogFileHelper()
+        self.assertEqual(helper.tail(self.log_path, 50), self.lines[-50:])
+        self.assertEqual(helper.tail(self.log_path, 10000), self.lines[2000:])
+
+    def test_search(self):
+        helper = LogFileHelper()
+        lines, cursor = [], None
+        while True:
+            page, cursor = helper.search(self.log_path, level="error", cursor=cursor, limit=99)
+            lines.extend(page)
+            if not cursor:
+                break
+        self.assertEqual(lines, [line for line in reversed(self.lines) if line.startswith("【ERROR】")])
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase
+
+from app.helper.notification import NotificationHelper, TokenBucket
+from app.schemas import Notification
+from app.schemas.types import MessageChannel, NotificationType
+
+
+class NotificationTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.helper = NotificationHelper(db_path=Path(self.tempdir.name) / "outbox.db")
+        self.helper._coalesce_seconds = 0.5
+        self.helper._retry_seconds = 0.1
+        self.sent = []
+        self.done = threading.Event()
+
+    def tearDown(self) -> None:
+        self.helper.stop()
+        self.tempdir.cleanup()
+
+    def _sender(self, expect: int, fail: int = 0):
+        failures = [fail]
+
+        def send(message: Notification):
+            if failures[0] > 0:
+                failures[0] -= 1
+                self.sent.append(None)
+                return False
+            self.sent.append(message)
+            if len([m for m in self.sent if m]) >= expect:
+                self.done.set()
+            return True
+
+        return send
+
+    @staticmethod
+    def _message(title: str, channel: MessageChannel = MessageChannel.Telegram) -> Notification:
+        return Notification(channel=channel, mtype=NotificationType.Organize, title=title, text="text")
+
+    def test_coalesce(self):
+        self.helper.start(sender=self._sender(expect=2))
+        for i in range(1, 31):
+            self.helper.put(self._message(f"流浪地球 S01 E{i:02d} 已入库"), coalesce_key="organize:1:S01")
+        # 未设置合并键的消息立即发送
+        self.helper.put(self._message("站点签到"))
+        self.assertTrue(self.done.wait(5))
+        self.assertEqual(self.sent[0].title, "站点签到")
+        digest = self.sent[1]
+        self.assertEqual(digest.title, "流浪地球 S01 E01 已入库 等30条消息")
+        self.assertEqual(digest.channel, MessageChannel.Telegram)
+        self.assertEqual(digest.mtype, NotificationType.Organize)
+        self.assertEqual(len(digest.text.splitlines()), self.helper._digest_lines + 1)
+
+    def test_retry_and_rate_limit(self):
+        self.helper._buckets[MessageChannel.Slack] = TokenBucket(rate=20, capacity=2)
+        # 发件箱中的消息在启动后发送
+        for i in range(6):
+            self.helper.put(self._message(f"消息{i}", channel=MessageChannel.Slack))
+        start_time = time.time()
+        self.helper.start(sender=self._sender(expect=6, fail=2))
+        self.assertTrue(self.done.wait(5))
+        elapsed = time.time() - start_time
+        # 失败的消息退避后重试，不阻塞后续消息
+        self.assertEqual(sorted(m.title for m in self.sent if m), [f"消息{i}" for i in range(6)])
+        self.assertEqual(len([m for m in self.sent if m is None]), 2)
+        # 8次发送中6次需要等待令牌
+        self.assertGreaterEqual(elapsed, 0.25)
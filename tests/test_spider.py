@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import copy
+import importlib.util
+import os
+import time
+from unittest import TestCase, skipUnless
+
+from pyquery import PyQuery
+
+from tests.cases.spider import spider_indexer, spider_html
+
+
+@skipUnless(importlib.util.find_spec("app.helper.sites"), "站点资源包未安装")
+class TorrentSpiderTest(TestCase):
+    # 测试页面种子数量
+    row_count = 100
+
+    def setUp(self) -> None:
+        self.html = spider_html(self.row_count)
+
+    def tearDown(self) -> None:
+        pass
+
+    def test_parse(self):
+        from app.modules.indexer.spider import TorrentSpider
+        torrents = TorrentSpider(indexer=spider_indexer).parse(self.html)
+        self.assertEqual(len(torrents), self.row_count)
+        self.assertEqual(torrents[1], {
+            "title": "Show.Name.1.S01E02.2160p.WEB-DL.H265.DDP5.1-TEAM",
+            "description": "剧集名称 第2集 | 类型: 剧情",
+            "page_url": "https://nexus.example.org/details.php?id=1001&hit=1",
+            "enclosure": "https://nexus.example.org/download.php?id=1001",
+            "grabs": 7,
+            "peers": 1,
+            "seeders": 3,
+            "size": 2254857830,
+            "imdbid": "tt1234501",
+            "downloadvolumefactor": 1,
+            "uploadvolumefactor": 1,
+            "pubdate": "2024-01-02 12:00:00",
+            "date_elapsed": "1天",
+            "labels": ["官方", "中字"],
+            "hit_and_run": False,
+            "category": "电影"
+        })
+        # 达到搜索条数后停止
+        indexer = dict(spider_indexer, result_num=10)
+        self.assertEqual(len(TorrentSpider(indexer=indexer).parse(self.html)), 10)
+
+    @skipUnless(os.environ.get("MP_BENCHMARK"), "设置环境变量MP_BENCHMARK时运行基准测试")
+    def test_parse_benchmark(self):
+        from app.modules.indexer.spider import TorrentSpider
+        fields = spider_indexer["torrents"]["fields"]
+
+        def pyquery_parse(html_text: str):
+            """
+            原PyQuery解析方式：逐行包装PyQuery、逐字段CSS查询并复制结果
+            """
+            results = []
+            html_doc = PyQuery(html_text)
+            for torn in html_doc(spider_indexer["torrents"]["list"]["selector"]):
+                torrent = PyQuery(torn)
+                info = {}
+                for name, selector in fields.items():
+                    if not selector.get("selector"):
+                        continue
+                    item = torrent(selector.get("selector")).clone()
+                    if "attribute" in selector:
+                        info[name] = [i.attr(selector.get("attribute")) for i in item.items()]
+                    else:
+                        info[name] = [i.text() for i in item.items()]
+                results.append(copy.deepcopy(info))
+            return results
+
+        times = 10
+        start_time = time.perf_counter()
+        for _ in range(times):
+            pyquery_parse(self.html)
+        pyquery_time = (time.perf_counter() - start_time) / times
+        start_time = time.perf_counter()
+        for _ in range(times):
+            TorrentSpider(indexer=spider_indexer).parse(self.html)
+        lxml_time = (time.perf_counter() - start_time) / times
+        print(f"{self.row_count} 条种子页面解析耗时：PyQuery {pyquery_time * 1000:.2f} ms，"
+              f"lxml {lxml_time * 1000:.2f} ms")
+        self.assertLess(lxml_time, pyquery_time)
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import importlib.util
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+from app.core.context import Context, MediaInfo, TorrentInfo
+from app.core.metainfo import MetaInfo
+from app.helper.torrent import TorrentHelper
+from app.schemas.types import MediaType
+
+
+@skipUnless(importlib.util.find_spec("app.helper.sites"), "站点资源包未安装")
+class SubscribeMatchTest(TestCase):
+
+    def setUp(self) -> None:
+        from app.chain.subscribe import SubscribeChain
+        self.chain = SubscribeChain.__new__(SubscribeChain)
+        self.build_index = self.chain._SubscribeChain__build_match_index
+        self.get_candidates = SubscribeChain._SubscribeChain__get_match_candidates
+
+    def tearDown(self) -> None:
+        pass
+
+    @staticmethod
+    def _context(title: str, description: str = None) -> Context:
+        return Context(meta_info=MetaInfo(title=title, subtitle=description), media_info=MediaInfo(),
+                       torrent_info=TorrentInfo(site_name="站点", title=title, description=description,
+                                                enclosure=f"https://a.com/{title}"))
+
+    def test_match_by_subtitle(self):
+        contexts = [
+            # 标题中没有中文名，只能通过副标题匹配
+            self._context("Some.Random.Release.2023.1080p.WEB-DL.H264", "流浪地球2 | 类型: 科幻"),
+            self._context("Another.Release.2023.1080p.WEB-DL.H264", "三体 | 类型: 科幻"),
+        ]
+        mediainfo = MediaInfo(type=MediaType.MOVIE, title="流浪地球2", year="2023", tmdb_id=842675)
+        # 未识别的种子重新识别仍失败
+        with patch.object(self.chain, "recognize_media", return_value=None):
+            index = self.build_index({"a.com": contexts})
+        candidates = self.get_candidates(index, mediainfo)
+        self.assertEqual([context for _, context, _ in candidates], contexts[:1])
+        _, context, _ = candidates[0]
+        self.assertTrue(TorrentHelper().match_torrent(mediainfo=mediainfo,
+                                                      torrent_meta=context.meta_info,
+                                                      torrent=context.torrent_info))
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.modules.themoviedb.tmdb_cache import TmdbDetailCache
+from app.schemas.types import MediaType
+
+
+class TmdbDetailCacheTest(TestCase):
+
+    def setUp(self) -> None:
+        self.cache = TmdbDetailCache()
+        self.cache.clear()
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def _loader(self, delay: float = 0.2):
+        def load():
+            with self.lock:
+                self.calls += 1
+                calls = self.calls
+            time.sleep(delay)
+            return {"id": 100, "name": f"剧集{calls}", "genres": [{"id": 18}]}
+
+        return load
+
+    def test_single_flight(self):
+        stats = self.cache.stats()
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            results = list(executor.map(lambda _: self.cache.get(MediaType.TV, 100, self._loader()), range(20)))
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(result == results[0] for result in results))
+        # 返回副本，修改结果不影响缓存
+        results[0]["genres"].clear()
+        self.assertEqual(self.cache.get(MediaType.TV, 100, self._loader())["genres"], [{"id": 18}])
+        self.assertEqual(self.calls, 1)
+        # 强制刷新
+        self.assertEqual(self.cache.get(MediaType.TV, 100, self._loader(0), refresh=True)["name"], "剧集2")
+        # 不同类型分别缓存
+        self.cache.get(MediaType.MOVIE, 100, self._loader(0))
+        self.assertEqual(self.calls, 3)
+        new_stats = self.cache.stats()
+        self.assertEqual(new_stats["misses"] - stats["misses"], 3)
+        self.assertEqual(new_stats["coalesced"] - stats["coalesced"], 19)
+        self.assertEqual(new_stats["hits"] - stats["hits"], 1)
+
+    def test_stale_while_revalidate(self):
+        self.cache.get(MediaType.TV, 100, self._loader(0))
+        with patch.object(settings, "TMDB_DETAIL_CACHE_TTL", 0), \
+                patch.object(settings, "TMDB_DETAIL_CACHE_STALE", 3600):
+            # 过期后先返回旧数据，后台刷新
+            start_time = time.perf_counter()
+            self.assertEqual(self.cache.get(MediaType.TV, 100, self._loader())["name"], "剧集1")
+            self.assertLess(time.perf_counter() - start_time, 0.1)
+            time.sleep(0.3)
+            self.assertEqual(self.calls, 2)
+        self.assertEqual(self.cache.get(MediaType.TV, 100, self._loader())["name"], "剧集2")
+        with patch.object(settings, "TMDB_DETAIL_CACHE_TTL", 0), \
+                patch.object(settings, "TMDB_DETAIL_CACHE_STALE", 0):
+            # 超过容忍时间后同步查询
+            self.assertEqual(self.cache.get(MediaType.TV, 100, self._loader(0))["name"], "剧集3")
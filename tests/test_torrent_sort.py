@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import os
+import random
+import time
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+
+from app.core.context import Context, MediaInfo, TorrentInfo
+from app.core.meta import MetaBase
+from app.helper.torrent import TorrentHelper
+from app.schemas.types import MediaType, SystemConfigKey
+
+
+class TorrentSortTest(TestCase):
+    # 基准测试的资源数
+    bench_size = 10000
+
+    @staticmethod
+    def _contexts(count: int):
+        rnd = random.Random(count)
+        contexts = []
+        for i in range(count):
+            meta = MetaBase("")
+            meta.begin_season = rnd.randint(1, 3)
+            if rnd.random() < 0.7:
+                meta.begin_episode = rnd.randint(1, 12)
+                meta.end_episode = meta.begin_episode + rnd.randint(0, 3)
+            media = MediaInfo()
+            media.type = MediaType.TV
+            media.title = f"剧集{rnd.randint(1, 20)}"
+            media.year = "2024"
+            torrent = TorrentInfo(title=f"torrent-{i}", site_order=rnd.randint(0, 50),
+                                  pri_order=rnd.randint(0, 100), seeders=rnd.randint(0, 5000))
+            contexts.append(Context(meta_info=meta, media_info=media, torrent_info=torrent))
+        return contexts
+
+    @staticmethod
+    def _legacy_sort(contexts, get_priority):
+        """
+        原字符串排序键，用于核对结果
+        """
+
+        def get_sort_str(_context):
+            _meta = _context.meta_info
+            _torrent = _context.torrent_info
+            _season_len = str(len(_meta.season_list)).rjust(2, '0')
+            _episode_len = str(len(_meta.episode_list)).rjust(4, '0') if _meta.episode_list else "9999"
+            priority = get_priority()
+            if priority != "site":
+                return "%s%s%s%s" % (str(_context.media_info.title).ljust(100, ' '),
+                                     str(_torrent.pri_order).rjust(3, '0'),
+                                     str(_torrent.seeders).rjust(10, '0'),
+                                     "%s%s" % (_season_len, _episode_len))
+            return "%s%s%s%s%s" % (str(_context.media_info.title).ljust(100, ' '),
+                                   str(_torrent.pri_order).rjust(3, '0'),
+                                   str(999 - _torrent.site_order).rjust(3, '0'),
+                                   str(_torrent.seeders).rjust(10, '0'),
+                                   "%s%s" % (_season_len, _episode_len))
+
+        return sorted(contexts, key=get_sort_str, reverse=True)
+
+    def test_sort_torrents(self):
+        helper = TorrentHelper()
+        contexts = self._contexts(2000)
+        for priority in ["torrent", "site"]:
+            with patch.object(helper.system_config, "get", return_value=priority):
+                self.assertEqual([c.torrent_info.title for c in helper.sort_torrents(contexts)],
+                                 [c.torrent_info.title for c in self._legacy_sort(contexts, lambda: priority)])
+        groups = helper.sort_group_torrents(contexts)
+        self.assertEqual(len(groups), len({(c.media_info.title_year, c.meta_info.season_episode)
+                                           for c in contexts}))
+
+    @skipUnless(os.environ.get("MP_BENCHMARK"), "设置环境变量MP_BENCHMARK时运行基准测试")
+    def test_sort_benchmark(self):
+        helper = TorrentHelper()
+        contexts = self._contexts(self.bench_size)
+        start_time = time.perf_counter()
+        self._legacy_sort(contexts, lambda: helper.system_config.get(SystemConfigKey.TorrentsPriority))
+        legacy_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        helper.sort_torrents(contexts)
+        sort_time = time.perf_counter() - start_time
+        print(f"legacy: {legacy_time:.3f}s, sort_torrents: {sort_time:.3f}s")
+        self.assertLess(sort_time, legacy_time)
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from app.core.context import Context, MediaInfo, TorrentInfo
+from app.core.metainfo import MetaInfo
+from app.helper.torrentcache import TorrentCacheHelper
+
+
+class TorrentCacheTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.cache = TorrentCacheHelper(db_path=Path(self.tempdir.name) / "torrents.db")
+
+    def tearDown(self) -> None:
+        self.cache.clear()
+        self.tempdir.cleanup()
+
+    @staticmethod
+    def _context(title: str) -> Context:
+        return Context(meta_info=MetaInfo(title=title), media_info=MediaInfo(),
+                       torrent_info=TorrentInfo(title=title, enclosure=f"https://a.com/{title}"))
+
+    def test_add_and_evict(self):
+        titles = [f"Show.S01E{i:02d}.1080p.WEB-DL" for i in range(1, 11)]
+        self.cache.add("rss", "a.com", [self._context(t) for t in titles[:6]], limit=8)
+        # 重复种子不会再次写入
+        self.cache.add("rss", "a.com", [self._context(t) for t in titles[4:]], limit=8)
+        self.cache.add("rss", "b.com", [self._context(titles[0])], limit=8)
+        self.assertTrue(self.cache.exists("rss", "a.com", self.cache.get_key(titles[-1])))
+        self.assertFalse(self.cache.exists("rss", "a.com", self.cache.get_key(titles[0])))
+        self.assertFalse(self.cache.exists("spider", "a.com", self.cache.get_key(titles[-1])))
+        torrents = self.cache.get("rss", domains=["a.com"])
+        self.assertEqual(list(torrents.keys()), ["a.com"])
+        self.assertEqual([c.torrent_info.title for c in torrents["a.com"]], titles[2:])
+        self.assertEqual(len(self.cache.get("rss")), 2)
+        self.cache.clear("rss")
+        self.assertEqual(self.cache.get("rss"), {})
+        self.assertFalse(self.cache.exists("rss", "a.com", self.cache.get_key(titles[-1])))
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+from unittest import TestCase, skipUnless
+
+from app.core.meta.words import WordsMatcher
+
+
+class WordsMatcherTest(TestCase):
+    # 识别词数量
+    word_count = 300
+    # 测试标题数量
+    title_count = 2000
+
+    def setUp(self) -> None:
+        words = []
+        for i in range(self.word_count):
+            if i % 3 == 0:
+                words.append(f"BlockWord{i}")
+            elif i % 3 == 1:
+                words.append(f"Replaced{i} => Replace{i}")
+            else:
+                words.append(f"前缀{i} <> 后缀{i} >> EP+1")
+        words.extend([
+            "#注释",
+            "国漫",
+            r"\[Baha\]",
+            "Old.Name => New.Name",
+            "第 <> 集 >> EP-1",
+            "Show.A => Show.B && E <> .1080p >> EP+10"
+        ])
+        self.words = words
+        self.program = WordsMatcher.compile(words)
+        self.titles = [f"Some.Show.S01E{i % 99:02d}.1080p.WEB-DL" for i in range(self.title_count)]
+
+    def tearDown(self) -> None:
+        pass
+
+    def test_prepare(self):
+        title, apply_words = WordsMatcher.apply("[Baha] 国漫 Old.Name 第12集", self.program)
+        self.assertEqual(title, "  New.Name 第11集")
+        self.assertEqual(apply_words, ["国漫", r"\[Baha\]", "Old.Name => New.Name", "第 <> 集 >> EP-1"])
+        title, apply_words = WordsMatcher.apply("Show.A.E5.1080p", self.program)
+        self.assertEqual(title, "Show.B.E15.1080p")
+        self.assertEqual(apply_words, ["Show.A => Show.B && E <> .1080p >> EP+10"])
+        title, apply_words = WordsMatcher.apply("BlockWord3 Replaced4.Title", self.program)
+        self.assertEqual(title, " Replace4.Title")
+        self.assertEqual(apply_words, ["BlockWord3", "Replaced4 => Replace4"])
+
+    @skipUnless(os.environ.get("MP_BENCHMARK"), "设置环境变量MP_BENCHMARK时运行基准测试")
+    def test_prepare_benchmark(self):
+        start_time = time.perf_counter()
+        for _ in range(10):
+            WordsMatcher.compile(self.words)
+        compile_time = (time.perf_counter() - start_time) / 10
+        start_time = time.perf_counter()
+        for title in self.titles:
+            WordsMatcher.apply(title, self.program)
+        apply_time = (time.perf_counter() - start_time) / self.title_count
+        print(f"{len(self.words)} 条识别词编译耗时：{compile_time * 1000:.2f} ms，"
+              f"单个标题预处理耗时：{apply_time * 1000:.3f} ms")